@@ -1,16 +1,21 @@
 from rest_framework import exceptions
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .models import AppUser
+from .identity import get_user, is_token_revoked
 
 class AppUserJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
         try:
             user_id = validated_token['user_id']
-            user = AppUser.objects.get(id=user_id)
+            user = get_user(user_id)
         except AppUser.DoesNotExist:
             raise exceptions.AuthenticationFailed('Usuario no existe', code='user_not_found')
 
         if not user.is_active:
             raise exceptions.AuthenticationFailed('Usuario inactivo', code='user_inactive')
 
+        # Sin consultas extra: la marca de revocación viene con el usuario (en caché si está habilitada).
+        if is_token_revoked(validated_token, user):
+            raise exceptions.AuthenticationFailed('Token revocado', code='token_revoked')
+
         return user
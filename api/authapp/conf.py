@@ -72,6 +72,18 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Segundos que AppUserJWTAuthentication mantiene en caché al usuario autenticado (0 = sin caché).
+# La entrada se invalida al guardar o eliminar el usuario o su rol.
+APPUSER_CACHE_TTL = int(os.environ.get('APPUSER_CACHE_TTL', '0'))
+
+# Verificación de ID Tokens de Google: origen de los certificados (por defecto se descargan de Google y se
+# guardan en memoria según su Cache-Control). Para pruebas, 'authapp.google.LocalCertSource' los lee del
+# archivo JSON GOOGLE_ID_TOKEN_CERTS_FILE.
+GOOGLE_ID_TOKEN_CERT_SOURCE = os.environ.get('GOOGLE_ID_TOKEN_CERT_SOURCE', 'authapp.google.GoogleCertSource')
+GOOGLE_ID_TOKEN_CERTS_FILE = os.environ.get('GOOGLE_ID_TOKEN_CERTS_FILE')
+GOOGLE_ID_TOKEN_CLOCK_SKEW = int(os.environ.get('GOOGLE_ID_TOKEN_CLOCK_SKEW', '0'))
+GOOGLE_CERTS_TIMEOUT = int(os.environ.get('GOOGLE_CERTS_TIMEOUT', '5'))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Product Information Management API',
     'DESCRIPTION': 'Documentación de la API para el proyecto Django de PIM.',
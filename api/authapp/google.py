@@ -0,0 +1,144 @@
+import json
+import re
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from google.auth import exceptions, jwt
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+# Vigencia de los certificados si la respuesta no trae `Cache-Control: max-age`.
+DEFAULT_CERTS_MAX_AGE = 300
+# Intervalo mínimo entre recargas forzadas por un `kid` desconocido (rotación de claves).
+MIN_FORCED_REFRESH_INTERVAL = 30
+
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+def parse_max_age(cache_control, default=DEFAULT_CERTS_MAX_AGE):
+    """
+    Segundos de vigencia según el encabezado `Cache-Control` de la respuesta.
+    """
+    cache_control = (cache_control or '').lower()
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+    match = MAX_AGE_RE.search(cache_control)
+    return int(match.group(1)) if match else default
+
+
+class CertSource:
+    """
+    Origen de los certificados públicos con que se firman los ID Tokens,
+    como diccionario `{kid: certificado x509 en PEM}`.
+    """
+
+    def get_certs(self, force_refresh=False):
+        raise NotImplementedError
+
+
+class GoogleCertSource(CertSource):
+    """
+    Descarga los certificados de Google y los conserva en memoria del proceso
+    mientras lo permita su `Cache-Control`. Las descargas reutilizan una sesión
+    HTTP (conexiones persistentes) y un candado evita que varios inicios de
+    sesión simultáneos descarguen los certificados a la vez.
+    """
+
+    def __init__(self, url=GOOGLE_CERTS_URL, timeout=None):
+        self.url = url
+        self.timeout = timeout if timeout is not None else getattr(settings, 'GOOGLE_CERTS_TIMEOUT', 5)
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self._certs = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+
+    def _is_fresh(self, force_refresh):
+        if self._certs is None:
+            return False
+        now = time.monotonic()
+        if force_refresh:
+            return now - self._fetched_at < MIN_FORCED_REFRESH_INTERVAL
+        return now < self._expires_at
+
+    def get_certs(self, force_refresh=False):
+        if self._is_fresh(force_refresh):
+            return self._certs
+        with self._lock:
+            if self._is_fresh(force_refresh):
+                return self._certs
+            try:
+                response = self.session.get(self.url, timeout=self.timeout)
+                response.raise_for_status()
+                certs = response.json()
+            except (requests.RequestException, ValueError) as exc:
+                raise exceptions.TransportError(f"No fue posible obtener los certificados de Google: {exc}") from exc
+            now = time.monotonic()
+            self._certs = certs
+            self._fetched_at = now
+            self._expires_at = now + parse_max_age(response.headers.get('Cache-Control'))
+            return certs
+
+
+class LocalCertSource(CertSource):
+    """
+    Certificados locales, para pruebas y desarrollo sin acceso a Google. Se
+    leen del archivo JSON `GOOGLE_ID_TOKEN_CERTS_FILE`, con el mismo formato
+    que entrega Google (`{kid: certificado}`), o se reciben directamente.
+    """
+
+    def __init__(self, certs=None):
+        if certs is None:
+            with open(settings.GOOGLE_ID_TOKEN_CERTS_FILE) as f:
+                certs = json.load(f)
+        self.certs = certs
+
+    def get_certs(self, force_refresh=False):
+        return self.certs
+
+
+_cert_sources = {}
+_cert_sources_lock = threading.Lock()
+
+
+def get_cert_source():
+    """
+    Retorna el origen de certificados configurado en
+    `GOOGLE_ID_TOKEN_CERT_SOURCE`. Se instancia una vez por proceso para
+    que la caché de certificados y la sesión HTTP se compartan.
+    """
+    path = getattr(settings, 'GOOGLE_ID_TOKEN_CERT_SOURCE', 'authapp.google.GoogleCertSource')
+    source = _cert_sources.get(path)
+    if source is None:
+        with _cert_sources_lock:
+            if path not in _cert_sources:
+                _cert_sources[path] = import_string(path)()
+            source = _cert_sources[path]
+    return source
+
+
+def verify_google_id_token(token, audience, cert_source=None):
+    """
+    Verifica firma, audiencia, vigencia y emisor de un ID Token de Google y
+    retorna sus claims. Equivale a `id_token.verify_oauth2_token`, pero con
+    los certificados en caché. Si el token viene firmado con una clave que no
+    está entre los certificados en caché, los recarga una vez.
+
+    Lanza `ValueError` si el token no es válido y
+    `google.auth.exceptions.TransportError` si no se pudieron obtener los certificados.
+    """
+    source = cert_source or get_cert_source()
+    kid = jwt.decode_header(token).get('kid')
+    certs = source.get_certs()
+    if kid not in certs:
+        certs = source.get_certs(force_refresh=True)
+    idinfo = jwt.decode(
+        token, certs=certs, audience=audience,
+        clock_skew_in_seconds=getattr(settings, 'GOOGLE_ID_TOKEN_CLOCK_SKEW', 0),
+    )
+    if idinfo.get('iss') not in GOOGLE_ISSUERS:
+        raise ValueError(f"Emisor del token inválido: {idinfo.get('iss')}")
+    return idinfo
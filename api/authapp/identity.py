@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from .models import AppUser
+
+USER_CACHE_KEY = 'authapp:user:{user_id}'
+# Campo de AppUser → claim del ID Token de Google.
+GOOGLE_PROFILE_CLAIMS = {
+    'email': 'email',
+    'firstname': 'given_name',
+    'lastname': 'family_name',
+    'full_name': 'name',
+    'picture': 'picture',
+    'locale': 'locale',
+    'domain': 'hd',
+}
+
+
+def get_user_cache_ttl():
+    """
+    Segundos que un usuario autenticado permanece en caché.
+    Con 0 (valor por defecto) la caché queda deshabilitada.
+    """
+    return getattr(settings, 'APPUSER_CACHE_TTL', 0)
+
+
+def load_user(user_id):
+    """
+    Carga el usuario junto a su rol en una sola consulta.
+    Lanza `AppUser.DoesNotExist` si no existe.
+    """
+    return AppUser.objects.select_related('role').get(id=user_id)
+
+
+def get_user(user_id):
+    """
+    Retorna el usuario (con su rol) desde la caché si está habilitada,
+    o desde la base de datos en caso contrario.
+    """
+    ttl = get_user_cache_ttl()
+    if not ttl:
+        return load_user(user_id)
+
+    key = USER_CACHE_KEY.format(user_id=user_id)
+    user = cache.get(key)
+    if user is None:
+        user = load_user(user_id)
+        cache.set(key, user, ttl)
+    return user
+
+
+def invalidate_user(user_id):
+    """
+    Elimina el usuario de la caché para que la próxima solicitud lo recargue.
+    """
+    cache.delete(USER_CACHE_KEY.format(user_id=user_id))
+
+
+def revoke_user_tokens(user_id):
+    """
+    Revoca de una vez todos los tokens (de acceso y de refresco) emitidos
+    hasta ahora para el usuario, con un único UPDATE de `tokens_revoked_at`.
+    Los tokens no se guardan en la base de datos: `is_token_revoked` compara
+    su `iat` con esa marca al autenticar o refrescar.
+    """
+    revoked_at = now()
+    AppUser.objects.filter(pk=user_id).update(tokens_revoked_at=revoked_at)
+    invalidate_user(user_id)
+    return revoked_at
+
+
+def is_token_revoked(token, user):
+    """
+    Indica si el token fue emitido antes de la última revocación de tokens del usuario.
+
+    El claim `iat` tiene resolución de segundos, por lo que la marca se trunca
+    al segundo: un token emitido en el mismo segundo de la revocación (por
+    ejemplo, al volver a iniciar sesión de inmediato) sigue siendo válido.
+    """
+    revoked_at = user.tokens_revoked_at
+    return revoked_at is not None and token.get('iat', 0) < int(revoked_at.timestamp())
+
+
+def sync_google_user(idinfo, default_role):
+    """
+    Crea el usuario de Google si no existe o actualiza su perfil con los
+    claims del ID Token. Retorna `(user, created)`.
+
+    Un usuario existente solo escribe `last_login` y los campos que
+    cambiaron. Si no cambió nada, `last_login` se actualiza sin emitir
+    señales, para no invalidar las respuestas de productos que incluyen
+    datos de usuarios.
+    """
+    profile = {field: idinfo.get(claim, '') for field, claim in GOOGLE_PROFILE_CLAIMS.items()}
+    profile['email'] = idinfo.get('email')
+    login_at = now()
+
+    user = AppUser.objects.select_related('role').filter(google_id=idinfo['sub']).first()
+    if user is None:
+        user, created = AppUser.objects.select_related('role').get_or_create(
+            google_id=idinfo['sub'],
+            defaults={**profile, 'last_login': login_at, 'is_active': True, 'role': default_role},
+        )
+        if created:
+            return user, True
+
+    changed = [field for field, value in profile.items() if getattr(user, field) != value]
+    for field in changed:
+        setattr(user, field, profile[field])
+    # Asegura que el usuario tenga un rol si por alguna razón no lo tiene
+    if user.role_id is None and default_role is not None:
+        user.role = default_role
+        changed.append('role')
+    user.last_login = login_at
+
+    if changed:
+        user.save(update_fields=['last_login', *changed])
+    else:
+        AppUser.objects.filter(pk=user.pk).update(last_login=login_at)
+        invalidate_user(user.pk)
+    return user, False
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authapp.models import AppUser, AppUserRole
+from authapp.views import AppTokenRefreshView
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el rendimiento de la vista de /v1/token/refresh/ (sin middlewares): refrescos por "
+        "segundo, latencia y consultas por refresco. El usuario de prueba se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help="Refrescos a ejecutar.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        try:
+            with transaction.atomic():
+                refresh = str(RefreshToken.for_user(self.create_user()))
+                self.report(refresh)
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS("Datos de prueba revertidos."))
+
+    def create_user(self):
+        role, _ = AppUserRole.objects.get_or_create(code='benchmark', defaults={'name': 'Benchmark'})
+        return AppUser.objects.create(
+            google_id='benchmark-refresh', email='benchmark-refresh@example.com', firstname='Bench',
+            lastname='Mark', full_name='Bench Mark', picture='', role=role,
+        )
+
+    def refresh(self, view, token):
+        request = APIRequestFactory().post('/v1/token/refresh/', {'refresh': token}, format='json')
+        started = time.perf_counter()
+        response = view(request)
+        if response.status_code != 200:
+            raise RuntimeError(f"El refresco respondió {response.status_code}: {response.data}")
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, token):
+        view = AppTokenRefreshView.as_view()
+        with CaptureQueriesContext(connection) as queries:
+            self.refresh(view, token)
+        self.stdout.write(f"Consultas por refresco: {len(queries)}")
+
+        count = self.options['requests']
+        started = time.perf_counter()
+        timings = [self.refresh(view, token) for _ in range(count)]
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        self.stdout.write(
+            f"{count} refrescos en {elapsed:.2f}s: {count / elapsed:.0f} req/s | "
+            f"p50 {timings[len(timings) // 2]:.2f} ms | p99 {timings[int(len(timings) * 0.99)]:.2f} ms"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0006_rename_created_appuser_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appuser',
+            name='tokens_revoked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -21,6 +21,8 @@ class AppUser(models.Model):
     is_active = models.BooleanField(default=True)
     role = models.ForeignKey(AppUserRole, on_delete=models.SET_NULL, null=True, blank=True)
     last_login = models.DateTimeField(null=True)
+    # Los tokens JWT emitidos antes de este instante dejan de ser válidos (ver identity.revoke_user_tokens).
+    tokens_revoked_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
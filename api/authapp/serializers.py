@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from .models import AppUser, AppUserRole
+from .identity import get_user, is_token_revoked
 from core.serializers import UserFamilyAssignmentSerializer
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from rest_framework_simplejwt.exceptions import AuthenticationFailed
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
 
 class AppTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -13,34 +14,46 @@ class AppTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 class AppTokenRefreshSerializer(TokenRefreshSerializer):
-    def validate(self, attrs):
-        data = super().validate(attrs)
+    """
+    Refresca el token de acceso decodificando el token de refresco una sola
+    vez y obteniendo el usuario con su rol desde la caché de identidad (o con
+    una única consulta). No llama a `TokenRefreshSerializer.validate`, que
+    vuelve a buscar al usuario en el modelo de usuario de Django.
+    """
 
-        refresh = RefreshToken(attrs['refresh'])
-        user_id = refresh.payload.get('user_id')
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
 
         try:
-            user = AppUser.objects.select_related('role').get(id=user_id)
-            
-            if not user.is_active:
-                raise AuthenticationFailed('Usuario desactivado', code='user_inactive')
-
-            access = refresh.access_token
-            access['role'] = user.role.code
-            data['access'] = str(access)
-            
-            data['user'] = {
-                'id': user.id,
-                'email': user.email,
-                'full_name': user.full_name,
-                'is_active': user.is_active,
-                'role': user.role.code if user.role else None,
-                'picture': user.picture
-            }
-
-        except AppUser.DoesNotExist:
+            user = get_user(refresh[api_settings.USER_ID_CLAIM])
+        except (KeyError, AppUser.DoesNotExist):
             raise AuthenticationFailed('Usuario no encontrado', code='user_not_found')
 
+        if not user.is_active:
+            raise AuthenticationFailed('Usuario desactivado', code='user_inactive')
+
+        if is_token_revoked(refresh, user):
+            raise AuthenticationFailed('Token revocado', code='token_revoked')
+
+        access = refresh.access_token
+        access['role'] = user.role.code if user.role else None
+        data = {'access': str(access)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # Sin escrituras: el token anterior deja de valer al revocar los tokens del usuario.
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        data['user'] = {
+            'id': user.id,
+            'email': user.email,
+            'full_name': user.full_name,
+            'is_active': user.is_active,
+            'role': user.role.code if user.role else None,
+            'picture': user.picture
+        }
         return data
 
 class AppUserRoleSerializer(serializers.ModelSerializer):
@@ -1,6 +1,8 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete
 from django.dispatch import receiver
-from .models import AppUserRole
+from .models import AppUser, AppUserRole
+from .identity import invalidate_user
+from core.reference import roles
 
 @receiver(post_migrate)
 def insert_initial_values(sender, **kwargs):
@@ -11,4 +13,16 @@ def insert_initial_values(sender, **kwargs):
             ("default_user", "Default User"),
         ]
         for code, name in roles:
-            AppUserRole.objects.get_or_create(code=code, defaults={'name': name})
\ No newline at end of file
+            AppUserRole.objects.get_or_create(code=code, defaults={'name': name})
+
+@receiver(post_save, sender=AppUser)
+@receiver(post_delete, sender=AppUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+@receiver(post_save, sender=AppUserRole)
+@receiver(post_delete, sender=AppUserRole)
+def invalidate_cached_role_users(sender, instance, **kwargs):
+    roles.invalidate()
+    for user_id in AppUser.objects.filter(role_id=instance.pk).values_list('id', flat=True):
+        invalidate_user(user_id)
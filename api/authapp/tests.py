@@ -0,0 +1,230 @@
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from google.auth import crypt, exceptions, jwt
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import google
+from .identity import is_token_revoked, revoke_user_tokens
+from .models import AppUser, AppUserRole
+from .views import CLIENT_ID
+
+
+class AuthTestCase(TestCase):
+    """
+    Un administrador y un usuario básico, con la caché limpia en cada prueba.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = cls.create_user('admin', 'administrator')
+        cls.user = cls.create_user('user', 'default_user')
+
+    @classmethod
+    def create_user(cls, name, role_code):
+        role, _ = AppUserRole.objects.get_or_create(code=role_code, defaults={'name': role_code})
+        return AppUser.objects.create(
+            google_id=name, email=f'{name}@example.com', firstname=name, lastname=name,
+            full_name=name.title(), picture='', role=role,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post('/v1/token/refresh/', {'refresh': str(token)}, format='json')
+
+
+class TokenRevocationTests(AuthTestCase):
+
+    def test_token_issued_in_revocation_second_is_valid(self):
+        self.user.tokens_revoked_at = now().replace(microsecond=900000)
+        revoked_second = int(self.user.tokens_revoked_at.timestamp())
+
+        self.assertFalse(is_token_revoked({'iat': revoked_second}, self.user))
+        self.assertTrue(is_token_revoked({'iat': revoked_second - 1}, self.user))
+
+    def test_revocation_rejects_earlier_refresh_tokens(self):
+        old_token = RefreshToken.for_user(self.user)
+        old_token['iat'] -= 10
+        self.assertEqual(self.refresh(old_token).status_code, 200)
+
+        revoke_user_tokens(self.user.pk)
+
+        self.assertEqual(self.refresh(old_token).status_code, 401)
+        # Un inicio de sesión inmediatamente posterior obtiene un token válido.
+        self.assertEqual(self.refresh(RefreshToken.for_user(self.user)).status_code, 200)
+
+    @override_settings(APPUSER_CACHE_TTL=60)
+    def test_deactivating_user_revokes_cached_identity(self):
+        access = RefreshToken.for_user(self.user).access_token
+        access['iat'] -= 10
+        refresh = RefreshToken.for_user(self.user)
+        refresh['iat'] -= 10
+        user_client = APIClient()
+        user_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(user_client.get('/v1/users/').status_code, 200)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.patch(f'/v1/users/{self.user.pk}/', {'is_active': False}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(user=None)
+
+        self.assertEqual(user_client.get('/v1/users/').status_code, 401)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+        # Reactivar al usuario no revive los tokens emitidos antes de la desactivación.
+        self.client.force_authenticate(user=self.admin)
+        self.client.patch(f'/v1/users/{self.user.pk}/', {'is_active': True}, format='json')
+        self.client.force_authenticate(user=None)
+        self.assertEqual(user_client.get('/v1/users/').status_code, 401)
+        self.assertEqual(self.refresh(RefreshToken.for_user(self.user)).status_code, 200)
+
+
+class TokenRefreshTests(AuthTestCase):
+
+    def test_returns_access_token_with_role(self):
+        token = RefreshToken.for_user(self.user)
+        # Una sola consulta: el usuario con su rol.
+        with self.assertNumQueries(1):
+            response = self.refresh(token)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'default_user')
+        self.assertEqual((response.data['user']['id'], response.data['user']['role']), (self.user.pk, 'default_user'))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/v1/users/').status_code, 200)
+
+    def test_inactive_user_cannot_refresh(self):
+        token = RefreshToken.for_user(self.user)
+        AppUser.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = self.refresh(token)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'user_inactive')
+
+
+class StubResponse:
+    def __init__(self, certs, cache_control):
+        self.certs = certs
+        self.headers = {'Cache-Control': cache_control}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.certs
+
+
+class StubSession:
+    """Sesión HTTP que cuenta las descargas de certificados."""
+
+    def __init__(self, certs, cache_control='public, max-age=300'):
+        self.response = StubResponse(certs, cache_control)
+        self.calls = 0
+        self.error = None
+
+    def get(self, url, timeout):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self.response
+
+
+class GoogleIdTokenTests(AuthTestCase):
+    """
+    ID Tokens firmados con una clave propia y verificados con
+    `LocalCertSource`, sin acceso a Google.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'pim-tests')])
+        issued_at = datetime.now(timezone.utc) - timedelta(days=1)
+        cert = (
+            x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(issued_at).not_valid_after(issued_at + timedelta(days=2))
+            .sign(key, hashes.SHA256())
+        )
+        cls.certs = {'k1': cert.public_bytes(serialization.Encoding.PEM).decode()}
+        cls.private_key = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+
+    def setUp(self):
+        super().setUp()
+        google._cert_sources.clear()
+        self.addCleanup(google._cert_sources.clear)
+
+    def make_token(self, kid='k1', **claims):
+        issued_at = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'sub': 'google-1',
+            'email': 'new@example.com', 'iat': issued_at, 'exp': issued_at + 300, **claims,
+        }
+        return jwt.encode(crypt.RSASigner.from_string(self.private_key, key_id=kid), payload).decode()
+
+    def test_login_with_certs_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as certs_file:
+            json.dump(self.certs, certs_file)
+            certs_file.flush()
+            with override_settings(GOOGLE_ID_TOKEN_CERT_SOURCE='authapp.google.LocalCertSource',
+                                   GOOGLE_ID_TOKEN_CERTS_FILE=certs_file.name):
+                response = self.client.post('/v1/auth/google/', {'token': self.make_token()}, format='json')
+                self.assertIsInstance(google.get_cert_source(), google.LocalCertSource)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(AppUser.objects.get(google_id='google-1').email, 'new@example.com')
+
+    def test_unknown_key_reloads_certs_once(self):
+        source = google.LocalCertSource(self.certs)
+        requests_made = []
+        source.get_certs = lambda force_refresh=False: requests_made.append(force_refresh) or self.certs
+
+        self.assertEqual(google.verify_google_id_token(self.make_token(), CLIENT_ID, source)['sub'], 'google-1')
+        with self.assertRaises(ValueError):
+            google.verify_google_id_token(self.make_token(kid='k2'), CLIENT_ID, source)
+        self.assertEqual(requests_made, [False, False, True])
+
+    def test_rejects_wrong_audience_or_issuer(self):
+        source = google.LocalCertSource(self.certs)
+        for claims in ({'aud': 'otra-app'}, {'iss': 'https://example.com'}):
+            with self.assertRaises(ValueError):
+                google.verify_google_id_token(self.make_token(**claims), CLIENT_ID, source)
+
+    def test_google_source_caches_certs_by_cache_control(self):
+        source = google.GoogleCertSource(url='https://certs.invalid/')
+        source.session = StubSession(self.certs)
+
+        self.assertEqual(source.get_certs(), self.certs)
+        source.get_certs()
+        # Una recarga forzada (kid desconocido) recién descargada no vuelve a descargar.
+        source.get_certs(force_refresh=True)
+        self.assertEqual(source.session.calls, 1)
+
+        source.session = StubSession(self.certs, cache_control='no-cache')
+        source._expires_at = 0.0
+        source.get_certs()
+        source.get_certs()
+        self.assertEqual(source.session.calls, 2)
+
+        source.session.error = requests.ConnectionError('sin red')
+        source._expires_at = 0.0
+        with self.assertRaises(exceptions.TransportError):
+            source.get_certs()
@@ -1,5 +1,4 @@
 from django.conf import settings
-from django.utils.timezone import now
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -9,8 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListAPIView, RetrieveUpdateAPIView
 
 # Importaciones para la autenticación de Google OAuth2
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from google.auth import exceptions as google_exceptions
 
 # Importaciones para drf-spectacular
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, inline_serializer
@@ -18,12 +16,12 @@ from drf_spectacular.types import OpenApiTypes
 from rest_framework import serializers
 
 # Modelos, serializadores y permisos personalizados de tu aplicación
-from .models import AppUser, AppUserRole
+from .models import AppUser
 from .serializers import AppUserSerializer, AppTokenObtainPairSerializer, AppTokenRefreshSerializer
 from .permissions import IsAdminAppUser, IsActiveAppUser
-
-# Importación para el blacklisting de tokens, necesario para 'perform_update'
-from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+from .google import verify_google_id_token
+from .identity import sync_google_user, revoke_user_tokens
+from core.reference import roles
 
 
 # Obtiene el ID de cliente de Google desde la configuración de Django
@@ -77,9 +75,11 @@ class AppTokenObtainPairView(TokenObtainPairView):
             'type': 'object',
             'properties': {
                 'access': {'type': 'string', 'description': 'Nuevo token de acceso JWT'},
+                'refresh': {'type': 'string', 'description': 'Nuevo token de refresco (solo si ROTATE_REFRESH_TOKENS está activo)'},
+                'user': {'type': 'object', 'description': 'Datos del usuario dueño del token'},
             }
         },
-        400: {'description': 'Token de refresco inválido o expirado.'},
+        401: {'description': 'Token de refresco inválido, expirado o revocado, o usuario inactivo.'},
     },
     tags=['Authentication']
 )
@@ -192,49 +192,20 @@ class GoogleLoginView(APIView):
             return Response({"error": "Token no proporcionado"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Verifica el ID Token de Google usando la biblioteca oficial de Google.
-            # Esto valida que el token es auténtico y fue emitido para esta aplicación.
-            idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), CLIENT_ID)
-            email = idinfo.get('email')
+            # Verifica que el ID Token es auténtico y fue emitido para esta aplicación,
+            # con los certificados de Google en caché (ver authapp.google).
+            idinfo = verify_google_id_token(token, CLIENT_ID)
 
             # Intenta obtener el rol predeterminado para nuevos usuarios o usuarios sin rol
-            default_role = AppUserRole.objects.filter(code='default_user').first()
+            default_role = roles.get('default_user')
             # Si no existe el rol predeterminado, se podría crear o manejar el error
             if not default_role:
                 # Considera añadir un log o raise un error más específico aquí si default_user es crítico
                 pass
 
-            # Busca un usuario existente por su 'google_id' o crea uno nuevo.
-            user, created = AppUser.objects.get_or_create(
-                google_id=idinfo['sub'],
-                defaults={
-                    'email': email,
-                    'firstname': idinfo.get('given_name', ''),
-                    'lastname': idinfo.get('family_name', ''),
-                    'full_name': idinfo.get('name', ''),
-                    'picture': idinfo.get('picture', ''),
-                    'locale': idinfo.get('locale', ''),
-                    'domain': idinfo.get('hd', ''),
-                    'last_login': now(),
-                    'is_active': True,
-                    'role': default_role
-                }
-            )
-
-            # Si el usuario ya existía, actualiza sus datos con la información más reciente de Google
-            if not created:
-                user.email = email
-                user.firstname = idinfo.get('given_name', '')
-                user.lastname = idinfo.get('family_name', '')
-                user.full_name = idinfo.get('name', '')
-                user.picture = idinfo.get('picture', '')
-                user.locale = idinfo.get('locale', '')
-                user.domain = idinfo.get('hd', '')
-                user.last_login = now()
-                # Asegura que el usuario tenga un rol si por alguna razón no lo tiene
-                if not user.role:
-                    user.role = default_role
-                user.save()
+            # Busca un usuario existente por su 'google_id' o crea uno nuevo. Si ya existía,
+            # solo se escriben `last_login` y los datos de Google que cambiaron.
+            user, created = sync_google_user(idinfo, default_role)
 
             # Verifica si el usuario está activo antes de generar los tokens JWT
             if not user.is_active:
@@ -255,6 +226,8 @@ class GoogleLoginView(APIView):
 
         except ValueError:
             return Response({"error": "Token inválido"}, status=status.HTTP_401_UNAUTHORIZED)
+        except google_exceptions.TransportError:
+            return Response({"error": "No fue posible verificar el token con Google."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response({"error": f"Error interno: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -377,17 +350,13 @@ class AppUserDetailView(RetrieveUpdateAPIView):
         Realiza la actualización del objeto usuario.
 
         Además de la actualización estándar, si un usuario que estaba activo
-        se desactiva, se marcan todos sus tokens de Simple JWT como no válidos
-        (blacklisted) para forzar el cierre de sesión.
+        se desactiva, se revocan todos sus tokens JWT emitidos hasta ahora
+        para forzar el cierre de sesión.
         """
-        user_obj = self.get_object()
-        old_is_active = user_obj.is_active
+        old_is_active = serializer.instance.is_active
         instance = serializer.save()
 
         # Si el usuario estaba activo y ahora está inactivo
         if old_is_active and not instance.is_active:
-            # Marca todos los tokens emitidos para este usuario como "blacklist"
-            # Esto fuerza el cierre de sesión de todas sus sesiones activas
-            tokens = OutstandingToken.objects.filter(user=instance)
-            for token in tokens:
-                BlacklistedToken.objects.get_or_create(token=token)
+            # Un único UPDATE: los tokens anteriores a esta marca se rechazan al autenticar o refrescar
+            revoke_user_tokens(instance.pk)
@@ -65,11 +65,12 @@ MIDDLEWARE = [
 ]
 
 REST_FRAMEWORK = {
+    # Usan orjson si está instalado y, si no, el JSON estándar de DRF.
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'core.parsers.FastJSONParser',
     ]
 }
 
@@ -159,6 +160,48 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Product permissions
+# Segundos que se mantiene en caché el conjunto de subfamilias asignadas a cada usuario (0 = solo por solicitud).
+
+PRODUCT_ACL_CACHE_TTL = int(os.getenv('PRODUCT_ACL_CACHE_TTL', '0'))
+
+# Caché
+# Por defecto en memoria del proceso. Con varios procesos conviene un backend compartido, por ejemplo
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache y CACHE_LOCATION=redis://127.0.0.1:6379/1.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Respuesta JSON del detalle de producto: alias de CACHES y segundos de vigencia (0 = deshabilitada).
+
+PRODUCT_DETAIL_CACHE_ALIAS = os.getenv('PRODUCT_DETAIL_CACHE_ALIAS', 'default')
+PRODUCT_DETAIL_CACHE_TTL = int(os.getenv('PRODUCT_DETAIL_CACHE_TTL', '0'))
+
+# Búsqueda de productos: auto (FTS5 en SQLite, FULLTEXT en MySQL, en memoria en otros motores),
+# sqlite_fts, mysql_fulltext o memory.
+
+PRODUCT_SEARCH_BACKEND = os.getenv('PRODUCT_SEARCH_BACKEND', 'auto')
+
+# Autocompletado de SKU: segundos entre cada revisión del registro de cambios para incorporar
+# productos modificados por otros procesos.
+
+PRODUCT_AUTOCOMPLETE_SYNC_INTERVAL = int(os.getenv('PRODUCT_AUTOCOMPLETE_SYNC_INTERVAL', '5'))
+
+# Feed de cambios (/v1/products/changes/): segundos de antigüedad mínima de las entradas que se entregan.
+# Una transacción que confirma después de otra con un id mayor no se pierde si dura menos que este margen.
+
+PRODUCT_CHANGES_SAFETY_LAG = int(os.getenv('PRODUCT_CHANGES_SAFETY_LAG', '5'))
+
+# Tablas de referencia (estados, tipos de producto y roles)
+# Segundos que cada proceso conserva su copia en memoria antes de recargarla.
+
+REFERENCE_DATA_MAX_AGE = int(os.getenv('REFERENCE_DATA_MAX_AGE', '300'))
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
@@ -178,6 +221,11 @@ from authapp.conf import (
     REST_FRAMEWORK_AUTH,
     SIMPLE_JWT,
     SPECTACULAR_SETTINGS,
+    APPUSER_CACHE_TTL,
+    GOOGLE_ID_TOKEN_CERT_SOURCE,
+    GOOGLE_ID_TOKEN_CERTS_FILE,
+    GOOGLE_ID_TOKEN_CLOCK_SKEW,
+    GOOGLE_CERTS_TIMEOUT,
 )
 
 INSTALLED_APPS += INSTALLED_APPS_AUTH
@@ -190,4 +238,11 @@ REST_FRAMEWORK = {**globals().get('REST_FRAMEWORK', {}), **REST_FRAMEWORK_AUTH}
 
 SIMPLE_JWT = SIMPLE_JWT
 
-SPECTACULAR_SETTINGS = SPECTACULAR_SETTINGS
\ No newline at end of file
+SPECTACULAR_SETTINGS = SPECTACULAR_SETTINGS
+
+APPUSER_CACHE_TTL = APPUSER_CACHE_TTL
+
+GOOGLE_ID_TOKEN_CERT_SOURCE = GOOGLE_ID_TOKEN_CERT_SOURCE
+GOOGLE_ID_TOKEN_CERTS_FILE = GOOGLE_ID_TOKEN_CERTS_FILE
+GOOGLE_ID_TOKEN_CLOCK_SKEW = GOOGLE_ID_TOKEN_CLOCK_SKEW
+GOOGLE_CERTS_TIMEOUT = GOOGLE_CERTS_TIMEOUT
\ No newline at end of file
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import UserFamilyAssignment
+
+ACL_CACHE_KEY = 'core:acl:{user_id}:v{version}'
+ACL_VERSION_KEY = 'core:acl:{user_id}:version'
+
+
+def get_acl_cache_ttl():
+    """
+    Segundos que se mantiene en caché el conjunto de subfamilias de un usuario.
+    Con 0 (valor por defecto) solo se memoriza durante la solicitud.
+    """
+    return getattr(settings, 'PRODUCT_ACL_CACHE_TTL', 0)
+
+
+def get_acl_version(user_id):
+    return cache.get(ACL_VERSION_KEY.format(user_id=user_id), 0)
+
+
+def load_user_subfamily_ids(user_id):
+    return frozenset(
+        UserFamilyAssignment.objects.filter(user_id=user_id).values_list('subfamily_id', flat=True)
+    )
+
+
+def get_user_subfamily_ids(user):
+    """
+    Retorna el conjunto de `subfamily_id` asignados al usuario.
+
+    El resultado se memoriza en la instancia del usuario, por lo que dentro de
+    una misma solicitud se consulta una sola vez. Si `PRODUCT_ACL_CACHE_TTL`
+    es mayor que 0, además se guarda en la caché de Django bajo una clave
+    versionada que se invalida con `invalidate_user_subfamilies`.
+    """
+    subfamily_ids = getattr(user, '_subfamily_ids', None)
+    if subfamily_ids is not None:
+        return subfamily_ids
+
+    ttl = get_acl_cache_ttl()
+    if ttl:
+        key = ACL_CACHE_KEY.format(user_id=user.pk, version=get_acl_version(user.pk))
+        subfamily_ids = cache.get(key)
+        if subfamily_ids is None:
+            subfamily_ids = load_user_subfamily_ids(user.pk)
+            cache.set(key, subfamily_ids, ttl)
+    else:
+        subfamily_ids = load_user_subfamily_ids(user.pk)
+
+    user._subfamily_ids = subfamily_ids
+    return subfamily_ids
+
+
+def invalidate_user_subfamilies(user_id):
+    """
+    Incrementa la versión del ACL del usuario; las entradas anteriores
+    quedan huérfanas y expiran solas.
+    """
+    key = ACL_VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_user_role_code(user):
+    if hasattr(user, 'role') and user.role:
+        return user.role.code
+    return None
+
+
+def filter_editable_by(queryset, user):
+    """
+    Restringe un queryset de productos a los que el usuario puede editar.
+    """
+    role_code = get_user_role_code(user)
+    if role_code == 'administrator':
+        return queryset
+    if role_code == 'default_user':
+        return queryset.none()
+    return queryset.filter(subfamily_id__in=get_user_subfamily_ids(user))
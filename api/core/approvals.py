@@ -0,0 +1,106 @@
+from collections import Counter
+
+from django.db.models import F, OuterRef, Subquery
+
+from .models import Area, Family, Product, ProductWorkflow
+from .reference import statuses
+
+PENDING_APPROVAL = 'pending_approval'
+
+
+def get_pending_status_id():
+    """
+    ID del estado `pending_approval`, desde el registro en memoria de estados.
+    """
+    status = statuses.get(PENDING_APPROVAL)
+    return status.pk if status else None
+
+
+def pending_approval_key(status_id, taxonomy_key, pending_status_id=None):
+    """
+    Nodo `(area_id, family_id)` en que cuenta un producto pendiente de
+    aprobación, o `None` si el producto no está pendiente.
+    """
+    if pending_status_id is None:
+        pending_status_id = get_pending_status_id()
+    if pending_status_id is None or status_id != pending_status_id:
+        return None
+    return tuple(taxonomy_key[:2])
+
+
+def adjust_pending_approval_counts(deltas):
+    """
+    Aplica variaciones de conteo de productos pendientes de aprobación.
+    `deltas` es un mapeo `{(area_id, family_id): variación}`; cada nodo
+    afectado recibe un único `UPDATE ... SET pending_approval_count = pending_approval_count + n`.
+    """
+    area_deltas, family_deltas = Counter(), Counter()
+    for key, delta in deltas.items():
+        if key is None:
+            continue
+        area_id, family_id = key
+        if area_id is not None:
+            area_deltas[area_id] += delta
+        if family_id is not None:
+            family_deltas[family_id] += delta
+
+    for model, node_deltas in ((Area, area_deltas), (Family, family_deltas)):
+        for node_id, delta in node_deltas.items():
+            if delta:
+                model.objects.filter(pk=node_id).update(pending_approval_count=F('pending_approval_count') + delta)
+
+
+def get_approval_queue():
+    """
+    Productos pendientes de aprobación con los datos de su última solicitud
+    (`requested_at`, `requested_by_*`), resueltos en la misma consulta con
+    subconsultas correlacionadas sobre el índice `(product, -id)` del historial.
+    """
+    pending_status_id = get_pending_status_id()
+    if pending_status_id is None:
+        return Product.objects.none()
+
+    latest_request = ProductWorkflow.objects.filter(
+        product=OuterRef('pk'), new_status_id=pending_status_id
+    ).order_by('-id')
+
+    return Product.objects.filter(status_id=pending_status_id).select_related(
+        'area', 'family', 'subfamily'
+    ).only(
+        'id', 'sku', 'name', 'brand', 'status', 'created_at',
+        'area__name', 'family__name', 'subfamily__name',
+    ).annotate(
+        requested_at=Subquery(latest_request.values('created_at')[:1]),
+        requested_by_id=Subquery(latest_request.values('user_id')[:1]),
+        requested_by_email=Subquery(latest_request.values('user__email')[:1]),
+        requested_by_name=Subquery(latest_request.values('user__full_name')[:1]),
+    )
+
+
+def get_pending_approval_counts():
+    """
+    Conteos de productos pendientes por área y familia (solo nodos con
+    pendientes), leídos de los contadores que se mantienen al cambiar el
+    estado o la taxonomía de un producto. Usa una consulta por nivel.
+    """
+    families_by_area = {}
+    for family in Family.objects.filter(pending_approval_count__gt=0).order_by('name', 'id'):
+        families_by_area.setdefault(family.area_id, []).append({
+            'id': family.id,
+            'name': family.name,
+            'pending_approval_count': family.pending_approval_count,
+        })
+
+    areas = [
+        {
+            'id': area.id,
+            'name': area.name,
+            'pending_approval_count': area.pending_approval_count,
+            'families': families_by_area.get(area.id, []),
+        }
+        for area in Area.objects.filter(pending_approval_count__gt=0).order_by('name', 'id')
+    ]
+    return {
+        'total': sum(area['pending_approval_count'] for area in areas),
+        'areas': areas,
+    }
@@ -0,0 +1,203 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import transaction
+
+from .changes import get_latest_revision, get_settled_revision
+from .models import Product, ProductChange
+from .search import chunked, normalize_text
+
+# Sobre esta fracción del catálogo modificada desde la última sincronización conviene recargar todo.
+FULL_RELOAD_RATIO = 0.2
+# Productos modificados que se buscan aparte antes de reconstruir la cadena de búsqueda.
+MAX_STALE_ROWS = 500
+
+
+class SkuIndex:
+    """
+    Índice en memoria de SKU y nombre de todos los productos para los
+    selectores de productos relacionados y sustitutos.
+
+    Guarda los SKU normalizados (minúsculas, sin acentos) en una lista
+    ordenada para las coincidencias por prefijo y una sola cadena con una
+    línea `sku\\tnombre` por producto para las coincidencias en cualquier
+    posición, que se recorre con `str.find` sin iterar en Python. Los
+    productos modificados después de construir esa cadena se revisan aparte
+    hasta acumular `MAX_STALE_ROWS`, para no reconstruirla en cada cambio.
+
+    Se actualiza al confirmar cada transacción que modifica productos en este
+    proceso (`products_changed`/`products_deleted`) y, cada
+    `PRODUCT_AUTOCOMPLETE_SYNC_INTERVAL` segundos, con el registro de cambios
+    para incorporar lo escrito por otros procesos.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = None
+        self._by_sku = {}
+        self._keys = []
+        self._haystack = None
+        self._offsets = []
+        self._ids = []
+        self._stale = set()
+        self.revision = 0
+        self.synced_at = 0.0
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, 'PRODUCT_AUTOCOMPLETE_SYNC_INTERVAL', 5)
+
+    def _add(self, product_id, sku, name):
+        key = normalize_text(sku)
+        self._entries[product_id] = (sku, name, key, f'{key}\t{normalize_text(name)}')
+        self._by_sku[sku] = product_id
+        insort(self._keys, (key, product_id))
+
+    def _remove(self, product_id):
+        entry = self._entries.pop(product_id, None)
+        if entry is None:
+            return
+        sku, _, key, _ = entry
+        if self._by_sku.get(sku) == product_id:
+            del self._by_sku[sku]
+        position = bisect_left(self._keys, (key, product_id))
+        if position < len(self._keys) and self._keys[position] == (key, product_id):
+            del self._keys[position]
+
+    def _load(self):
+        revision = get_latest_revision()
+        self._entries, self._by_sku = {}, {}
+        keys = []
+        for product_id, sku, name in Product.objects.values_list('id', 'sku', 'name').iterator(chunk_size=5000):
+            key = normalize_text(sku)
+            self._entries[product_id] = (sku, name, key, f'{key}\t{normalize_text(name)}')
+            self._by_sku[sku] = product_id
+            keys.append((key, product_id))
+        keys.sort()
+        self._keys = keys
+        self._haystack = None
+        self.revision = get_settled_revision(0, revision)
+        self.synced_at = time.monotonic()
+
+    def _reload_products(self, product_ids):
+        for chunk in chunked(product_ids):
+            for product_id in chunk:
+                self._remove(product_id)
+            for product_id, sku, name in Product.objects.filter(pk__in=chunk).values_list('id', 'sku', 'name'):
+                self._add(product_id, sku, name)
+        self._stale.update(product_ids)
+        if len(self._stale) > MAX_STALE_ROWS:
+            self._haystack = None
+
+    def _sync(self):
+        """
+        Carga el índice la primera vez y luego aplica los cambios registrados
+        por cualquier proceso desde la última revisión sincronizada.
+
+        La revisión sincronizada solo avanza hasta las entradas más antiguas
+        que `PRODUCT_CHANGES_SAFETY_LAG`: las más recientes se vuelven a leer
+        en la siguiente sincronización, por si una transacción con una
+        revisión menor confirma después (ver `get_changes_safety_lag`).
+        """
+        if self._entries is None:
+            self._load()
+            return
+        if time.monotonic() - self.synced_at < self.sync_interval:
+            return
+        revision = get_latest_revision()
+        if revision != self.revision:
+            product_ids = set(
+                ProductChange.objects.filter(id__gt=self.revision, id__lte=revision).values_list('product_id', flat=True)
+            )
+            if len(product_ids) > len(self._entries) * FULL_RELOAD_RATIO:
+                self._load()
+                return
+            self._reload_products(product_ids)
+            self.revision = get_settled_revision(self.revision, revision)
+        self.synced_at = time.monotonic()
+
+    def _build_haystack(self):
+        lines = [self._entries[product_id][3] for _, product_id in self._keys]
+        self._ids = [product_id for _, product_id in self._keys]
+        self._offsets = [0, *accumulate(len(line) + 1 for line in lines)]
+        self._haystack = '\n'.join(lines)
+        self._stale = set()
+
+    def _apply(self, product_ids):
+        with self._lock:
+            if self._entries is not None:
+                self._reload_products(product_ids)
+
+    def refresh(self, product_ids):
+        """
+        Vuelve a leer los productos indicados al confirmar la transacción
+        actual; los que ya no existen se eliminan del índice.
+        """
+        product_ids = list(product_ids)
+        transaction.on_commit(lambda: self._apply(product_ids))
+
+    def rebuild(self):
+        with self._lock:
+            self._load()
+
+    def _entry(self, product_id):
+        sku, name, _, _ = self._entries[product_id]
+        return {'id': product_id, 'sku': sku, 'name': name}
+
+    def suggest(self, query, limit):
+        """
+        Retorna hasta `limit` productos cuyo SKU empieza con `query`, seguidos
+        de los que contienen `query` en cualquier parte del SKU o del nombre,
+        en orden de SKU dentro de cada grupo.
+        """
+        query = normalize_text(query).strip()
+        with self._lock:
+            self._sync()
+            found = []
+            position = bisect_left(self._keys, (query,))
+            while len(found) < limit and position < len(self._keys) and self._keys[position][0].startswith(query):
+                found.append(self._keys[position][1])
+                position += 1
+            if len(found) < limit and query and '\n' not in query and '\t' not in query:
+                if self._haystack is None:
+                    self._build_haystack()
+                found.extend(self._find_infix(query, limit - len(found), exclude=set(found)))
+            return [self._entry(product_id) for product_id in found]
+
+    def _find_infix(self, query, limit, exclude):
+        matches = []
+        start = self._haystack.find(query)
+        while start != -1 and len(matches) < limit:
+            row = bisect_right(self._offsets, start) - 1
+            product_id = self._ids[row]
+            if product_id not in exclude and product_id not in self._stale:
+                matches.append(product_id)
+            start = self._haystack.find(query, self._offsets[row + 1])
+        matches.extend(
+            product_id for product_id in self._stale
+            if product_id in self._entries and product_id not in exclude and query in self._entries[product_id][3]
+        )
+        matches.sort(key=lambda product_id: (self._entries[product_id][2], product_id))
+        return matches[:limit]
+
+    def resolve(self, skus):
+        """
+        Retorna `(encontrados, faltantes)` para una lista de SKU exactos,
+        conservando el orden recibido.
+        """
+        with self._lock:
+            self._sync()
+            found, missing = [], []
+            for sku in skus:
+                product_id = self._by_sku.get(sku)
+                if product_id is None:
+                    missing.append(sku)
+                else:
+                    found.append(self._entry(product_id))
+            return found, missing
+
+
+sku_index = SkuIndex()
@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Max
+from django.dispatch import Signal
+from django.utils.timezone import now
+
+from .models import Product, ProductChange
+
+# Se emiten dentro de la transacción de escritura con `product_ids=[...]`.
+products_changed = Signal()
+products_deleted = Signal()
+
+
+def record_product_changes(product_ids):
+    """
+    Incrementa la `revision` y actualiza `updated_at` de los productos, y
+    agrega una entrada por producto al registro de cambios, sin emitir
+    `products_changed`.
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return []
+    Product.objects.filter(pk__in=product_ids).update(revision=F('revision') + 1, updated_at=now())
+    ProductChange.objects.bulk_create([ProductChange(product_id=pk) for pk in product_ids])
+    return product_ids
+
+
+def touch_products(product_ids):
+    """
+    Marca productos como modificados: incrementa su `revision`, actualiza
+    `updated_at` y agrega una entrada por producto al registro de cambios.
+
+    Guardar un `Product` ya lo registra (ver `core.signals`); debe llamarse en
+    las demás rutas de escritura: filas hijas (países, videos, flujo de
+    trabajo) y escrituras con `bulk_create`/`bulk_update`/`update`, que no
+    emiten señales.
+    """
+    product_ids = record_product_changes(product_ids)
+    if product_ids:
+        products_changed.send(sender=Product, product_ids=product_ids)
+
+
+def record_deleted_products(products):
+    """
+    Agrega al registro de cambios una entrada de eliminación por producto.
+    """
+    ProductChange.objects.bulk_create([
+        ProductChange(product_id=product.pk, sku=product.sku, deleted=True) for product in products
+    ])
+    products_deleted.send(sender=Product, product_ids=[product.pk for product in products])
+
+
+def get_latest_revision():
+    return ProductChange.objects.aggregate(revision=Max('id'))['revision'] or 0
+
+
+def get_changes_safety_lag():
+    """
+    Segundos de antigüedad mínima de las entradas que entrega el feed.
+
+    La revisión es el id autoincremental de `ProductChange`, que se asigna al
+    insertar y no al confirmar: una transacción larga puede confirmar después
+    de otra con un id mayor. Si el feed ya entregó ese id mayor, el
+    consumidor avanzaría `since` y nunca vería la entrada anterior. Las
+    entradas más recientes que este margen se retienen hasta la siguiente
+    consulta, lo que evita el salto para transacciones más cortas que el margen.
+    """
+    return getattr(settings, 'PRODUCT_CHANGES_SAFETY_LAG', 5)
+
+
+def get_settled_revision(since, until):
+    """
+    Mayor revisión en `(since, until]` con al menos `get_changes_safety_lag()`
+    segundos de antigüedad, o `since` si no hay ninguna. Quien lee el registro
+    de cambios puede avanzar hasta ella sin saltar entradas de transacciones
+    que aún no confirman; las posteriores deben volver a leerse.
+    """
+    changes = ProductChange.objects.filter(id__gt=since, id__lte=until)
+    lag = get_changes_safety_lag()
+    if lag:
+        changes = changes.filter(created_at__lte=now() - timedelta(seconds=lag))
+    return changes.order_by('-id').values_list('id', flat=True).first() or since
+
+
+def get_changes_since(since, limit):
+    """
+    Retorna la última entrada de cambio de cada producto modificado después
+    de la revisión `since`, en orden de revisión y limitada a `limit`
+    productos. Un producto modificado varias veces aparece una sola vez, con
+    su revisión más reciente. Omite las entradas más nuevas que
+    `get_changes_safety_lag()`.
+    """
+    changes = ProductChange.objects.filter(id__gt=since)
+    lag = get_changes_safety_lag()
+    if lag:
+        changes = changes.filter(created_at__lte=now() - timedelta(seconds=lag))
+    latest = (
+        changes
+        .values('product_id')
+        .annotate(revision=Max('id'))
+        .order_by('revision')
+        .values_list('revision', flat=True)[:limit]
+    )
+    return list(ProductChange.objects.filter(id__in=list(latest)).order_by('id'))
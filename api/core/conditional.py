@@ -0,0 +1,102 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Product
+
+USERS_VERSION_KEY = 'core:users:version'
+
+
+def get_version_token(key):
+    """
+    Versión actual de un conjunto de datos cacheables. Es un token aleatorio
+    (no un contador) para que un reinicio de la caché no reutilice un ETag anterior.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version_token(key):
+    cache.set(key, uuid.uuid4().hex, None)
+
+
+def get_users_version():
+    """
+    Versión de los datos de usuario que aparecen embebidos en las respuestas
+    de productos (`related_users`, autores del historial). Cambia con las
+    asignaciones de subfamilias y con cada usuario guardado o eliminado.
+    """
+    return get_version_token(USERS_VERSION_KEY)
+
+
+def bump_users_version():
+    bump_version_token(USERS_VERSION_KEY)
+
+
+def make_etag(*parts):
+    """
+    Construye un ETag fuerte a partir de los valores de los que depende la respuesta.
+    """
+    digest = hashlib.blake2b(':'.join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def get_product_revision(pk):
+    """
+    Retorna la `revision` del producto con una consulta por clave primaria,
+    o `None` si no existe.
+    """
+    return Product.objects.filter(pk=pk).values_list('revision', flat=True).first()
+
+
+def etag_matches(request, etag):
+    """
+    Indica si `etag` satisface el `If-None-Match` de la solicitud (incluido `*`).
+    """
+    if etag is None:
+        return False
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in if_none_match or '*' in if_none_match
+
+
+def finalize_conditional_response(response, etag):
+    """
+    Agrega el `ETag` a las respuestas 200/304 y las marca `private, no-cache`.
+    """
+    if etag is not None and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Soporte de GET condicional para vistas de DRF.
+
+    `get_etag()` calcula el ETag sin cargar ni serializar la respuesta; si
+    coincide con `If-None-Match` se responde 304 sin cuerpo. Si retorna
+    `None` (por ejemplo, porque el objeto no existe) la solicitud sigue su
+    curso normal. El ETag calculado queda disponible en `self.etag`.
+
+    Las respuestas se marcan `private, no-cache` para que el navegador
+    revalide siempre contra el servidor.
+    """
+
+    def get_etag(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag = self.etag = self.get_etag(request, *args, **kwargs)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().get(request, *args, **kwargs)
+        return finalize_conditional_response(response, etag)
@@ -0,0 +1,113 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Prefetch
+
+from .models import Product, ProductCountry, relations_prefetch
+from .reference import product_types, statuses
+from .relations import RELATION_FIELDS
+
+PRODUCT_FIELDS = [
+    'id', 'sku', 'name', 'product_type', 'status', 'published', 'brand',
+    'area', 'area_code', 'family', 'family_code', 'subfamily', 'subfamily_code',
+    'short_description', 'description', 'specifications', 'applications', 'url',
+    'created_at', 'updated_at',
+]
+TAXONOMY_LEVELS = ('area', 'family', 'subfamily')
+# Campos que se copian tal cual del modelo; el resto se resuelve por separado.
+PLAIN_FIELDS = [
+    field for field in PRODUCT_FIELDS
+    if field not in ('product_type', 'status') and field.removesuffix('_code') not in TAXONOMY_LEVELS
+]
+COUNTRY_FIELDS = ['country_code', 'enabled', 'sellable', 'category_code', 'category', 'related', 'substitute']
+EXPORT_FORMATS = ('ndjson', 'csv')
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def get_export_queryset(country_code=None, enabled=None, sellable=None, published=True):
+    """
+    Productos a exportar, con sus configuraciones por país ya filtradas.
+
+    Si se indica algún filtro de país, solo se incluyen los productos que
+    tengan al menos una configuración que lo cumpla.
+    """
+    country_filters = {}
+    if country_code:
+        country_filters['country_code'] = country_code.upper()
+    if enabled is not None:
+        country_filters['enabled'] = enabled
+    if sellable is not None:
+        country_filters['sellable'] = sellable
+
+    countries = ProductCountry.objects.filter(**country_filters).order_by('country_code')
+
+    queryset = Product.objects.all()
+    if published is not None:
+        queryset = queryset.filter(published=published)
+    if country_filters:
+        queryset = queryset.filter(Exists(countries.filter(product=OuterRef('pk'))))
+
+    return queryset.select_related(*TAXONOMY_LEVELS).prefetch_related(
+        Prefetch('country_settings', queryset=countries), relations_prefetch()
+    ).order_by('id')
+
+
+def iter_export_records(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recorre el queryset por bloques (`iterator(chunk_size=...)`, con las
+    precargas resueltas por bloque) y produce un diccionario plano por
+    producto con la lista `countries`. La memoria usada no depende del
+    tamaño del catálogo.
+    """
+    for product in queryset.iterator(chunk_size=chunk_size):
+        record = dict.fromkeys(PRODUCT_FIELDS)
+        record.update((field, getattr(product, field)) for field in PLAIN_FIELDS)
+        product_type = product_types.get_by_id(product.product_type_id)
+        record['product_type'] = product_type.code if product_type else None
+        status = statuses.get_by_id(product.status_id)
+        record['status'] = status.code if status else None
+        for level in TAXONOMY_LEVELS:
+            node = getattr(product, level)
+            record[level] = node.name
+            record[f'{level}_code'] = node.id
+        record['countries'] = [
+            {
+                field: (
+                    ','.join(setting.get_relation_skus(RELATION_FIELDS[field])) if field in RELATION_FIELDS
+                    else getattr(setting, field)
+                )
+                for field in COUNTRY_FIELDS
+            }
+            for setting in product.country_settings.all()
+        ]
+        yield record
+
+
+def iter_ndjson(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(records):
+    """
+    Una fila por producto y país. Los productos sin configuraciones por país
+    generan una fila con las columnas de país vacías.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(PRODUCT_FIELDS + COUNTRY_FIELDS)
+    for record in records:
+        product_values = [record[field] for field in PRODUCT_FIELDS]
+        for country in record['countries'] or [{}]:
+            yield writer.writerow(product_values + [country.get(field) for field in COUNTRY_FIELDS])
+
+
+def iter_export(export_format, records):
+    if export_format == 'csv':
+        return iter_csv(records)
+    return iter_ndjson(records)
@@ -0,0 +1,120 @@
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+from core.acl import filter_editable_by
+from core.models import Product
+from core.reference import product_types, statuses
+from core.search import get_search_backend
+from core.taxonomy import search_taxonomy
+
+
+def parse_int_list(value):
+    """
+    Convierte un parámetro tipo "1,2,3" en una lista de enteros.
+    Los valores no numéricos se ignoran.
+    """
+    result = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if part.lstrip('-').isdigit():
+            result.append(int(part))
+    return result
+
+
+def parse_bool(value):
+    """
+    Interpreta un parámetro booleano de query string.
+    Retorna None si el valor no es reconocible.
+    """
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ('true', '1', 'yes', 'si', 'sí'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    return None
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """
+    Filtros del lado del servidor para el listado de productos.
+
+    Parámetros soportados:
+    - `product_type`: código(s) de tipo de producto, separados por coma.
+    - `status`: código(s) de estado, separados por coma.
+    - `published`: `true` / `false`.
+    - `area_code`, `family_code`, `subfamily_code`: códigos numéricos, separados por coma.
+    - `brand`: marca exacta (sin distinguir mayúsculas).
+    - `search`: palabras (o prefijos) buscadas en el índice de texto completo de `core.search`:
+      sku, nombre, marca, descripciones, especificaciones y aplicaciones, sin distinguir acentos.
+      También retorna los productos del área, familia o subfamilia cuyo nombre coincide.
+    - `editable`: `true` para limitar a los productos que el usuario puede editar.
+    """
+    code_params = {'area_code': 'area_id', 'family_code': 'family_id', 'subfamily_code': 'subfamily_id'}
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        product_type_codes = [c for c in params.get('product_type', '').split(',') if c]
+        if product_type_codes:
+            queryset = queryset.filter(product_type_id__in=product_types.get_ids(product_type_codes))
+
+        status_codes = [c for c in params.get('status', '').split(',') if c]
+        if status_codes:
+            queryset = queryset.filter(status_id__in=statuses.get_ids(status_codes))
+
+        published = parse_bool(params.get('published'))
+        if published is not None:
+            queryset = queryset.filter(published=published)
+
+        for param, field in self.code_params.items():
+            if param in params:
+                queryset = queryset.filter(**{f'{field}__in': parse_int_list(params[param])})
+
+        brand = params.get('brand')
+        if brand:
+            queryset = queryset.filter(brand__iexact=brand)
+
+        search = params.get('search', '').strip()
+        if search:
+            queryset = self.filter_search(queryset, search)
+
+        if parse_bool(params.get('editable')):
+            queryset = filter_editable_by(queryset, request.user)
+
+        return queryset
+
+    def filter_search(self, queryset, search):
+        area_ids, family_ids, subfamily_ids = search_taxonomy(search)
+        if not (area_ids or family_ids or subfamily_ids):
+            return get_search_backend().filter_queryset(queryset, search)
+        # Por id de nodo, con los índices de taxonomía de Product y sin joins.
+        text_matches = get_search_backend().filter_queryset(Product.objects.all(), search).values('pk')
+        return queryset.filter(
+            Q(pk__in=text_matches) | Q(area_id__in=area_ids) | Q(family_id__in=family_ids)
+            | Q(subfamily_id__in=subfamily_ids)
+        )
+
+    def get_schema_operation_parameters(self, view):
+        def param(name, schema_type, description):
+            return {
+                'name': name,
+                'required': False,
+                'in': 'query',
+                'description': description,
+                'schema': {'type': schema_type},
+            }
+
+        return [
+            param('product_type', 'string', 'Código(s) de tipo de producto separados por coma.'),
+            param('status', 'string', 'Código(s) de estado separados por coma.'),
+            param('published', 'boolean', 'Filtra por estado de publicación.'),
+            param('area_code', 'string', 'Código(s) de área separados por coma.'),
+            param('family_code', 'string', 'Código(s) de familia separados por coma.'),
+            param('subfamily_code', 'string', 'Código(s) de subfamilia separados por coma.'),
+            param('brand', 'string', 'Marca del producto.'),
+            param('search', 'string', 'Palabras a buscar en sku, nombre, marca, descripciones, especificaciones y aplicaciones, '
+                                      'o en el nombre del área, familia o subfamilia.'),
+            param('editable', 'boolean', 'Solo productos que el usuario puede editar.'),
+        ]
@@ -0,0 +1,276 @@
+import codecs
+import csv
+import json
+import time
+from collections import Counter
+
+from django.db import connection, transaction
+
+from .changes import touch_products
+from .taxonomy import adjust_product_counts
+from .approvals import adjust_pending_approval_counts, get_pending_status_id, pending_approval_key
+from .models import Product, Area, Family, Subfamily
+from .reference import product_types, statuses
+from .serializers import ProductImportSerializer
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_STATUS_CODE = 'draft'
+
+# El estado solo se asigna al crear: en productos existentes lo gestiona el flujo de aprobación.
+UPDATE_FIELDS = [
+    'name', 'product_type', 'description', 'short_description', 'specifications', 'applications',
+    'brand', 'area', 'family', 'subfamily', 'url', 'updated_at',
+]
+
+
+class ImportFileError(Exception):
+    """
+    El archivo no se puede leer: codificación distinta de UTF-8 o CSV mal
+    formado. `row_number` es la fila en que se detuvo la lectura, si se conoce.
+    """
+
+    def __init__(self, detail, row_number=None):
+        super().__init__(detail)
+        self.detail = detail
+        self.row_number = row_number
+
+
+def check_encoding(chunks, encoding='utf-8-sig'):
+    """
+    Recorre los bloques de bytes de `chunks` verificando que sean texto en
+    `encoding`, sin acumularlos en memoria. Se llama antes de importar para
+    que un archivo mal codificado se rechace antes de confirmar el primer bloque.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    offset = 0
+    try:
+        for chunk in chunks:
+            decoder.decode(chunk)
+            offset += len(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError as exc:
+        raise ImportFileError(f"El archivo no está codificado en UTF-8 (byte inválido en la posición {offset + exc.start}).")
+
+
+def iter_rows(stream, import_format):
+    """
+    Lee las líneas de texto de `stream` una a una (sin cargar el archivo en
+    memoria) y produce tuplas `(número_de_fila, datos)`. Las líneas NDJSON
+    inválidas se entregan como `(número_de_fila, None)`; un CSV mal formado
+    o un texto que no se puede decodificar lanza `ImportFileError`.
+    """
+    if import_format == 'csv':
+        row_number = 1
+        try:
+            for row_number, row in enumerate(csv.DictReader(stream), start=2):
+                yield row_number, {k: (v if v != '' else None) for k, v in row.items() if k}
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ImportFileError(f"No se pudo leer el CSV: {exc}", row_number + 1)
+        return
+
+    row_number = 0
+    try:
+        for row_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = None
+            yield row_number, data if isinstance(data, dict) else None
+    except UnicodeDecodeError as exc:
+        raise ImportFileError(f"No se pudo leer el archivo: {exc}", row_number + 1)
+
+class ImportResult:
+    """
+    Resumen de una importación. Guarda como máximo `max_errors` errores de
+    fila (todos si es `None`); `failed` cuenta todas las filas rechazadas.
+    """
+
+    def __init__(self, max_errors=None):
+        self.total = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+
+    def add_error(self, row_number, sku, errors):
+        self.failed += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append({'row': row_number, 'sku': sku, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.total / self.elapsed, 1) if self.elapsed else None,
+        }
+
+
+class ProductImporter:
+    """
+    Importa productos en bloques: valida cada fila con
+    `ProductImportSerializer` (tipos y estados resueltos desde un mapa en
+    memoria) y hace upsert sobre `sku` con
+    `bulk_create(update_conflicts=True)`, una transacción por bloque.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, max_errors=None):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.context = {
+            'product_types': product_types.by_code(),
+            'statuses': statuses.by_code(),
+        }
+        self.default_status = self.context['statuses'].get(DEFAULT_STATUS_CODE)
+        # Padre de cada familia y subfamilia: los existentes más los que agregan las filas ya aceptadas.
+        self.family_areas = dict(Family.objects.values_list('id', 'area_id'))
+        self.subfamily_families = dict(Subfamily.objects.values_list('id', 'family_id'))
+
+    def run(self, rows):
+        """
+        Importa las filas de `iter_rows`. Si el archivo deja de poder leerse a
+        mitad de camino, se escriben las filas válidas leídas hasta ahí y la
+        fila en que se detuvo la lectura se informa como error.
+        """
+        result = ImportResult(self.max_errors)
+        batch = {}
+        rows = iter(rows)
+        while True:
+            try:
+                row_number, data = next(rows)
+            except StopIteration:
+                break
+            except ImportFileError as exc:
+                result.total += 1
+                result.add_error(exc.row_number, None, {'non_field_errors': [
+                    f"{exc.detail} Las filas siguientes no se importaron."
+                ]})
+                break
+            result.total += 1
+            if data is None:
+                result.add_error(row_number, None, {'non_field_errors': ['Fila con formato inválido.']})
+                continue
+
+            serializer = ProductImportSerializer(data=data, context=self.context)
+            if not serializer.is_valid():
+                result.add_error(row_number, data.get('sku'), serializer.errors)
+                continue
+
+            values = serializer.validated_data
+            taxonomy_errors = self.check_taxonomy(values)
+            if taxonomy_errors:
+                result.add_error(row_number, values['sku'], taxonomy_errors)
+                continue
+
+            # Si un SKU se repite dentro del archivo, prevalece la última fila
+            batch[values['sku']] = values
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch, result)
+                batch = {}
+
+        if batch:
+            self.write_batch(batch, result)
+
+        result.elapsed = time.monotonic() - result.started_at
+        return result
+
+    def check_taxonomy(self, values):
+        """
+        Valida que la familia pertenezca al área y la subfamilia a la familia
+        indicadas, contra la taxonomía existente y las filas anteriores del
+        archivo. Retorna los errores de la fila, o `None` si es válida.
+        """
+        area_id, family_id, subfamily_id = values['area_code'], values['family_code'], values['subfamily_code']
+        errors = {}
+        if self.family_areas.get(family_id, area_id) != area_id:
+            errors['family_code'] = [f"La familia {family_id} no pertenece al área {area_id}."]
+        if self.subfamily_families.get(subfamily_id, family_id) != family_id:
+            errors['subfamily_code'] = [f"La subfamilia {subfamily_id} no pertenece a la familia {family_id}."]
+        if errors:
+            return errors
+        self.family_areas[family_id] = area_id
+        self.subfamily_families[subfamily_id] = family_id
+        return None
+
+    def ensure_taxonomy(self, batch):
+        """
+        Crea los nodos de taxonomía que aún no existen. Los nombres del archivo
+        solo se usan para nodos nuevos: los existentes no se renombran.
+        """
+        areas, families, subfamilies = {}, {}, {}
+        for values in batch.values():
+            areas.setdefault(values['area_code'], values.get('area'))
+            families.setdefault(values['family_code'], (values['area_code'], values.get('family')))
+            subfamilies.setdefault(values['subfamily_code'], (values['family_code'], values.get('subfamily')))
+
+        Area.objects.bulk_create(
+            [Area(id=code, name=name) for code, name in areas.items()], ignore_conflicts=True
+        )
+        Family.objects.bulk_create(
+            [Family(id=code, area_id=area_id, name=name) for code, (area_id, name) in families.items()],
+            ignore_conflicts=True,
+        )
+        Subfamily.objects.bulk_create(
+            [Subfamily(id=code, family_id=family_id, name=name) for code, (family_id, name) in subfamilies.items()],
+            ignore_conflicts=True,
+        )
+
+    def write_batch(self, batch, result):
+        skus = list(batch)
+        with transaction.atomic():
+            self.ensure_taxonomy(batch)
+            existing = {
+                sku: (status_id, tuple(taxonomy_key))
+                for sku, status_id, *taxonomy_key in Product.objects.filter(sku__in=skus).values_list(
+                    'sku', 'status_id', 'area_id', 'family_id', 'subfamily_id'
+                )
+            }
+
+            products = []
+            count_deltas = Counter()
+            pending_deltas = Counter()
+            pending_status_id = get_pending_status_id()
+            for sku, values in batch.items():
+                values = dict(values)
+                status = values.pop('status', None) or self.default_status
+                for level in ('area', 'family', 'subfamily'):
+                    values.pop(level, None)
+                    values[f'{level}_id'] = values.pop(f'{level}_code')
+                products.append(Product(status=status, **values))
+
+                new_key = (values['area_id'], values['family_id'], values['subfamily_id'])
+                old_status_id, old_key = existing.get(sku, (None, None))
+                if old_key != new_key:
+                    count_deltas[new_key] += 1
+                    if old_key is not None:
+                        count_deltas[old_key] -= 1
+
+                # El upsert no sobrescribe el estado de los productos existentes (ver UPDATE_FIELDS).
+                new_status_id = old_status_id if sku in existing else (status.pk if status else None)
+                new_pending = pending_approval_key(new_status_id, new_key, pending_status_id)
+                old_pending = pending_approval_key(old_status_id, old_key, pending_status_id) if sku in existing else None
+                if old_pending != new_pending:
+                    pending_deltas[new_pending] += 1
+                    pending_deltas[old_pending] -= 1
+
+            upsert_kwargs = {'update_conflicts': True, 'update_fields': UPDATE_FIELDS}
+            if connection.features.supports_update_conflicts_with_target:
+                upsert_kwargs['unique_fields'] = ['sku']
+            Product.objects.bulk_create(products, **upsert_kwargs)
+
+            touch_products(Product.objects.filter(sku__in=skus).values_list('id', flat=True))
+            adjust_product_counts(count_deltas)
+            adjust_pending_approval_counts(pending_deltas)
+
+        result.updated += len(existing)
+        result.created += len(batch) - len(existing)
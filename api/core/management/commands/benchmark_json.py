@@ -0,0 +1,94 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Product, ProductCountry, ProductRelation, ProductType, Status, Area, Family, Subfamily
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+from core.serializers import ProductSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el renderer y parser JSON estándar de DRF con los basados en orjson sobre "
+        "un payload de ProductSerializer. Los productos de prueba se revierten al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--countries', type=int, default=3, help="Configuraciones por país de cada producto.")
+        parser.add_argument('--repeat', type=int, default=10, help="Ejecuciones por medición.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson no está instalado: FastJSON usa la implementación estándar."))
+        try:
+            with transaction.atomic():
+                data = self.build_payload()
+                self.report(data)
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS("Datos de prueba revertidos."))
+
+    def build_payload(self):
+        count = self.options['products']
+        product_type = ProductType.objects.first() or ProductType.objects.create(code='simple', name='Simple')
+        status = Status.objects.first() or Status.objects.create(code='draft', name='Borrador')
+        area, _ = Area.objects.get_or_create(id=0, defaults={'name': 'Área benchmark'})
+        family, _ = Family.objects.get_or_create(id=0, defaults={'area': area, 'name': 'Familia benchmark'})
+        subfamily, _ = Subfamily.objects.get_or_create(id=0, defaults={'family': family, 'name': 'Subfamilia benchmark'})
+
+        products = Product.objects.bulk_create([
+            Product(
+                sku=f'JSON-{i:07d}', name=f'Producto {i} – «edición»', brand=f'Marca {i % 50}',
+                product_type=product_type, status=status, area=area, family=family, subfamily=subfamily,
+                description='Descripción larga ' * 20, short_description='Resumen', url=f'https://example.com/p/{i}',
+            ) for i in range(count)
+        ], batch_size=2000)
+        ProductCountry.objects.bulk_create([
+            ProductCountry(product=product, country_code=code)
+            for product in products for code in ['CL', 'PE', 'CO', 'AR', 'MX'][:self.options['countries']]
+        ], batch_size=2000)
+        setting_ids = ProductCountry.objects.filter(product__sku__startswith='JSON-').values_list('id', flat=True)
+        ProductRelation.objects.bulk_create([
+            ProductRelation(setting_id=setting_id, relation_type=ProductRelation.RELATED, target=target, order=order)
+            for setting_id in setting_ids for order, target in enumerate(products[:2])
+        ], batch_size=2000)
+
+        started = time.perf_counter()
+        queryset = Product.objects.with_related().filter(sku__startswith='JSON-').order_by('id')
+        data = ProductSerializer(queryset, many=True).data
+        self.stdout.write(f"Serializados {count} productos en {time.perf_counter() - started:.2f}s.")
+        return data
+
+    def measure(self, func):
+        timings = []
+        for _ in range(self.options['repeat']):
+            started = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return timings[len(timings) // 2], result
+
+    def report(self, data):
+        stdlib_ms, stdlib_bytes = self.measure(lambda: JSONRenderer().render(data))
+        fast_ms, fast_bytes = self.measure(lambda: FastJSONRenderer().render(data))
+        self.stdout.write(f"Payload: {len(stdlib_bytes) / 1024 / 1024:.1f} MiB")
+        self.stdout.write(f"Render  JSONRenderer: {stdlib_ms:.1f} ms | FastJSONRenderer: {fast_ms:.1f} ms "
+                          f"({stdlib_ms / fast_ms:.1f}x)")
+        if fast_bytes != stdlib_bytes:
+            self.stdout.write(self.style.ERROR("La salida de FastJSONRenderer difiere de JSONRenderer."))
+
+        stdlib_ms, _ = self.measure(lambda: JSONParser().parse(io.BytesIO(stdlib_bytes), parser_context={}))
+        fast_ms, _ = self.measure(lambda: FastJSONParser().parse(io.BytesIO(stdlib_bytes), parser_context={}))
+        self.stdout.write(f"Parse   JSONParser: {stdlib_ms:.1f} ms | FastJSONParser: {fast_ms:.1f} ms "
+                          f"({stdlib_ms / fast_ms:.1f}x)")
@@ -0,0 +1,142 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from authapp.models import AppUser
+from core.models import (
+    Product, ProductType, Status, ProductWorkflow, UserFamilyAssignment, Area, Family, Subfamily,
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra productos de prueba y muestra planes EXPLAIN y tiempos de las consultas "
+        "principales con y sin los índices de core. Todos los cambios se revierten al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20, help="Ejecuciones por consulta.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--no-explain', action='store_true', help="No imprimir los planes de ejecución.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        try:
+            with transaction.atomic():
+                self.seed()
+                self.report("Con índices")
+                if connection.features.can_rollback_ddl:
+                    self.drop_indexes()
+                    self.report("Sin índices")
+                else:
+                    self.stdout.write(self.style.WARNING(
+                        "El motor no soporta DDL transaccional: se omite la medición sin índices."
+                    ))
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS("Datos de prueba revertidos."))
+
+    def seed(self):
+        count = self.options['products']
+        batch_size = self.options['batch_size']
+        rng = random.Random(42)
+        product_types = list(ProductType.objects.all()) or [ProductType.objects.create(code='simple', name='Simple')]
+        statuses = list(Status.objects.all()) or [Status.objects.create(code='draft', name='Borrador')]
+
+        started = time.perf_counter()
+        Area.objects.bulk_create([Area(id=a, name=f'Área {a}') for a in range(10)], ignore_conflicts=True)
+        Family.objects.bulk_create(
+            [Family(id=f, area_id=f % 10, name=f'Familia {f}') for f in range(100)], ignore_conflicts=True
+        )
+        Subfamily.objects.bulk_create(
+            [Subfamily(id=s, family_id=s % 100, name=f'Subfamilia {s}') for s in range(1000)], ignore_conflicts=True
+        )
+        for offset in range(0, count, batch_size):
+            Product.objects.bulk_create([
+                Product(
+                    sku=f'BENCH-{i:07d}', name=f'Producto {i}', brand=f'Marca {i % 50}',
+                    product_type=rng.choice(product_types), status=rng.choice(statuses),
+                    published=rng.random() < 0.3,
+                    area_id=i % 10, family_id=i % 100, subfamily_id=i % 1000,
+                ) for i in range(offset, min(offset + batch_size, count))
+            ], batch_size=batch_size)
+
+        users = [
+            AppUser.objects.create(
+                google_id=f'bench-{n}', email=f'bench-{n}@example.com',
+                firstname='Bench', lastname=str(n), full_name=f'Bench {n}', picture='',
+            ) for n in range(50)
+        ]
+        UserFamilyAssignment.objects.bulk_create([
+            UserFamilyAssignment(user=user, area_id=subfamily_id % 10, family_id=subfamily_id % 100,
+                                 subfamily_id=subfamily_id)
+            for user in users for subfamily_id in rng.sample(range(1000), 40)
+        ], batch_size=batch_size)
+
+        product_ids = list(Product.objects.filter(sku__startswith='BENCH-').values_list('id', flat=True)[:count // 10])
+        ProductWorkflow.objects.bulk_create([
+            ProductWorkflow(product_id=product_id, user=rng.choice(users),
+                            old_status=rng.choice(statuses), new_status=rng.choice(statuses))
+            for product_id in product_ids for _ in range(3)
+        ], batch_size=batch_size)
+
+        self.sample_product_id = product_ids[len(product_ids) // 2]
+        self.sample_user = users[0]
+        self.stdout.write(f"Sembrados {count} productos en {time.perf_counter() - started:.1f}s.")
+
+    def get_queries(self):
+        subfamilies = list(
+            UserFamilyAssignment.objects.filter(user=self.sample_user).values_list('subfamily_id', flat=True)
+        )
+        page_subfamilies = list(range(0, 1000, 20))
+        # Filtros por id como core.filters y core.approvals, que resuelven los códigos de estado en memoria
+        status_ids = dict(Status.objects.values_list('code', 'id'))
+        return [
+            ("Listado (orden por defecto)", Product.objects.order_by('-id')[:50]),
+            ("Listado por subfamilia", Product.objects.filter(subfamily_id=123).order_by('-id')[:50]),
+            ("Listado por familia", Product.objects.filter(family_id=42).order_by('-id')[:50]),
+            ("Listado por área", Product.objects.filter(area_id=7).order_by('-id')[:50]),
+            ("Listado publicados", Product.objects.filter(published=True).order_by('-id')[:50]),
+            ("Listado por estado y publicación",
+             Product.objects.filter(status_id=status_ids.get('draft'), published=True).order_by('-id')[:50]),
+            ("Cola de aprobación",
+             Product.objects.filter(status_id=status_ids.get('pending_approval')).order_by('-id')[:50]),
+            ("Listado por marca", Product.objects.filter(brand__iexact='marca 7').order_by('-id')[:50]),
+            ("Listado por fecha de creación", Product.objects.order_by('-created_at', '-id')[:50]),
+            ("Editable por mí", Product.objects.filter(subfamily_id__in=subfamilies).order_by('-id')[:50]),
+            ("related_users de una página",
+             UserFamilyAssignment.objects.filter(subfamily_id__in=page_subfamilies).values_list('subfamily_id', 'user_id')),
+            ("Historial de un producto",
+             ProductWorkflow.objects.filter(product_id=self.sample_product_id).order_by('-id')),
+        ]
+
+    def report(self, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {title} =="))
+        repeat = self.options['repeat']
+        for name, queryset in self.get_queries():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset._chain())
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{name}: mediana {timings[len(timings) // 2]:.2f} ms, máx {timings[-1]:.2f} ms"
+            )
+            if not self.options['no_explain']:
+                self.stdout.write(queryset.explain())
+
+    def drop_indexes(self):
+        # DROP INDEX directo: el schema editor de SQLite no puede abrirse dentro de la transacción.
+        # Solo se llama en motores con DDL transaccional (PostgreSQL, SQLite), donde la sintaxis es la misma.
+        with connection.cursor() as cursor:
+            for model in (Product, UserFamilyAssignment, ProductWorkflow):
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import EXPORT_FORMATS, DEFAULT_CHUNK_SIZE, get_export_queryset, iter_export_records, iter_export
+from core.filters import parse_bool
+
+
+class Command(BaseCommand):
+    help = "Exporta el catálogo publicado en formato NDJSON o CSV usando memoria constante."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', '-o', help="Archivo de salida (por defecto, salida estándar).")
+        parser.add_argument('--country', help="Código de país (ej: CL).")
+        parser.add_argument('--enabled', help="Filtra configuraciones por país habilitadas (true/false).")
+        parser.add_argument('--sellable', help="Filtra configuraciones por país vendibles (true/false).")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        filters = {'country_code': options['country']}
+        for name in ('enabled', 'sellable'):
+            if options[name] is not None:
+                value = parse_bool(options[name])
+                if value is None:
+                    raise CommandError(f"Valor inválido para --{name}: {options[name]}")
+                filters[name] = value
+
+        records = iter_export_records(get_export_queryset(**filters), chunk_size=options['chunk_size'])
+        chunks = iter_export(options['export_format'], records)
+
+        if options['output']:
+            newline = '' if options['export_format'] == 'csv' else None
+            with open(options['output'], 'w', encoding='utf-8', newline=newline) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
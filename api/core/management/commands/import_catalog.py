@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import IMPORT_FORMATS, DEFAULT_BATCH_SIZE, ImportFileError, ProductImporter, check_encoding, iter_rows
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Command(BaseCommand):
+    help = "Importa productos desde un archivo CSV o NDJSON haciendo upsert por SKU en bloques."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Ruta del archivo a importar.")
+        parser.add_argument('--format', dest='import_format', choices=IMPORT_FORMATS,
+                            help="Formato del archivo (por defecto, según la extensión).")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, default=50, help="Máximo de errores a mostrar.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['import_format'] or path.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f"No se pudo determinar el formato de '{path}'. Usa --format.")
+
+        try:
+            with open(path, 'rb') as f:
+                check_encoding(iter(lambda: f.read(CHUNK_SIZE), b''))
+        except ImportFileError as exc:
+            raise CommandError(exc.detail)
+
+        importer = ProductImporter(batch_size=options['batch_size'], max_errors=options['max_errors'])
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            result = importer.run(iter_rows(f, import_format))
+
+        self.stdout.write(json.dumps(result.as_dict(), ensure_ascii=False, indent=2))
+        if result.failed:
+            self.stderr.write(f"{result.failed} fila(s) con errores.")
@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.response_cache import get_product_detail_cache
+
+
+class Command(BaseCommand):
+    help = "Muestra aciertos, fallos y tasa de aciertos de la caché de detalle de producto."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reinicia los contadores después de mostrarlos.")
+
+    def handle(self, *args, **options):
+        detail_cache = get_product_detail_cache()
+        stats = {'enabled': detail_cache.enabled, 'alias': detail_cache.alias, **detail_cache.stats()}
+        self.stdout.write(json.dumps(stats))
+        if options['reset']:
+            detail_cache.reset_stats()
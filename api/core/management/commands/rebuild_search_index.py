@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de productos con el backend configurado."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.perf_counter()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice '{backend.name}' reconstruido en {time.perf_counter() - started:.1f}s."
+        ))
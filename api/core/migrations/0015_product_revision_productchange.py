@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+def seed_product_changes(apps, schema_editor):
+    # Una entrada inicial por producto existente, para que el feed desde since=0 entregue el catálogo completo.
+    Product = apps.get_model('core', 'Product')
+    ProductChange = apps.get_model('core', 'ProductChange')
+    batch = []
+    for product_id in Product.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=2000):
+        batch.append(ProductChange(product_id=product_id))
+        if len(batch) >= 2000:
+            ProductChange.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ProductChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_alter_product_short_description_productvideo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('product_id', models.IntegerField(db_index=True)),
+                ('sku', models.CharField(blank=True, max_length=100, null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='productcountry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='productvideo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(seed_product_changes, migrations.RunPython.noop),
+    ]
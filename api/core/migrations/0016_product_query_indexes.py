@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0006_rename_created_appuser_created_at'),
+        ('core', '0015_product_revision_productchange'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['subfamily_code', '-id'], name='product_subfamily_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['family_code', '-id'], name='product_family_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['area_code', '-id'], name='product_area_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', 'published', '-id'], name='product_status_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['published', '-id'], name='product_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['brand'], name='product_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productworkflow',
+            index=models.Index(fields=['product', '-id'], name='workflow_product_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfamilyassignment',
+            index=models.Index(fields=['subfamily_id', 'user'], name='ufa_subfamily_user_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_taxonomy(apps, schema_editor):
+    """
+    Crea los nodos de taxonomía a partir de los códigos y nombres que hoy
+    están repetidos en cada producto y en las asignaciones de usuarios, y
+    calcula los conteos de productos por nodo.
+    """
+    Product = apps.get_model('core', 'Product')
+    UserFamilyAssignment = apps.get_model('core', 'UserFamilyAssignment')
+    Area = apps.get_model('core', 'Area')
+    Family = apps.get_model('core', 'Family')
+    Subfamily = apps.get_model('core', 'Subfamily')
+
+    areas, families, subfamilies = {}, {}, {}
+    area_counts, family_counts, subfamily_counts = {}, {}, {}
+
+    rows = Product.objects.values_list(
+        'area_code', 'area', 'family_code', 'family', 'subfamily_code', 'subfamily'
+    ).order_by('id').iterator(chunk_size=2000)
+    for area_code, area, family_code, family, subfamily_code, subfamily in rows:
+        if not areas.get(area_code):
+            areas[area_code] = area
+        if not (families.get(family_code) or (None,))[-1]:
+            families[family_code] = (area_code, family)
+        if not (subfamilies.get(subfamily_code) or (None,))[-1]:
+            subfamilies[subfamily_code] = (family_code, subfamily)
+        area_counts[area_code] = area_counts.get(area_code, 0) + 1
+        family_counts[family_code] = family_counts.get(family_code, 0) + 1
+        subfamily_counts[subfamily_code] = subfamily_counts.get(subfamily_code, 0) + 1
+
+    for area_id, family_id, subfamily_id in UserFamilyAssignment.objects.values_list('area_id', 'family_id', 'subfamily_id'):
+        areas.setdefault(area_id, None)
+        families.setdefault(family_id, (area_id, None))
+        subfamilies.setdefault(subfamily_id, (family_id, None))
+
+    Area.objects.bulk_create([
+        Area(id=code, name=name, product_count=area_counts.get(code, 0)) for code, name in areas.items()
+    ], batch_size=1000)
+    Family.objects.bulk_create([
+        Family(id=code, area_id=area_code, name=name, product_count=family_counts.get(code, 0))
+        for code, (area_code, name) in families.items()
+    ], batch_size=1000)
+    Subfamily.objects.bulk_create([
+        Subfamily(id=code, family_id=family_code, name=name, product_count=subfamily_counts.get(code, 0))
+        for code, (family_code, name) in subfamilies.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_product_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Area',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=100, null=True)),
+                ('product_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Family',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=100, null=True)),
+                ('product_count', models.IntegerField(default=0)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='families', to='core.area')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Subfamily',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=100, null=True)),
+                ('product_count', models.IntegerField(default=0)),
+                ('family', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='subfamilies', to='core.family')),
+            ],
+        ),
+        migrations.RunPython(populate_taxonomy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Convierte los códigos de taxonomía de Product y UserFamilyAssignment en
+    FK. Va separada de la carga de datos de 0017: en PostgreSQL las FK
+    diferidas de las filas recién insertadas dejan eventos pendientes y el
+    ALTER TABLE falla dentro de la misma transacción.
+    """
+
+    dependencies = [
+        ('core', '0017_taxonomy'),
+    ]
+
+    operations = [
+        # Los índices de 0016 se recrean con los nuevos nombres de campo
+        migrations.RemoveIndex(model_name='product', name='product_subfamily_id_idx'),
+        migrations.RemoveIndex(model_name='product', name='product_family_id_idx'),
+        migrations.RemoveIndex(model_name='product', name='product_area_id_idx'),
+        migrations.RemoveIndex(model_name='userfamilyassignment', name='ufa_subfamily_user_idx'),
+        migrations.AlterUniqueTogether(name='userfamilyassignment', unique_together=set()),
+
+        # Product: los nombres de texto pasan a la tabla de taxonomía y los códigos se convierten en FK
+        # sobre la misma columna (area_code, family_code, subfamily_code), sin mover datos.
+        migrations.RemoveField(model_name='product', name='area'),
+        migrations.RemoveField(model_name='product', name='family'),
+        migrations.RemoveField(model_name='product', name='subfamily'),
+        migrations.AlterField(model_name='product', name='area_code', field=models.IntegerField(db_column='area_code')),
+        migrations.AlterField(model_name='product', name='family_code', field=models.IntegerField(db_column='family_code')),
+        migrations.AlterField(model_name='product', name='subfamily_code', field=models.IntegerField(db_column='subfamily_code')),
+        migrations.RenameField(model_name='product', old_name='area_code', new_name='area'),
+        migrations.RenameField(model_name='product', old_name='family_code', new_name='family'),
+        migrations.RenameField(model_name='product', old_name='subfamily_code', new_name='subfamily'),
+        migrations.AlterField(
+            model_name='product',
+            name='area',
+            field=models.ForeignKey(db_column='area_code', on_delete=django.db.models.deletion.PROTECT, related_name='products', to='core.area'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='family',
+            field=models.ForeignKey(db_column='family_code', on_delete=django.db.models.deletion.PROTECT, related_name='products', to='core.family'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='subfamily',
+            field=models.ForeignKey(db_column='subfamily_code', on_delete=django.db.models.deletion.PROTECT, related_name='products', to='core.subfamily'),
+        ),
+
+        # UserFamilyAssignment: area_id/family_id/subfamily_id pasan a ser FK sobre las mismas columnas
+        migrations.AlterField(model_name='userfamilyassignment', name='area_id', field=models.IntegerField(db_column='area_id')),
+        migrations.AlterField(model_name='userfamilyassignment', name='family_id', field=models.IntegerField(db_column='family_id')),
+        migrations.AlterField(model_name='userfamilyassignment', name='subfamily_id', field=models.IntegerField(db_column='subfamily_id')),
+        migrations.RenameField(model_name='userfamilyassignment', old_name='area_id', new_name='area'),
+        migrations.RenameField(model_name='userfamilyassignment', old_name='family_id', new_name='family'),
+        migrations.RenameField(model_name='userfamilyassignment', old_name='subfamily_id', new_name='subfamily'),
+        migrations.AlterField(
+            model_name='userfamilyassignment',
+            name='area',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_assignments', to='core.area'),
+        ),
+        migrations.AlterField(
+            model_name='userfamilyassignment',
+            name='family',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_assignments', to='core.family'),
+        ),
+        migrations.AlterField(
+            model_name='userfamilyassignment',
+            name='subfamily',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_assignments', to='core.subfamily'),
+        ),
+        migrations.AlterUniqueTogether(name='userfamilyassignment', unique_together={('user', 'subfamily')}),
+
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['subfamily', '-id'], name='product_subfamily_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['family', '-id'], name='product_family_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['area', '-id'], name='product_area_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfamilyassignment',
+            index=models.Index(fields=['subfamily', 'user'], name='ufa_subfamily_user_idx'),
+        ),
+    ]
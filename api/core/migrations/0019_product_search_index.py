@@ -0,0 +1,45 @@
+from django.db import migrations
+
+SEARCH_COLUMNS = ['sku', 'name', 'brand', 'short_description', 'description', 'specifications', 'applications']
+FTS_TABLE = 'core_product_search'
+FULLTEXT_INDEX = 'product_search_ft'
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Crea el índice de texto completo según el motor: una tabla virtual FTS5
+    (sin acentos) en SQLite o un índice FULLTEXT en MySQL. En otros motores
+    no se crea nada y la búsqueda usa el índice en memoria.
+    """
+    connection = schema_editor.connection
+    columns = ', '.join(SEARCH_COLUMNS)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, {columns}) SELECT id, {columns} FROM core_product')
+    elif connection.vendor == 'mysql':
+        schema_editor.execute(f'ALTER TABLE core_product ADD FULLTEXT INDEX {FULLTEXT_INDEX} ({columns})')
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif connection.vendor == 'mysql':
+        schema_editor.execute(f'ALTER TABLE core_product DROP INDEX {FULLTEXT_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_product_taxonomy_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,82 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+RELATION_FIELDS = ('related', 'substitute')
+
+
+def split_skus(value):
+    return list(dict.fromkeys(part.strip() for part in (value or '').split(',') if part.strip()))
+
+
+def populate_relations(apps, schema_editor):
+    """
+    Convierte las listas de SKU separadas por coma de cada configuración por
+    país en filas de `ProductRelation`. Los SKU que no corresponden a ningún
+    producto se descartan, ya que la relación exige un producto existente.
+    """
+    Product = apps.get_model('core', 'Product')
+    ProductCountry = apps.get_model('core', 'ProductCountry')
+    ProductRelation = apps.get_model('core', 'ProductRelation')
+
+    product_ids = dict(Product.objects.values_list('sku', 'id').iterator(chunk_size=5000))
+    relations = []
+    settings = ProductCountry.objects.values_list('id', *RELATION_FIELDS).order_by('id').iterator(chunk_size=2000)
+    for setting_id, *values in settings:
+        for relation_type, value in zip(RELATION_FIELDS, values):
+            targets = [product_ids[sku] for sku in split_skus(value) if sku in product_ids]
+            relations.extend(
+                ProductRelation(setting_id=setting_id, relation_type=relation_type, target_id=target_id, order=order)
+                for order, target_id in enumerate(targets)
+            )
+        if len(relations) >= 2000:
+            ProductRelation.objects.bulk_create(relations)
+            relations = []
+    ProductRelation.objects.bulk_create(relations)
+
+
+def restore_sku_lists(apps, schema_editor):
+    ProductCountry = apps.get_model('core', 'ProductCountry')
+    ProductRelation = apps.get_model('core', 'ProductRelation')
+
+    values = {}
+    rows = ProductRelation.objects.values_list('setting_id', 'relation_type', 'target__sku').order_by('setting_id', 'order')
+    for setting_id, relation_type, sku in rows.iterator(chunk_size=2000):
+        values.setdefault(setting_id, {}).setdefault(relation_type, []).append(sku)
+    settings = ProductCountry.objects.in_bulk(list(values))
+    for setting_id, setting in settings.items():
+        setting.related = ','.join(values[setting_id].get('related', []))
+        setting.substitute = ','.join(values[setting_id].get('substitute', []))
+    ProductCountry.objects.bulk_update(list(settings.values()), RELATION_FIELDS, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRelation',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('relation_type', models.CharField(choices=[('related', 'Relacionado'), ('substitute', 'Sustituto')], max_length=20)),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('setting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relations', to='core.productcountry')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='referenced_by', to='core.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target', 'relation_type'], name='product_relation_target_idx')],
+                'constraints': [models.UniqueConstraint(fields=('setting', 'relation_type', 'target'), name='product_relation_unique')],
+            },
+        ),
+        migrations.RunPython(populate_relations, restore_sku_lists),
+        migrations.RemoveField(
+            model_name='productcountry',
+            name='related',
+        ),
+        migrations.RemoveField(
+            model_name='productcountry',
+            name='substitute',
+        ),
+    ]
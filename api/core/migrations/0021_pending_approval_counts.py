@@ -0,0 +1,49 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_pending_approval_counts(apps, schema_editor):
+    """
+    Calcula los conteos iniciales de productos pendientes de aprobación por
+    área y familia. Desde aquí se mantienen al cambiar el estado o la
+    taxonomía de cada producto.
+    """
+    Product = apps.get_model('core', 'Product')
+    Status = apps.get_model('core', 'Status')
+    Area = apps.get_model('core', 'Area')
+    Family = apps.get_model('core', 'Family')
+
+    pending = Status.objects.filter(code='pending_approval').first()
+    if pending is None:
+        return
+
+    pending_products = Product.objects.filter(status=pending)
+    for model, column in ((Area, 'area'), (Family, 'family')):
+        counts = pending_products.values(column).annotate(total=Count('id')).values_list(column, 'total')
+        for node_id, total in counts:
+            model.objects.filter(pk=node_id).update(pending_approval_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_productrelation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='area',
+            name='pending_approval_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='family',
+            name='pending_approval_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', '-id'], name='product_status_id_idx'),
+        ),
+        migrations.RunPython(populate_pending_approval_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0007_appuser_tokens_revoked_at'),
+        ('core', '0021_pending_approval_counts'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_status_pub_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_published_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_brand_idx',
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='area',
+            field=models.ForeignKey(db_column='area_code', db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='products', to='core.area'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='family',
+            field=models.ForeignKey(db_column='family_code', db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='products', to='core.family'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='status',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products_by_status', to='core.status'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='subfamily',
+            field=models.ForeignKey(db_column='subfamily_code', db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='products', to='core.subfamily'),
+        ),
+        migrations.AlterField(
+            model_name='productrelation',
+            name='setting',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='relations', to='core.productcountry'),
+        ),
+        migrations.AlterField(
+            model_name='productrelation',
+            name='target',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='referenced_by', to='core.product'),
+        ),
+        migrations.AlterField(
+            model_name='productworkflow',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='workflow_entries', to='core.product'),
+        ),
+        migrations.AlterField(
+            model_name='userfamilyassignment',
+            name='subfamily',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='user_assignments', to='core.subfamily'),
+        ),
+        migrations.AlterField(
+            model_name='userfamilyassignment',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='family_assignments', to='authapp.appuser'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from authapp.models import AppUser
 
 class ProductType(models.Model):
@@ -17,26 +17,144 @@ class Status(models.Model):
     def __str__(self):
         return f"Status {self.id}"
 
+class Area(models.Model):
+    id = models.IntegerField(primary_key=True)
+    name = models.CharField(max_length=100, null=True, blank=True)
+    product_count = models.IntegerField(default=0)
+    pending_approval_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Area {self.id}"
+
+class Family(models.Model):
+    id = models.IntegerField(primary_key=True)
+    area = models.ForeignKey(Area, on_delete=models.PROTECT, related_name='families')
+    name = models.CharField(max_length=100, null=True, blank=True)
+    product_count = models.IntegerField(default=0)
+    pending_approval_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Family {self.id}"
+
+class Subfamily(models.Model):
+    id = models.IntegerField(primary_key=True)
+    family = models.ForeignKey(Family, on_delete=models.PROTECT, related_name='subfamilies')
+    name = models.CharField(max_length=100, null=True, blank=True)
+    product_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Subfamily {self.id}"
+
+class ProductQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Precarga las relaciones que usa `ProductSerializer` (taxonomía y
+        configuraciones por país) para evitar consultas por cada fila. El tipo
+        y el estado se resuelven desde los registros de `core.reference`.
+        """
+        return self.select_related(
+            'area', 'family', 'subfamily'
+        ).prefetch_related('country_settings', relations_prefetch())
+
+def relations_prefetch(lookup='country_settings__relations'):
+    """
+    Precarga de los productos relacionados y sustitutos de cada
+    configuración por país, en orden y con el SKU del producto destino.
+    """
+    return models.Prefetch(
+        lookup,
+        queryset=ProductRelation.objects.select_related('target').only(
+            'id', 'setting_id', 'relation_type', 'order', 'target__id', 'target__sku'
+        ).order_by('order', 'id'),
+    )
+
 class Product(models.Model):
     id = models.AutoField(primary_key=True)
     sku = models.CharField(max_length=100, unique=True)
     name = models.CharField(max_length=255)
     product_type = models.ForeignKey(ProductType, related_name='products_by_type', null=True, on_delete=models.SET_NULL)
-    status = models.ForeignKey(Status, related_name='products_by_status', null=True, on_delete=models.SET_NULL)
+    # Sin índice propio en las FK de estado y taxonomía: las cubren los índices compuestos de Meta.
+    status = models.ForeignKey(Status, related_name='products_by_status', null=True, on_delete=models.SET_NULL, db_index=False)
     published = models.BooleanField(default=False)
     description = models.TextField(null=True, blank=True)
     short_description = models.CharField(max_length=193, null=True, blank=True)
     specifications = models.TextField(null=True, blank=True)
     applications = models.TextField(null=True, blank=True)
     brand = models.CharField(max_length=100, null=True, blank=True)
-    area = models.CharField(max_length=100, null=True, blank=True)
-    area_code = models.IntegerField()
-    family = models.CharField(max_length=100, null=True, blank=True)
-    family_code = models.IntegerField()
-    subfamily = models.CharField(max_length=100, null=True, blank=True)
-    subfamily_code = models.IntegerField()
+    area = models.ForeignKey(Area, related_name='products', on_delete=models.PROTECT, db_column='area_code', db_index=False)
+    family = models.ForeignKey(Family, related_name='products', on_delete=models.PROTECT, db_column='family_code', db_index=False)
+    subfamily = models.ForeignKey(Subfamily, related_name='products', on_delete=models.PROTECT, db_column='subfamily_code', db_index=False)
     url = models.TextField(max_length=255, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    revision = models.PositiveBigIntegerField(default=0)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Filtros de taxonomía del listado y alcance "editable por mí", con el orden por defecto (-id)
+            models.Index(fields=['subfamily', '-id'], name='product_subfamily_id_idx'),
+            models.Index(fields=['family', '-id'], name='product_family_id_idx'),
+            models.Index(fields=['area', '-id'], name='product_area_id_idx'),
+            # Cola de aprobación y filtro por estado (el filtro `published` se aplica sobre este recorrido)
+            models.Index(fields=['status', '-id'], name='product_status_id_idx'),
+            # Orden por fecha de creación (con desempate por id)
+            models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+            # Sin índice para `published` (recorrer por -id ya encuentra una página) ni para `brand`
+            # (el filtro es iexact y no lo usa): ver benchmark_product_queries.
+        ]
+
+    # Columnas de las que dependen los contadores por nodo de core.taxonomy y core.approvals.
+    COUNTED_FIELDS = ('area', 'family', 'subfamily', 'status')
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            stored = None
+            if not self._state.adding and not kwargs.get('force_insert'):
+                update_fields = kwargs.get('update_fields')
+                if update_fields is None:
+                    deferred = self.get_deferred_fields()
+                    update_fields = [
+                        field.name for field in self._meta.concrete_fields
+                        if not field.primary_key and field.attname not in deferred
+                    ]
+                if set(update_fields) & set(self.COUNTED_FIELDS):
+                    stored = self.lock_stored_row()
+                else:
+                    # Sin escribir taxonomía ni estado los contadores no cambian, aunque la instancia esté desactualizada.
+                    stored = self._loaded_taxonomy = self.taxonomy_key
+                    self._loaded_status_id = self.__dict__.get('status_id')
+                if stored is not None:
+                    # `revision` solo avanza con el UPDATE `revision + 1` de core.changes: guardar una instancia
+                    # cargada antes de otro cambio no debe reescribir (y repetir) un número de revisión anterior.
+                    kwargs['update_fields'] = [name for name in update_fields if name != 'revision']
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            self.lock_stored_row()
+            return super().delete(*args, **kwargs)
+
+    def lock_stored_row(self):
+        """
+        Lee con `SELECT ... FOR UPDATE` la taxonomía y el estado guardados del
+        producto y los deja en `_loaded_taxonomy` y `_loaded_status_id`, de
+        donde parten los ajustes de conteo al guardar o eliminar (ver core.signals). Se usa la fila y no la
+        instancia, que puede estar desactualizada; el bloqueo evita que dos
+        escrituras concurrentes descuenten el mismo nodo. Retorna `None` si la
+        fila ya no existe.
+        """
+        row = Product.objects.select_for_update().filter(pk=self.pk).values_list(
+            'area_id', 'family_id', 'subfamily_id', 'status_id'
+        ).first()
+        self._loaded_taxonomy = tuple(row[:3]) if row else None
+        self._loaded_status_id = row[3] if row else None
+        return self._loaded_taxonomy
+
+    @property
+    def taxonomy_key(self):
+        return (self.__dict__.get('area_id'), self.__dict__.get('family_id'), self.__dict__.get('subfamily_id'))
 
     def __str__(self):
         return f"Product {self.id}"
@@ -46,13 +164,18 @@ class Product(models.Model):
         return True
 
 class UserFamilyAssignment(models.Model):
-    user = models.ForeignKey(AppUser, on_delete=models.CASCADE, related_name='family_assignments')
-    area_id = models.IntegerField()
-    family_id = models.IntegerField()
-    subfamily_id = models.IntegerField()
+    # `user` y `subfamily` quedan cubiertos por unique_together y ufa_subfamily_user_idx.
+    user = models.ForeignKey(AppUser, on_delete=models.CASCADE, related_name='family_assignments', db_index=False)
+    area = models.ForeignKey(Area, on_delete=models.CASCADE, related_name='user_assignments')
+    family = models.ForeignKey(Family, on_delete=models.CASCADE, related_name='user_assignments')
+    subfamily = models.ForeignKey(Subfamily, on_delete=models.CASCADE, related_name='user_assignments', db_index=False)
 
     class Meta:
-        unique_together = ('user', 'subfamily_id')
+        unique_together = ('user', 'subfamily')
+        indexes = [
+            # Resolución de related_users por subfamilia (cubre user_id sin leer la tabla)
+            models.Index(fields=['subfamily', 'user'], name='ufa_subfamily_user_idx'),
+        ]
 
     def __str__(self):
         return f'UserFamilyAssignment user={self.user.email} subfamily={self.subfamily_id}'
@@ -64,8 +187,7 @@ class ProductCountry(models.Model):
     sellable = models.BooleanField(default=True)
     category_code = models.CharField(max_length=100, blank=True, null=True)
     category = models.TextField(blank=True, null=True)
-    related = models.TextField(blank=True, null=True)
-    substitute = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('product', 'country_code')
@@ -73,12 +195,56 @@ class ProductCountry(models.Model):
     def __str__(self):
         return f"{self.product.name} ({self.country_code})"
 
+    def get_relation_skus(self, relation_type):
+        """
+        SKU de los productos relacionados o sustitutos, en orden. Usa la
+        precarga de `relations_prefetch()` si existe.
+        """
+        relations = self.relations.all()
+        if 'relations' not in getattr(self, '_prefetched_objects_cache', {}):
+            # Sin precarga el orden no está garantizado: el de la lista es `order`.
+            relations = relations.select_related('target').order_by('order', 'id')
+        return [relation.target.sku for relation in relations if relation.relation_type == relation_type]
+
+class ProductRelation(models.Model):
+    """
+    Producto relacionado o sustituto de un producto en un país. Reemplaza las
+    listas de SKU separadas por coma que guardaba `ProductCountry`; la API
+    las sigue exponiendo en ese formato (ver `ProductCountrySerializer`).
+    """
+    RELATED = 'related'
+    SUBSTITUTE = 'substitute'
+    RELATION_TYPES = [
+        (RELATED, 'Relacionado'),
+        (SUBSTITUTE, 'Sustituto'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    # Cubiertas por product_relation_unique y product_relation_target_idx
+    setting = models.ForeignKey(ProductCountry, on_delete=models.CASCADE, related_name='relations', db_index=False)
+    relation_type = models.CharField(max_length=20, choices=RELATION_TYPES)
+    target = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='referenced_by', db_index=False)
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['setting', 'relation_type', 'target'], name='product_relation_unique'),
+        ]
+        indexes = [
+            # Búsqueda inversa: qué productos referencian a uno dado, por tipo de relación
+            models.Index(fields=['target', 'relation_type'], name='product_relation_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_relation_type_display()} {self.target_id} of setting {self.setting_id}"
+
 class ProductVideo(models.Model):
     id = models.AutoField(primary_key=True)
     product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='product_videos')
     youtube_url = models.URLField(max_length=200, unique=False, null=False, blank=False)
     order = models.PositiveIntegerField(default=0, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', 'created_at']
@@ -89,12 +255,36 @@ class ProductVideo(models.Model):
 
 class ProductWorkflow(models.Model):
     id = models.AutoField(primary_key=True)
-    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='workflow_entries')
+    # Cubierta por workflow_product_id_idx
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='workflow_entries', db_index=False)
     user = models.ForeignKey(AppUser, on_delete=models.CASCADE, related_name='user_workflows')
     old_status = models.ForeignKey(Status, related_name='workflow_old_statuses', null=True, on_delete=models.SET_NULL)
     new_status = models.ForeignKey(Status, related_name='workflow_new_statuses', null=True, on_delete=models.SET_NULL)
     message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Historial de un producto ordenado por -id
+            models.Index(fields=['product', '-id'], name='workflow_product_id_idx'),
+        ]
+
     def __str__(self):
         return f"Workflow for {self.product.name} by {self.user.email} - {self.new_status.name if self.new_status else 'No Status'}"
+
+class ProductChange(models.Model):
+    """
+    Registro append-only de cambios de productos. El `id` es la revisión
+    monótona del catálogo que usa el feed `/v1/products/changes/`.
+
+    No tiene FK a Product para que los registros de productos eliminados
+    (`deleted=True`) sobrevivan a la eliminación.
+    """
+    id = models.BigAutoField(primary_key=True)
+    product_id = models.IntegerField(db_index=True)
+    sku = models.CharField(max_length=100, null=True, blank=True)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Change {self.id} product={self.product_id}{' (deleted)' if self.deleted else ''}"
@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) para el listado de productos.
+
+    A diferencia de la paginación por offset, cada página se resuelve con un
+    `WHERE <campo> < <último valor> ORDER BY ... LIMIT n`, por lo que el costo
+    se mantiene constante sin importar cuán profunda sea la página solicitada.
+
+    El orden por defecto es `-id`, que es único y estable. Si el cliente
+    ordena por otro campo (vía `?ordering=`), `id` se añade como desempate.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            descending = ordering[0].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return tuple(ordering)
@@ -0,0 +1,33 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    `JSONParser` respaldado por orjson cuando está instalado. orjson rechaza
+    `NaN` e `Infinity`, igual que el parser de DRF en modo estricto. Para
+    cuerpos que no están en UTF-8, o si orjson no está disponible, usa la
+    implementación estándar.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        if orjson is None or not self.strict or not self.is_utf8(parser_context):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+    def is_utf8(self, parser_context):
+        try:
+            return codecs.lookup(parser_context.get('encoding', settings.DEFAULT_CHARSET)).name == 'utf-8'
+        except LookupError:
+            return False
@@ -1,6 +1,8 @@
 from rest_framework import permissions
-from core.models import UserFamilyAssignment
-from authapp.models import AppUser 
+from core.acl import get_user_subfamily_ids
+from core.approvals import PENDING_APPROVAL
+from core.reference import statuses
+from core.transitions import StatusTransition
 
 class ProductEditPermission(permissions.BasePermission):
     """
@@ -13,6 +15,7 @@ class ProductEditPermission(permissions.BasePermission):
     - Los 'administrator' tienen permiso total de escritura sobre cualquier producto.
     - Los 'product_manager' pueden escribir en un producto solo si tienen una
       UserFamilyAssignment que coincida con la subfamilia del producto.
+      El conjunto de subfamilias asignadas se obtiene de `core.acl`.
     """
 
     def has_permission(self, request, view):
@@ -69,20 +72,15 @@ class ProductEditPermission(permissions.BasePermission):
 
         # Logic for 'product_manager' and other roles with specific permissions:
         # Requires the product to have a subfamily and the user to be assigned to it.
-        # `obj.subfamily_code` should be the ID of the subfamily or a relation to the subfamily.
-        product_subfamily_id = obj.subfamily_code 
+        product_subfamily_id = obj.subfamily_id
 
         if product_subfamily_id is None:
             # If the product doesn't have an assigned subfamily, no user (except admin) can edit it
             return False
 
-        # Check if the user has any assignment for this subfamily
-        user_has_subfamily_assignment = UserFamilyAssignment.objects.filter(
-            user=request.user,
-            subfamily_id=product_subfamily_id
-        ).exists()
-
-        return user_has_subfamily_assignment
+        # Check if the user has any assignment for this subfamily.
+        # The set of assigned subfamilies is loaded once per request (see core.acl).
+        return product_subfamily_id in get_user_subfamily_ids(request.user)
 
 class CanRequestProductApproval(permissions.BasePermission):
     """
@@ -95,29 +93,7 @@ class CanRequestProductApproval(permissions.BasePermission):
     - El estado actual del producto debe ser 'draft', 'editing', o 'deactivated'.
     """
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        
-        user_role_code = None
-        if hasattr(user, 'role') and user.role:
-            user_role_code = user.role.code
-        
-        # Administrators publish directly, do not request approval
-        if user_role_code == 'administrator':
-            return False 
-        
-        # Default users cannot request approval
-        if user_role_code == 'default_user':
-            return False 
-            
-        # User must have general edit permission for the product
-        # Re-use the logic from ProductEditPermission's has_object_permission
-        # Create an instance to call its method.
-        has_edit_permission = ProductEditPermission().has_object_permission(request, view, obj)
-        if not has_edit_permission:
-            return False
-
-        # Product status must be eligible for approval request
-        if obj.status and obj.status.code in ['draft', 'editing', 'deactivated']:
-            return True
-            
-        return False
\ No newline at end of file
+        # Las reglas viven en core.transitions, junto al resto de las transiciones de estado.
+        current = statuses.get_by_id(obj.status_id)
+        transition = StatusTransition(request.user, status_code=PENDING_APPROVAL)
+        return transition.can_request_approval(obj, current.code if current else None)
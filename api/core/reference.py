@@ -0,0 +1,125 @@
+import threading
+import time
+
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+
+from authapp.models import AppUserRole
+from .models import ProductType, Status
+
+
+def get_reference_data_max_age():
+    """
+    Segundos que un proceso conserva una tabla de referencia antes de recargarla.
+    Las señales invalidan el registro del proceso que hizo el cambio; este
+    plazo acota cuánto tardan en enterarse los demás procesos.
+    """
+    return getattr(settings, 'REFERENCE_DATA_MAX_AGE', 300)
+
+
+class ReferenceRegistry:
+    """
+    Copia en memoria (por proceso) de una tabla de referencia pequeña y casi
+    estática, indexada por `code` y por `id`. Se carga completa con una sola
+    consulta en el primer acceso y se invalida con las señales de guardado y
+    borrado del modelo.
+
+    Las instancias retornadas se comparten entre solicitudes y no deben modificarse.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._tables = None
+
+    def __deepcopy__(self, memo):
+        # Los campos de DRF copian sus argumentos; el registro es único por proceso.
+        return self
+
+    def load(self):
+        rows = list(self.model.objects.order_by('id'))
+        tables = (
+            {row.code: row for row in rows},
+            {row.pk: row for row in rows},
+            time.monotonic(),
+            {},
+        )
+        self._tables = tables
+        return tables
+
+    def invalidate(self):
+        self._tables = None
+
+    def _get_tables(self):
+        tables = self._tables
+        if tables is None or time.monotonic() - tables[2] > get_reference_data_max_age():
+            with self._lock:
+                tables = self._tables
+                if tables is None or time.monotonic() - tables[2] > get_reference_data_max_age():
+                    tables = self.load()
+        return tables
+
+    def get(self, code):
+        """
+        Retorna la fila con el código indicado, o `None` si no existe.
+        """
+        return self._get_tables()[0].get(code)
+
+    def get_by_id(self, pk):
+        """
+        Retorna la fila con el ID indicado, o `None` si no existe.
+        """
+        if pk is None:
+            return None
+        return self._get_tables()[1].get(pk)
+
+    def get_ids(self, codes):
+        """
+        Traduce una lista de códigos a IDs, omitiendo los códigos inexistentes.
+        """
+        by_code = self._get_tables()[0]
+        return [by_code[code].pk for code in codes if code in by_code]
+
+    def represent(self, pk, serializer_class):
+        """
+        Retorna la representación de la fila con `serializer_class`, o `None`
+        si no existe. Se calcula una vez por fila y serializer, y se entrega
+        como copia.
+        """
+        tables = self._get_tables()
+        key = (serializer_class, pk)
+        if key not in tables[3]:
+            row = tables[1].get(pk)
+            tables[3][key] = dict(serializer_class(row).data) if row is not None else None
+        data = tables[3][key]
+        return dict(data) if data is not None else None
+
+    def by_code(self):
+        """
+        Retorna el diccionario `{code: instancia}` completo.
+        """
+        return self._get_tables()[0]
+
+
+product_types = ReferenceRegistry(ProductType)
+statuses = ReferenceRegistry(Status)
+roles = ReferenceRegistry(AppUserRole)
+
+
+class ReferenceField(serializers.Field):
+    """
+    Campo de solo lectura que serializa una FK a una tabla de referencia desde
+    su registro en memoria, sin consultar la base de datos. `source` debe
+    apuntar a la columna de la FK (por ejemplo `status_id`).
+    """
+
+    def __init__(self, registry, serializer_class, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.registry = registry
+        self.serializer_class = serializer_class
+        extend_schema_field(serializer_class)(self)
+
+    def to_representation(self, value):
+        return self.registry.represent(value, self.serializer_class)
@@ -0,0 +1,81 @@
+from django.db.models import Q
+
+from .models import Product, ProductRelation
+from .search import chunked
+
+# Campos de `ProductCountrySerializer` que se guardan como `ProductRelation`, con su tipo de relación.
+RELATION_FIELDS = {
+    'related': ProductRelation.RELATED,
+    'substitute': ProductRelation.SUBSTITUTE,
+}
+
+
+def parse_sku_list(value):
+    """
+    Convierte una lista de SKU separada por coma en una lista sin vacíos ni
+    repetidos, conservando el orden.
+    """
+    return list(dict.fromkeys(part.strip() for part in (value or '').split(',') if part.strip()))
+
+
+def resolve_skus(skus):
+    """
+    Retorna `{sku: product_id}` para los SKU que existen.
+    """
+    resolved = {}
+    for chunk in chunked(set(skus)):
+        resolved.update(Product.objects.filter(sku__in=chunk).values_list('sku', 'id'))
+    return resolved
+
+
+def replace_relations(relations, product_ids_by_sku):
+    """
+    Reemplaza en bloque las relaciones indicadas en
+    `{(setting_id, relation_type): [sku, ...]}`, respetando el orden de cada
+    lista. Emite un DELETE por tipo de relación y un único INSERT.
+    """
+    if not relations:
+        return
+    settings_by_type = {}
+    for setting_id, relation_type in relations:
+        settings_by_type.setdefault(relation_type, []).append(setting_id)
+    condition = Q()
+    for relation_type, setting_ids in settings_by_type.items():
+        condition |= Q(relation_type=relation_type, setting_id__in=setting_ids)
+    ProductRelation.objects.filter(condition).delete()
+    ProductRelation.objects.bulk_create([
+        ProductRelation(setting_id=setting_id, relation_type=relation_type, target_id=product_ids_by_sku[sku], order=order)
+        for (setting_id, relation_type), skus in relations.items()
+        for order, sku in enumerate(skus)
+    ])
+
+
+def get_referencing_relations(product_id, relation_type=None, country_code=None):
+    """
+    Búsqueda inversa: relaciones de otros productos que apuntan a
+    `product_id`, opcionalmente filtradas por tipo y país. Usa el índice
+    `(target, relation_type)`.
+    """
+    filters = {'target_id': product_id}
+    if relation_type:
+        filters['relation_type'] = relation_type
+    if country_code:
+        filters['setting__country_code__iexact'] = country_code
+    return ProductRelation.objects.filter(**filters).select_related('setting__product').only(
+        'relation_type', 'setting__country_code', 'setting__product__id', 'setting__product__sku', 'setting__product__name'
+    ).order_by(
+        'setting__product_id', 'setting__country_code', 'relation_type'
+    )
+
+
+def get_referencing_product_ids(product_ids):
+    """
+    Productos que tienen como relacionado o sustituto alguno de `product_ids`.
+    Su representación incluye el SKU de esos productos, por lo que cambia si
+    se renombran o eliminan.
+    """
+    return set(
+        ProductRelation.objects.filter(target_id__in=list(product_ids))
+        .values_list('setting__product_id', flat=True)
+        .distinct()
+    ) - set(product_ids)
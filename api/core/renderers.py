@@ -0,0 +1,33 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` respaldado por orjson cuando está instalado.
+
+    Produce la misma salida que el renderer de DRF: JSON compacto en UTF-8,
+    fechas con sufijo `Z` en UTC, y `Decimal`, textos diferidos y demás tipos
+    no nativos convertidos por el `JSONEncoder` de DRF. También escapa
+    U+2028/U+2029. Si orjson no está disponible, se pide indentación o la
+    configuración de DRF no es la compacta por defecto, usa la
+    implementación estándar.
+    """
+    orjson_options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.orjson_options)
+        except orjson.JSONEncodeError:
+            # Por ejemplo enteros de más de 64 bits: el codificador estándar sí los admite.
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from .reference import roles
+
+DETAIL_CACHE_KEY = 'core:product-detail:{pk}:{variant}'
+DETAIL_STATS_KEY = 'core:product-detail:stats:{name}'
+NO_ROLE_VARIANT = 'none'
+
+
+class ProductDetailCache:
+    """
+    Caché de la respuesta JSON ya renderizada del detalle de producto, una
+    entrada por producto y variante (rol del usuario).
+
+    Cada entrada guarda el ETag con el que se generó; solo se sirve si
+    coincide con el ETag actual del producto, de modo que nunca se entrega
+    una versión anterior aunque otra ruta de escritura no haya invalidado la
+    entrada. Las señales de `core.signals` además eliminan las entradas del
+    producto modificado. Los aciertos y fallos se cuentan en la misma caché.
+    """
+
+    def __init__(self, alias='default', ttl=0):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, pk, variant, etag):
+        entry = self.cache.get(DETAIL_CACHE_KEY.format(pk=pk, variant=variant))
+        hit = entry is not None and entry[0] == etag
+        self.count('hits' if hit else 'misses')
+        return entry[1] if hit else None
+
+    def set(self, pk, variant, etag, content):
+        self.cache.set(DETAIL_CACHE_KEY.format(pk=pk, variant=variant), (etag, content), self.ttl)
+
+    def invalidate(self, pk):
+        if not self.enabled:
+            return
+        variants = [*roles.by_code(), NO_ROLE_VARIANT]
+        self.cache.delete_many([DETAIL_CACHE_KEY.format(pk=pk, variant=variant) for variant in variants])
+
+    def count(self, name):
+        key = DETAIL_STATS_KEY.format(name=name)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, None)
+
+    def stats(self):
+        values = self.cache.get_many([DETAIL_STATS_KEY.format(name=name) for name in ('hits', 'misses')])
+        hits = values.get(DETAIL_STATS_KEY.format(name='hits'), 0)
+        misses = values.get(DETAIL_STATS_KEY.format(name='misses'), 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+
+    def reset_stats(self):
+        self.cache.delete_many([DETAIL_STATS_KEY.format(name=name) for name in ('hits', 'misses')])
+
+
+def get_product_detail_cache():
+    """
+    Retorna la caché de detalle configurada con `PRODUCT_DETAIL_CACHE_ALIAS`
+    y `PRODUCT_DETAIL_CACHE_TTL`. Con TTL 0 (por defecto) queda deshabilitada.
+    """
+    return ProductDetailCache(
+        alias=getattr(settings, 'PRODUCT_DETAIL_CACHE_ALIAS', 'default'),
+        ttl=getattr(settings, 'PRODUCT_DETAIL_CACHE_TTL', 0),
+    )
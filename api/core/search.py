@@ -0,0 +1,321 @@
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import Product
+
+SEARCH_FIELDS = ['sku', 'name', 'brand', 'short_description', 'description', 'specifications', 'applications']
+# Peso de cada campo en el ranking: una coincidencia en el SKU o el nombre pesa más que una en la descripción.
+FIELD_WEIGHTS = {
+    'sku': 10.0, 'name': 5.0, 'brand': 3.0, 'short_description': 2.0,
+    'description': 1.0, 'specifications': 1.0, 'applications': 1.0,
+}
+FTS_TABLE = 'core_product_search'
+INDEX_CHUNK_SIZE = 500
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    """
+    Pasa el texto a minúsculas y elimina los acentos (`canción` → `cancion`).
+    """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize_text(text))
+
+
+def chunked(values, size=INDEX_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class SearchBackend:
+    """
+    Índice de búsqueda de productos. Todas las consultas coinciden por prefijo
+    de palabra, sin distinguir mayúsculas ni acentos, y exigen todas las
+    palabras de la consulta.
+    """
+    name = None
+
+    def index_products(self, product_ids):
+        """Agrega o actualiza en el índice los productos indicados."""
+
+    def remove_products(self, product_ids):
+        """Elimina del índice los productos indicados."""
+
+    def rebuild(self):
+        """Reconstruye el índice completo desde la base de datos."""
+
+    def search(self, query, limit, offset=0):
+        """Retorna una lista `[(product_id, score), ...]` ordenada por relevancia."""
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, query):
+        """Restringe `queryset` a los productos que coinciden con la consulta, sin ordenar."""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    Índice FTS5 de SQLite (tabla virtual `core_product_search`, creada por la
+    migración 0018) con `remove_diacritics` y ranking BM25 ponderado por campo.
+    Se actualiza en la misma transacción que la escritura del producto.
+    """
+    name = 'sqlite_fts'
+
+    @property
+    def columns(self):
+        return [Product._meta.get_field(field).column for field in SEARCH_FIELDS]
+
+    def bm25(self):
+        weights = ', '.join(str(FIELD_WEIGHTS[field]) for field in SEARCH_FIELDS)
+        return f'bm25({FTS_TABLE}, {weights})'
+
+    def match_expression(self, query):
+        tokens = tokenize(query)
+        return ' '.join(f'"{token}"*' for token in tokens) if tokens else None
+
+    def index_products(self, product_ids):
+        columns = ', '.join(self.columns)
+        with connection.cursor() as cursor:
+            for chunk in chunked(product_ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, {columns}) '
+                    f'SELECT id, {columns} FROM {Product._meta.db_table} WHERE id IN ({placeholders})',
+                    chunk,
+                )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            for chunk in chunked(product_ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+
+    def rebuild(self):
+        columns = ', '.join(self.columns)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, {columns}) SELECT id, {columns} FROM {Product._meta.db_table}'
+            )
+
+    def search(self, query, limit, offset=0):
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, -{self.bm25()} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY {self.bm25()}, rowid LIMIT %s OFFSET %s',
+                [expression, limit, offset],
+            )
+            return cursor.fetchall()
+
+    def filter_queryset(self, queryset, query):
+        expression = self.match_expression(query)
+        if expression is None:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression])
+        )
+
+
+class MySQLFullTextBackend(SearchBackend):
+    """
+    Índice FULLTEXT de MySQL sobre las columnas de `core_product` (creado por
+    la migración 0018). La base de datos lo mantiene al día por sí sola; la
+    insensibilidad a acentos la da la collation `*_ai_ci` de las columnas.
+    """
+    name = 'mysql_fulltext'
+
+    def match_sql(self):
+        columns = ', '.join(connection.ops.quote_name(Product._meta.get_field(f).column) for f in SEARCH_FIELDS)
+        return f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)'
+
+    def match_expression(self, query):
+        tokens = tokenize(query)
+        return ' '.join(f'+{token}*' for token in tokens) if tokens else None
+
+    def rebuild(self):
+        # InnoDB actualiza el índice FULLTEXT en cada escritura.
+        pass
+
+    def search(self, query, limit, offset=0):
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        return list(
+            Product.objects.annotate(search_score=RawSQL(self.match_sql(), [expression]))
+            .filter(search_score__gt=0)
+            .order_by('-search_score', 'id')
+            .values_list('id', 'search_score')[offset:offset + limit]
+        )
+
+    def filter_queryset(self, queryset, query):
+        expression = self.match_expression(query)
+        if expression is None:
+            return queryset.none()
+        return queryset.alias(search_score=RawSQL(self.match_sql(), [expression])).filter(search_score__gt=0)
+
+
+class InMemorySearchBackend(SearchBackend):
+    """
+    Índice invertido en memoria del proceso: `token → {product_id: peso}`. Se
+    construye en la primera búsqueda y se actualiza al confirmar cada
+    transacción que modifica productos. Otros procesos solo ven los cambios
+    hechos por ellos mismos, por lo que conviene para un único proceso o
+    como respaldo cuando la base de datos no tiene índice de texto completo.
+    """
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = None
+        self._documents = {}
+        self._vocabulary = []
+
+    def document_terms(self, values):
+        terms = defaultdict(float)
+        for field, value in zip(SEARCH_FIELDS, values):
+            for token in tokenize(value):
+                terms[token] += FIELD_WEIGHTS[field]
+        return terms
+
+    def _add(self, product_id, terms):
+        self._documents[product_id] = terms
+        for token, weight in terms.items():
+            self._postings.setdefault(token, {})[product_id] = weight
+
+    def _remove(self, product_id):
+        for token in self._documents.pop(product_id, {}):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def _load(self):
+        with self._lock:
+            if self._postings is not None:
+                return
+            self._postings, self._documents = {}, {}
+            for product_id, *values in Product.objects.values_list('id', *SEARCH_FIELDS).iterator(chunk_size=2000):
+                self._add(product_id, self.document_terms(values))
+            self._vocabulary = sorted(self._postings)
+
+    def _apply(self, product_ids, reload_documents):
+        with self._lock:
+            if self._postings is None:
+                return
+            for chunk in chunked(product_ids):
+                for product_id in chunk:
+                    self._remove(product_id)
+                if reload_documents:
+                    for product_id, *values in Product.objects.filter(pk__in=chunk).values_list('id', *SEARCH_FIELDS):
+                        self._add(product_id, self.document_terms(values))
+            self._vocabulary = sorted(self._postings)
+
+    def index_products(self, product_ids):
+        product_ids = list(product_ids)
+        transaction.on_commit(lambda: self._apply(product_ids, reload_documents=True))
+
+    def remove_products(self, product_ids):
+        product_ids = list(product_ids)
+        transaction.on_commit(lambda: self._apply(product_ids, reload_documents=False))
+
+    def rebuild(self):
+        with self._lock:
+            self._postings = None
+        self._load()
+
+    def _matches(self, token):
+        """
+        Retorna `{product_id: peso}` para las palabras del índice que empiezan con `token`.
+        """
+        matches = {}
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, token)
+        while position < len(vocabulary) and vocabulary[position].startswith(token):
+            for product_id, weight in self._postings[vocabulary[position]].items():
+                matches[product_id] = max(weight, matches.get(product_id, 0))
+            position += 1
+        return matches
+
+    def _score(self, query):
+        self._load()
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = None
+            for token in tokens:
+                matches = self._matches(token)
+                idf = math.log(1 + total / (len(matches) or 1))
+                if scores is None:
+                    scores = {product_id: weight * idf for product_id, weight in matches.items()}
+                else:
+                    scores = {
+                        product_id: score + matches[product_id] * idf
+                        for product_id, score in scores.items() if product_id in matches
+                    }
+                if not scores:
+                    break
+        return scores or {}
+
+    def search(self, query, limit, offset=0):
+        ranked = sorted(self._score(query).items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit]
+
+    def filter_queryset(self, queryset, query):
+        return queryset.filter(pk__in=list(self._score(query)))
+
+
+BACKENDS = {
+    backend.name: backend for backend in (SQLiteFTSBackend, MySQLFullTextBackend, InMemorySearchBackend)
+}
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def resolve_backend_name(name):
+    """
+    Resuelve el valor de `PRODUCT_SEARCH_BACKEND`. Con `auto` (por defecto)
+    usa FTS5 en SQLite si existe la tabla del índice, FULLTEXT en MySQL y el
+    índice en memoria en cualquier otro caso.
+    """
+    if name != 'auto':
+        return name
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        return SQLiteFTSBackend.name
+    if connection.vendor == 'mysql':
+        return MySQLFullTextBackend.name
+    return InMemorySearchBackend.name
+
+
+def get_search_backend():
+    """
+    Retorna el backend configurado. Se resuelve e instancia una vez por proceso.
+    """
+    configured = getattr(settings, 'PRODUCT_SEARCH_BACKEND', 'auto')
+    backend = _backends.get(configured)
+    if backend is None:
+        with _backends_lock:
+            if configured not in _backends:
+                _backends[configured] = BACKENDS[resolve_backend_name(configured)]()
+            backend = _backends[configured]
+    return backend
@@ -1,5 +1,11 @@
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
-from .models import Product, ProductType, Status, UserFamilyAssignment, ProductCountry, ProductWorkflow, ProductVideo
+from .models import Product, ProductType, Status, Subfamily, UserFamilyAssignment, ProductCountry, ProductWorkflow, ProductVideo, relations_prefetch
+from .acl import get_user_role_code, get_user_subfamily_ids
+from .changes import touch_products
+from .reference import ReferenceField, product_types, statuses
+from .relations import RELATION_FIELDS, parse_sku_list, resolve_skus, replace_relations, get_referencing_product_ids
 from authapp.models import AppUser
 
 from rest_framework import serializers
@@ -44,7 +50,38 @@ class StatusSerializer(serializers.ModelSerializer):
         model = Status
         fields = ['id', 'code', 'name']
 
+class RelationSkusField(serializers.CharField):
+    """
+    Lista de SKU separada por coma de un tipo de relación de la configuración
+    por país, guardada en `ProductRelation`. Al validar entrega la lista de
+    SKU sin repetidos; `ProductSerializer` verifica que existan y la escribe.
+    """
+    def __init__(self, relation_type, **kwargs):
+        self.relation_type = relation_type
+        kwargs.update(source='*', required=False, allow_blank=True, allow_null=True)
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=serializers.empty):
+        value = super().run_validation('' if data is None else data)
+        return {self.field_name: parse_sku_list(value)}
+
+    def to_representation(self, setting):
+        return ','.join(setting.get_relation_skus(self.relation_type))
+
+class ProductCountryListSerializer(serializers.ListSerializer):
+    """
+    Carga en una sola consulta las relaciones de todas las configuraciones
+    que no vengan ya precargadas (por ejemplo, al responder una actualización).
+    """
+    def to_representation(self, data):
+        settings = list(data.all() if hasattr(data, 'all') else data)
+        prefetch_related_objects(settings, relations_prefetch('relations'))
+        return super().to_representation(settings)
+
 class ProductCountrySerializer(serializers.ModelSerializer):
+    related = RelationSkusField(RELATION_FIELDS['related'])
+    substitute = RelationSkusField(RELATION_FIELDS['substitute'])
+
     class Meta:
         model = ProductCountry
         fields = [
@@ -56,6 +93,7 @@ class ProductCountrySerializer(serializers.ModelSerializer):
             'related',
             'substitute',
         ]
+        list_serializer_class = ProductCountryListSerializer
 
 class UserFamilyAssignmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -64,80 +102,344 @@ class UserFamilyAssignmentSerializer(serializers.ModelSerializer):
 
 class ProductWorkflowSerializer(serializers.ModelSerializer):
     user = ReadAppUserSerializer(read_only=True)
-    old_status = StatusSerializer(read_only=True)
-    new_status = StatusSerializer(read_only=True)
+    old_status = ReferenceField(statuses, StatusSerializer, source='old_status_id')
+    new_status = ReferenceField(statuses, StatusSerializer, source='new_status_id')
 
     class Meta:
         model = ProductWorkflow
         fields = ['id', 'product', 'user', 'old_status', 'new_status', 'message', 'created_at']
 
+def get_related_users_by_subfamily(subfamily_ids):
+    """
+    Resuelve, en una sola consulta, los usuarios activos (no administradores)
+    asignados a cada subfamilia. Retorna un diccionario
+    `{subfamily_id: [{'email': ...}, ...]}`.
+    """
+    subfamily_ids = {s for s in subfamily_ids if isinstance(s, (int, float))}
+    if not subfamily_ids:
+        return {}
+
+    rows = UserFamilyAssignment.objects.filter(
+        subfamily_id__in=subfamily_ids,
+        user__is_active=True
+    ).exclude(
+        user__role__code='administrator'
+    ).order_by('user_id').values_list('subfamily_id', 'user__email')
+
+    related_users = {}
+    for subfamily_id, email in rows:
+        users = related_users.setdefault(subfamily_id, [])
+        if {'email': email} not in users:
+            users.append({'email': email})
+    return related_users
+
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    Serializa una lista de productos resolviendo `related_users` para toda la
+    página con una única consulta agrupada por subfamilia.
+    """
+    def to_representation(self, data):
+        products = list(data.all() if hasattr(data, 'all') else data)
+        if 'related_users' in self.child.fields:
+            self.context['related_users_by_subfamily'] = get_related_users_by_subfamily(
+                product.subfamily_id for product in products
+            )
+        return super().to_representation(products)
+
 class ProductSerializer(serializers.ModelSerializer):
-    product_type = ProductTypeSerializer(read_only=True)
-    status = StatusSerializer(read_only=True)
+    product_type = ReferenceField(product_types, ProductTypeSerializer, source='product_type_id')
+    status = ReferenceField(statuses, StatusSerializer, source='status_id')
     published = serializers.BooleanField(read_only=True)
     related_users = serializers.SerializerMethodField()
     country_settings = ProductCountrySerializer(many=True, required=False)
+    area = serializers.CharField(source='area.name', read_only=True)
+    area_code = serializers.IntegerField(source='area_id', required=False)
+    family = serializers.CharField(source='family.name', read_only=True)
+    family_code = serializers.IntegerField(source='family_id', required=False)
+    subfamily = serializers.CharField(source='subfamily.name', read_only=True)
+    subfamily_code = serializers.IntegerField(source='subfamily_id', required=False)
 
     class Meta:
         model = Product
         fields = [
             'id', 'sku', 'name', 'product_type', 'status', 'published',
             'description', 'short_description', 'specifications',
-            'applications', 'brand', 'area', 'family', 'subfamily', 'url', 'created_at',
+            'applications', 'brand', 'area', 'area_code', 'family', 'family_code',
+            'subfamily', 'subfamily_code', 'url', 'created_at',
             'related_users', 'country_settings'
         ]
+        list_serializer_class = ProductListSerializer
 
     def get_related_users(self, obj):
-        subfamily_id_to_filter = obj.subfamily_code
+        subfamily_id_to_filter = obj.subfamily_id
         if not isinstance(subfamily_id_to_filter, (int, float)):
             return []
 
-        matching_assignments = UserFamilyAssignment.objects.filter(
-            subfamily_id=subfamily_id_to_filter
-        )
+        related_users = self.context.get('related_users_by_subfamily')
+        if related_users is None:
+            related_users = get_related_users_by_subfamily([subfamily_id_to_filter])
+
+        return related_users.get(subfamily_id_to_filter, [])
+
+    def validate(self, attrs):
+        codes = {name: attrs[name] for name in ('area_id', 'family_id', 'subfamily_id') if name in attrs}
+        if codes:
+            attrs.update(self.resolve_taxonomy(codes))
+        return attrs
+
+    def resolve_taxonomy(self, codes):
+        """
+        Valida un cambio de taxonomía por códigos. La subfamilia (la indicada
+        o la actual) debe existir, y el área y la familia indicadas deben ser
+        las suyas; las omitidas se toman de la subfamilia. Un usuario que no
+        es administrador solo puede mover el producto a una subfamilia que
+        tenga asignada.
+        """
+        subfamily_id = codes.get('subfamily_id', getattr(self.instance, 'subfamily_id', None))
+        subfamily = Subfamily.objects.select_related('family').filter(pk=subfamily_id).first()
+        if subfamily is None:
+            raise serializers.ValidationError({'subfamily_code': f"La subfamilia {subfamily_id} no existe."})
 
-        users = AppUser.objects.filter(
-            family_assignments__in=matching_assignments,
-            is_active=True
-        ).exclude(
-            role__code='administrator'
-        ).distinct()
+        resolved = {'area_id': subfamily.family.area_id, 'family_id': subfamily.family_id, 'subfamily_id': subfamily.pk}
+        for name, field, label in (('family_id', 'family_code', 'familia'), ('area_id', 'area_code', 'área')):
+            if name in codes and codes[name] != resolved[name]:
+                raise serializers.ValidationError({
+                    field: f"La subfamilia {subfamily.pk} no pertenece a la {label} {codes[name]}."
+                })
 
-        return EmailAppUserSerializer(users, many=True).data
+        request = self.context.get('request')
+        if (
+            request is not None
+            and subfamily.pk != getattr(self.instance, 'subfamily_id', None)
+            and get_user_role_code(request.user) != 'administrator'
+            and subfamily.pk not in get_user_subfamily_ids(request.user)
+        ):
+            raise serializers.ValidationError({'subfamily_code': f"No tienes asignada la subfamilia {subfamily.pk}."})
+        return resolved
+
+    def validate_country_settings(self, value):
+        skus = {sku for setting_data in value for field in RELATION_FIELDS for sku in setting_data.get(field, [])}
+        self.relation_targets = resolve_skus(skus)
+        missing = sorted(skus - set(self.relation_targets))
+        if missing:
+            raise serializers.ValidationError(f"No existen productos con SKU: {', '.join(missing)}.")
+        return value
 
     def update(self, instance, validated_data):
         country_settings_data = validated_data.pop('country_settings', None)
+        sku_changed = 'sku' in validated_data and validated_data['sku'] != instance.sku
+
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+
+            if country_settings_data is not None:
+                self.upsert_country_settings(instance, country_settings_data)
+
+            # El guardado ya quedó en el registro de cambios y en el índice (ver `core.signals`).
+            if sku_changed:
+                # Los productos que lo referencian muestran su SKU en `related`/`substitute`.
+                touch_products(get_referencing_product_ids([instance.pk]))
+
+        return instance
 
-        instance = super().update(instance, validated_data)
+    def upsert_country_settings(self, instance, country_settings_data):
+        """
+        Escribe las configuraciones por país como un único upsert en bloque
+        (sobre `(product, country_code)`) más un único DELETE de los países
+        que ya no vienen en el payload.
 
-        if country_settings_data is not None:
-            existing_settings = {setting.country_code: setting for setting in instance.country_settings.all()}
-            
-            incoming_country_codes = set()
+        Los campos omitidos en un país existente conservan su valor actual,
+        igual que con una actualización parcial. Las listas `related` y
+        `substitute` que cambian se reescriben en bloque en `ProductRelation`.
+        """
+        existing_settings = {setting.country_code: setting for setting in instance.country_settings.all()}
+        update_fields = [
+            field for field in ProductCountrySerializer.Meta.fields
+            if field != 'country_code' and field not in RELATION_FIELDS
+        ]
+        update_fields.append('updated_at')
 
-            for setting_data in country_settings_data:
-                country_code = setting_data.get('country_code')
+        incoming = {}
+        relations = {}
+        for setting_data in country_settings_data:
+            country_code = setting_data.get('country_code')
+            if not country_code:
+                continue
 
-                if not country_code:
+            setting_data = dict(setting_data)
+            setting_instance = existing_settings.get(country_code)
+            for field, relation_type in RELATION_FIELDS.items():
+                if field not in setting_data:
                     continue
-                
-                incoming_country_codes.add(country_code)
-
-                setting_instance = existing_settings.get(country_code)
-
-                if setting_instance:
-                    nested_serializer = ProductCountrySerializer(
-                        instance=setting_instance,
-                        data=setting_data,
-                        partial=True
-                    )
-                    nested_serializer.is_valid(raise_exception=True)
-                    nested_serializer.save()
-                else:
-                    ProductCountry.objects.create(product=instance, **setting_data)
-
-            for country_code, setting_instance in existing_settings.items():
-                if country_code not in incoming_country_codes:
-                    setting_instance.delete()
-
-        return instance
\ No newline at end of file
+                skus = setting_data.pop(field)
+                current = setting_instance.get_relation_skus(relation_type) if setting_instance else []
+                if skus != current:
+                    relations[country_code, relation_type] = skus
+            if setting_instance:
+                values = {field: getattr(setting_instance, field) for field in update_fields if field != 'updated_at'}
+            else:
+                values = {}
+            values.update(setting_data)
+            incoming[country_code] = ProductCountry(product=instance, **values)
+
+        instance.country_settings.exclude(country_code__in=list(incoming)).delete()
+
+        if incoming:
+            upsert_kwargs = {'update_conflicts': True, 'update_fields': update_fields}
+            if connection.features.supports_update_conflicts_with_target:
+                upsert_kwargs['unique_fields'] = ['product', 'country_code']
+            ProductCountry.objects.bulk_create(list(incoming.values()), **upsert_kwargs)
+
+        if relations:
+            setting_ids = dict(
+                instance.country_settings.filter(country_code__in={code for code, _ in relations})
+                .values_list('country_code', 'id')
+            )
+            replace_relations(
+                {(setting_ids[code], relation_type): skus for (code, relation_type), skus in relations.items()},
+                self.relation_targets,
+            )
+
+
+def parse_field_list(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+class ProductListItemSerializer(ProductSerializer):
+    """
+    Proyección liviana de producto para listados.
+
+    Por defecto entrega solo las columnas de la grilla (`default_fields`). Con
+    `?fields=a,b` se eligen exactamente los campos a incluir, entre todos los
+    de `ProductSerializer`, y con `?omit=a,b` se excluyen campos. `related_users`
+    y `country_settings` solo se calculan si se piden explícitamente.
+    `optimize_queryset` ajusta la consulta a los campos seleccionados.
+    """
+    default_fields = [
+        'id', 'sku', 'name', 'product_type', 'status', 'published', 'brand',
+        'area', 'area_code', 'family', 'family_code', 'subfamily', 'subfamily_code', 'created_at',
+    ]
+    # Columnas que necesita cada campo; por defecto, la columna del mismo nombre.
+    field_columns = {
+        'area': ['area__name'],
+        'area_code': ['area'],
+        'family': ['family__name'],
+        'family_code': ['family'],
+        'subfamily': ['subfamily__name'],
+        'subfamily_code': ['subfamily'],
+        'related_users': ['subfamily'],
+        'country_settings': [],
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        selected = self.get_selected_fields(request.query_params if request else {})
+        for field_name in set(self.fields) - set(selected):
+            self.fields.pop(field_name)
+
+    @classmethod
+    def get_selected_fields(cls, query_params):
+        """
+        Retorna los campos a serializar según `fields`/`omit`. Lanza
+        `ValidationError` si se pide un campo inexistente.
+        """
+        available = cls.Meta.fields
+        fields = parse_field_list(query_params.get('fields'))
+        omit = parse_field_list(query_params.get('omit'))
+        unknown = [name for name in fields + omit if name not in available]
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Campos desconocidos: {', '.join(unknown)}"})
+
+        selected = [name for name in available if name in fields] if fields else cls.default_fields
+        return [name for name in selected if name not in omit]
+
+    @classmethod
+    def optimize_queryset(cls, queryset, selected_fields):
+        """
+        Limita el queryset a las columnas de los campos seleccionados (`only`)
+        y agrega los JOIN y precargas solo si se necesitan.
+        """
+        columns = {'id'}
+        for name in selected_fields:
+            columns.update(cls.field_columns.get(name, [name]))
+        queryset = queryset.only(*columns)
+
+        related = [level for level in ('area', 'family', 'subfamily') if f'{level}__name' in columns]
+        if related:
+            queryset = queryset.select_related(*related)
+        if 'country_settings' in selected_fields:
+            queryset = queryset.prefetch_related('country_settings', relations_prefetch())
+        return queryset
+
+class ApprovalRequesterSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='requested_by_id')
+    email = serializers.CharField(source='requested_by_email')
+    full_name = serializers.CharField(source='requested_by_name')
+
+class ApprovalQueueItemSerializer(serializers.ModelSerializer):
+    """
+    Producto de la cola de aprobación con su última solicitud. Espera las
+    anotaciones `requested_*` de `core.approvals.get_approval_queue`.
+    """
+    status = ReferenceField(statuses, StatusSerializer, source='status_id')
+    area = serializers.CharField(source='area.name', read_only=True)
+    area_code = serializers.IntegerField(source='area_id', read_only=True)
+    family = serializers.CharField(source='family.name', read_only=True)
+    family_code = serializers.IntegerField(source='family_id', read_only=True)
+    subfamily = serializers.CharField(source='subfamily.name', read_only=True)
+    subfamily_code = serializers.IntegerField(source='subfamily_id', read_only=True)
+    requested_at = serializers.DateTimeField(read_only=True)
+    requested_by = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'sku', 'name', 'brand', 'status', 'area', 'area_code', 'family', 'family_code',
+            'subfamily', 'subfamily_code', 'created_at', 'requested_at', 'requested_by',
+        ]
+
+    def get_requested_by(self, obj):
+        if obj.requested_by_id is None:
+            return None
+        return ApprovalRequesterSerializer(obj).data
+
+class ProductImportSerializer(serializers.ModelSerializer):
+    """
+    Valida una fila de importación masiva con las mismas reglas de campo que
+    `ProductSerializer`, sin consultar la base de datos: `product_type` y
+    `status` se resuelven por código contra los mapas recibidos en el
+    contexto (`product_types`, `statuses`), y la unicidad de `sku` la resuelve
+    el upsert. La taxonomía llega como códigos y nombres (`area_code`,
+    `area`, ...); el importador valida la jerarquía y crea los nodos que falten.
+    """
+    product_type = serializers.CharField()
+    status = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    area = serializers.CharField(max_length=100, required=False, allow_null=True, allow_blank=True)
+    area_code = serializers.IntegerField()
+    family = serializers.CharField(max_length=100, required=False, allow_null=True, allow_blank=True)
+    family_code = serializers.IntegerField()
+    subfamily = serializers.CharField(max_length=100, required=False, allow_null=True, allow_blank=True)
+    subfamily_code = serializers.IntegerField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'sku', 'name', 'product_type', 'status',
+            'description', 'short_description', 'specifications', 'applications',
+            'brand', 'area', 'area_code', 'family', 'family_code', 'subfamily', 'subfamily_code', 'url',
+        ]
+        extra_kwargs = {'sku': {'validators': []}}
+
+    def validate_product_type(self, value):
+        product_type = self.context['product_types'].get(value)
+        if product_type is None:
+            raise serializers.ValidationError(f"El tipo de producto con código '{value}' no existe.")
+        return product_type
+
+    def validate_status(self, value):
+        if not value:
+            return None
+        status = self.context['statuses'].get(value)
+        if status is None:
+            raise serializers.ValidationError(f"El estado con código '{value}' no existe.")
+        return status
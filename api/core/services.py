@@ -0,0 +1,86 @@
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .acl import invalidate_user_subfamilies
+from .conditional import bump_users_version
+from .models import Subfamily, UserFamilyAssignment
+
+
+def clean_family_assignments(assignments_data):
+    """
+    Valida una lista de asignaciones `{area_id, family_id, subfamily_id}`.
+
+    Retorna un diccionario `{subfamily_id: (area_id, family_id)}`; si una
+    subfamilia se repite, prevalece la última. Lanza `ValidationError` si el
+    payload no es una lista, si falta algún campo, si la subfamilia no existe
+    o si el área/familia indicadas no corresponden a su jerarquía.
+    """
+    if not isinstance(assignments_data, list):
+        raise ValidationError({"detail": "Se esperaba una lista de asignaciones"})
+
+    cleaned = {}
+    for item in assignments_data:
+        if not isinstance(item, dict):
+            raise ValidationError({"detail": "Cada asignación debe ser un objeto."})
+        area_id = item.get('area_id')
+        family_id = item.get('family_id')
+        subfamily_id = item.get('subfamily_id')
+        if not all([area_id, family_id, subfamily_id]):
+            raise ValidationError({"detail": "Faltan campos requeridos en una asignación."})
+        try:
+            cleaned[int(subfamily_id)] = (int(area_id), int(family_id))
+        except (TypeError, ValueError):
+            raise ValidationError({"detail": "Los identificadores de una asignación deben ser numéricos."})
+
+    subfamilies = Subfamily.objects.select_related('family').in_bulk(list(cleaned))
+    missing = sorted(set(cleaned) - set(subfamilies))
+    if missing:
+        raise ValidationError({"detail": f"Subfamilias inexistentes: {', '.join(map(str, missing))}"})
+    for subfamily_id, (area_id, family_id) in cleaned.items():
+        subfamily = subfamilies[subfamily_id]
+        if (subfamily.family.area_id, subfamily.family_id) != (area_id, family_id):
+            raise ValidationError({
+                "detail": f"La subfamilia {subfamily_id} no pertenece al área/familia indicada."
+            })
+    return cleaned
+
+
+def replace_family_assignments(user, cleaned_assignments):
+    """
+    Reemplaza las asignaciones de un usuario aplicando solo la diferencia:
+    elimina en bloque las subfamilias ausentes, crea en bloque las nuevas y
+    actualiza área/familia de las existentes solo si cambiaron. Las filas sin
+    cambios conservan su ID.
+
+    Debe llamarse dentro de una transacción. Retorna la lista final de
+    asignaciones del usuario.
+    """
+    existing = {a.subfamily_id: a for a in UserFamilyAssignment.objects.filter(user=user)}
+
+    to_create = []
+    to_update = []
+    for subfamily_id, (area_id, family_id) in cleaned_assignments.items():
+        assignment = existing.get(subfamily_id)
+        if assignment is None:
+            to_create.append(UserFamilyAssignment(
+                user=user, area_id=area_id, family_id=family_id, subfamily_id=subfamily_id
+            ))
+        elif (assignment.area_id, assignment.family_id) != (area_id, family_id):
+            assignment.area_id = area_id
+            assignment.family_id = family_id
+            to_update.append(assignment)
+
+    removed = [a.pk for subfamily_id, a in existing.items() if subfamily_id not in cleaned_assignments]
+
+    if removed:
+        UserFamilyAssignment.objects.filter(pk__in=removed).delete()
+    if to_update:
+        UserFamilyAssignment.objects.bulk_update(to_update, ['area_id', 'family_id'])
+    if to_create:
+        UserFamilyAssignment.objects.bulk_create(to_create)
+
+    if removed or to_update or to_create:
+        transaction.on_commit(lambda: invalidate_user_subfamilies(user.pk))
+        transaction.on_commit(bump_users_version)
+
+    return list(UserFamilyAssignment.objects.filter(user=user).order_by('id'))
@@ -1,6 +1,18 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete, pre_delete
+from django.db import transaction
 from django.dispatch import receiver
-from .models import ProductType, Status
+from .models import Product, ProductType, Status, UserFamilyAssignment, Area, Family, Subfamily, ProductCountry, ProductVideo
+from .acl import invalidate_user_subfamilies
+from .changes import record_deleted_products, record_product_changes, products_changed, products_deleted, touch_products
+from .search import get_search_backend
+from .relations import get_referencing_product_ids
+from .autocomplete import sku_index
+from .taxonomy import adjust_product_counts, bump_taxonomy_names_version
+from .approvals import adjust_pending_approval_counts, pending_approval_key
+from .reference import product_types, statuses
+from .conditional import bump_users_version, get_product_revision
+from .response_cache import get_product_detail_cache
+from authapp.models import AppUser
 
 @receiver(post_migrate)
 def insert_initial_values(sender, **kwargs):
@@ -21,4 +33,104 @@ def insert_initial_values(sender, **kwargs):
             ("deactivated", "Desactivado"),
         ]
         for code, name in estados:
-            Status.objects.get_or_create(code=code, defaults={'name': name})
\ No newline at end of file
+            Status.objects.get_or_create(code=code, defaults={'name': name})
+
+@receiver(post_save, sender=ProductType)
+@receiver(post_delete, sender=ProductType)
+def invalidate_product_types(sender, **kwargs):
+    product_types.invalidate()
+
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+def invalidate_statuses(sender, **kwargs):
+    statuses.invalidate()
+
+@receiver(post_save, sender=UserFamilyAssignment)
+@receiver(post_delete, sender=UserFamilyAssignment)
+def invalidate_user_acl(sender, instance, **kwargs):
+    invalidate_user_subfamilies(instance.user_id)
+    transaction.on_commit(bump_users_version)
+
+@receiver(post_save, sender=AppUser)
+@receiver(post_delete, sender=AppUser)
+def invalidate_embedded_users(sender, **kwargs):
+    transaction.on_commit(bump_users_version)
+
+@receiver(pre_delete, sender=Product)
+def touch_referencing_products(sender, instance, **kwargs):
+    # Al eliminarse deja de aparecer en `related`/`substitute` de los productos que lo referencian.
+    touch_products(get_referencing_product_ids([instance.pk]))
+
+@receiver(post_delete, sender=Product)
+def record_product_deletion(sender, instance, **kwargs):
+    record_deleted_products([instance])
+    # Product.delete deja en `_loaded_*` la taxonomía y el estado guardados (None si la fila ya no existía).
+    stored_key = getattr(instance, '_loaded_taxonomy', instance.taxonomy_key)
+    if stored_key is not None:
+        stored_status_id = getattr(instance, '_loaded_status_id', instance.status_id)
+        adjust_product_counts({stored_key: -1})
+        adjust_pending_approval_counts({pending_approval_key(stored_status_id, stored_key): -1})
+
+@receiver(post_save, sender=Product)
+def record_product_change(sender, instance, **kwargs):
+    # Cualquier guardado (API, admin, shell) queda en el feed de cambios. Product.save no escribe
+    # `revision`, así que el valor en memoria se relee del UPDATE que la incrementó.
+    record_product_changes([instance.pk])
+    instance.revision = get_product_revision(instance.pk)
+
+@receiver(post_save, sender=Product)
+def update_taxonomy_counts(sender, instance, created, **kwargs):
+    new_key = instance.taxonomy_key
+    old_key = None if created else getattr(instance, '_loaded_taxonomy', new_key)
+    if old_key != new_key:
+        deltas = {new_key: 1}
+        if old_key is not None:
+            deltas[old_key] = -1
+        adjust_product_counts(deltas)
+
+    # Los pendientes de aprobación cambian con el estado y también al mover el producto de área o familia.
+    new_status_id = instance.__dict__.get('status_id')
+    old_status_id = None if created else getattr(instance, '_loaded_status_id', new_status_id)
+    new_pending = pending_approval_key(new_status_id, new_key)
+    old_pending = None if created else pending_approval_key(old_status_id, old_key)
+    if old_pending != new_pending:
+        adjust_pending_approval_counts({new_pending: 1, old_pending: -1})
+
+    instance._loaded_taxonomy = new_key
+    instance._loaded_status_id = new_status_id
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_detail(sender, instance, **kwargs):
+    get_product_detail_cache().invalidate(instance.pk)
+
+# Sin post_delete: un receptor de borrado obliga a Django a leer cada fila antes de los DELETE en bloque.
+# Los borrados pasan por touch_products, que cambia el ETag y deja obsoleta la entrada en caché.
+@receiver(post_save, sender=ProductCountry)
+@receiver(post_save, sender=ProductVideo)
+def invalidate_parent_product_detail(sender, instance, **kwargs):
+    get_product_detail_cache().invalidate(instance.product_id)
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, **kwargs):
+    # Los borrados se retiran del índice vía `products_deleted` (ver record_product_deletion).
+    products_changed.send(sender=Product, product_ids=[instance.pk])
+
+@receiver(products_changed)
+def index_changed_products(sender, product_ids, **kwargs):
+    get_search_backend().index_products(product_ids)
+    sku_index.refresh(product_ids)
+
+@receiver(products_deleted)
+def unindex_deleted_products(sender, product_ids, **kwargs):
+    get_search_backend().remove_products(product_ids)
+    sku_index.refresh(product_ids)
+
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+@receiver(post_save, sender=Family)
+@receiver(post_delete, sender=Family)
+@receiver(post_save, sender=Subfamily)
+@receiver(post_delete, sender=Subfamily)
+def invalidate_taxonomy_tree(sender, **kwargs):
+    transaction.on_commit(bump_taxonomy_names_version)
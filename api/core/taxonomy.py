@@ -0,0 +1,140 @@
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .conditional import bump_version_token, get_version_token
+from .models import Area, Family, Subfamily
+from .search import tokenize
+
+TAXONOMY_VERSION_KEY = 'core:taxonomy:version'
+TAXONOMY_NAMES_VERSION_KEY = 'core:taxonomy:names:version'
+TAXONOMY_TREE_KEY = 'core:taxonomy:tree'
+
+
+def get_taxonomy_version():
+    """
+    Versión del árbol de taxonomía completo, incluidos los conteos de
+    productos: cambia con cada producto creado, eliminado o movido.
+    """
+    return get_version_token(TAXONOMY_VERSION_KEY)
+
+
+def bump_taxonomy_version():
+    bump_version_token(TAXONOMY_VERSION_KEY)
+
+
+def get_taxonomy_names_version():
+    """
+    Versión de los nodos de taxonomía (nombres y jerarquía), sin los conteos.
+    Es la que corresponde a las respuestas de productos, que muestran los
+    nombres del área, familia y subfamilia pero no los conteos.
+    """
+    return get_version_token(TAXONOMY_NAMES_VERSION_KEY)
+
+
+def bump_taxonomy_names_version():
+    bump_version_token(TAXONOMY_NAMES_VERSION_KEY)
+    bump_taxonomy_version()
+
+
+def build_taxonomy_tree():
+    """
+    Arma el árbol área → familia → subfamilia con los conteos de productos
+    de cada nodo. Usa una consulta por nivel.
+    """
+    subfamilies_by_family = {}
+    for subfamily in Subfamily.objects.order_by('name', 'id'):
+        subfamilies_by_family.setdefault(subfamily.family_id, []).append({
+            'id': subfamily.id,
+            'name': subfamily.name,
+            'product_count': subfamily.product_count,
+        })
+
+    families_by_area = {}
+    for family in Family.objects.order_by('name', 'id'):
+        families_by_area.setdefault(family.area_id, []).append({
+            'id': family.id,
+            'name': family.name,
+            'product_count': family.product_count,
+            'subfamilies': subfamilies_by_family.get(family.id, []),
+        })
+
+    return [
+        {
+            'id': area.id,
+            'name': area.name,
+            'product_count': area.product_count,
+            'families': families_by_area.get(area.id, []),
+        }
+        for area in Area.objects.order_by('name', 'id')
+    ]
+
+
+def get_taxonomy_tree():
+    """
+    Retorna `(version, árbol)` desde la caché, construyéndolo si la versión
+    actual aún no está almacenada. Se guarda un único árbol junto a la versión
+    con que se construyó, de modo que cada cambio reemplaza la entrada
+    anterior en lugar de dejarla huérfana.
+    """
+    version = get_taxonomy_version()
+    cached = cache.get(TAXONOMY_TREE_KEY)
+    if cached is not None and cached[0] == version:
+        return cached
+    tree = build_taxonomy_tree()
+    cache.set(TAXONOMY_TREE_KEY, (version, tree), None)
+    return version, tree
+
+
+def search_taxonomy(query):
+    """
+    Busca la consulta en los nombres de área, familia y subfamilia con las
+    reglas de core.search: cada palabra por prefijo, sin distinguir
+    mayúsculas ni acentos. Recorre el árbol en caché y retorna
+    `(area_ids, family_ids, subfamily_ids)` de los nodos que coinciden.
+    """
+    query_tokens = tokenize(query)
+    matches = ([], [], [])
+    if not query_tokens:
+        return matches
+
+    def name_matches(name):
+        name_tokens = tokenize(name)
+        return all(any(token.startswith(query_token) for token in name_tokens) for query_token in query_tokens)
+
+    for area in get_taxonomy_tree()[1]:
+        if name_matches(area['name']):
+            matches[0].append(area['id'])
+        for family in area['families']:
+            if name_matches(family['name']):
+                matches[1].append(family['id'])
+            matches[2].extend(subfamily['id'] for subfamily in family['subfamilies'] if name_matches(subfamily['name']))
+    return matches
+
+
+def adjust_product_counts(deltas):
+    """
+    Aplica variaciones de conteo de productos por nodo. `deltas` es un
+    mapeo `{(area_id, family_id, subfamily_id): variación}`; cada nodo
+    afectado recibe un único `UPDATE ... SET product_count = product_count + n`.
+    """
+    area_deltas, family_deltas, subfamily_deltas = Counter(), Counter(), Counter()
+    for (area_id, family_id, subfamily_id), delta in deltas.items():
+        if area_id is not None:
+            area_deltas[area_id] += delta
+        if family_id is not None:
+            family_deltas[family_id] += delta
+        if subfamily_id is not None:
+            subfamily_deltas[subfamily_id] += delta
+
+    changed = False
+    for model, node_deltas in ((Area, area_deltas), (Family, family_deltas), (Subfamily, subfamily_deltas)):
+        for node_id, delta in node_deltas.items():
+            if delta:
+                model.objects.filter(pk=node_id).update(product_count=F('product_count') + delta)
+                changed = True
+
+    if changed:
+        transaction.on_commit(bump_taxonomy_version)
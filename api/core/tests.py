@@ -1,3 +1,846 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from authapp.models import AppUser, AppUserRole
+from .models import Area, Family, Subfamily, Product, ProductChange, ProductCountry, ProductType, ProductVideo, ProductWorkflow, Status, UserFamilyAssignment
+from .changes import touch_products
+from .relations import RELATION_FIELDS
+from .response_cache import DETAIL_CACHE_KEY, get_product_detail_cache
+from .serializers import ProductListItemSerializer
+from .reference import product_types, statuses
+
+ROLES = ('administrator', 'product_manager', 'default_user')
+PRODUCT_TYPES = ('simple', 'configurable', 'virtual')
+STATUSES = ('draft', 'editing', 'pending_approval', 'published', 'deactivated')
+
+
+class ProductTestCase(TestCase):
+    """
+    Datos mínimos para las pruebas de la API de productos: roles, tipos,
+    estados, una taxonomía de dos familias y usuarios de cada rol.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for code in ROLES:
+            AppUserRole.objects.get_or_create(code=code, defaults={'name': code})
+        for code in PRODUCT_TYPES:
+            ProductType.objects.get_or_create(code=code, defaults={'name': code})
+        for code in STATUSES:
+            Status.objects.get_or_create(code=code, defaults={'name': code})
+
+        cls.area = Area.objects.create(id=1, name='Herramientas')
+        cls.family = Family.objects.create(id=10, area=cls.area, name='Manuales')
+        cls.other_family = Family.objects.create(id=11, area=cls.area, name='Eléctricas')
+        cls.subfamily = Subfamily.objects.create(id=100, family=cls.family, name='Martillos')
+        cls.other_subfamily = Subfamily.objects.create(id=110, family=cls.other_family, name='Taladros')
+
+        cls.admin = cls.create_user('admin', 'administrator')
+        cls.manager = cls.create_user('manager', 'product_manager')
+        cls.viewer = cls.create_user('viewer', 'default_user')
+        UserFamilyAssignment.objects.create(
+            user=cls.manager, area=cls.area, family=cls.family, subfamily=cls.subfamily
+        )
+
+    def setUp(self):
+        # La caché y los registros en memoria sobreviven entre pruebas; las tablas se revierten.
+        cache.clear()
+        product_types.invalidate()
+        statuses.invalidate()
+        self.client = APIClient()
+
+    @classmethod
+    def create_user(cls, name, role_code):
+        return AppUser.objects.create(
+            google_id=name, email=f'{name}@example.com', firstname=name, lastname=name,
+            full_name=name.title(), picture='', role=AppUserRole.objects.get(code=role_code),
+        )
+
+    def create_product(self, sku, status='draft', subfamily=None, **kwargs):
+        subfamily = subfamily or self.subfamily
+        return Product.objects.create(
+            sku=sku, name=kwargs.pop('name', f'Producto {sku}'),
+            product_type=ProductType.objects.get(code='simple'), status=Status.objects.get(code=status),
+            area_id=subfamily.family.area_id, family_id=subfamily.family_id, subfamily=subfamily, **kwargs
+        )
+
+    def authenticate(self, user):
+        self.client.force_authenticate(user=user)
+
+
+class ProductListTests(ProductTestCase):
+
+    def list_skus(self, **params):
+        response = self.client.get('/v1/products/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['sku'] for item in response.data['results']]
+
+    def test_cursor_pagination_walks_every_product_once(self):
+        for i in range(5):
+            self.create_product(f'SKU-{i}')
+        self.authenticate(self.viewer)
+
+        skus, url = [], '/v1/products/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            skus.extend(item['sku'] for item in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(skus, [f'SKU-{i}' for i in reversed(range(5))])
+
+    def test_ordering_by_sku_keeps_id_tiebreaker(self):
+        for sku in ('B', 'C', 'A'):
+            self.create_product(sku)
+        self.authenticate(self.viewer)
+
+        self.assertEqual(self.list_skus(ordering='sku'), ['A', 'B', 'C'])
+        self.assertEqual(self.list_skus(ordering='-sku', page_size=2), ['C', 'B'])
+
+    def test_filters(self):
+        self.create_product('DRAFT', brand='Acme')
+        self.create_product('PUBLISHED', status='published', published=True, brand='Otra')
+        self.create_product('OTHER', subfamily=self.other_subfamily, brand='acme')
+        self.authenticate(self.manager)
+
+        self.assertEqual(self.list_skus(status='draft,published'), ['OTHER', 'PUBLISHED', 'DRAFT'])
+        self.assertEqual(self.list_skus(published='true'), ['PUBLISHED'])
+        self.assertEqual(self.list_skus(subfamily_code='110'), ['OTHER'])
+        self.assertEqual(self.list_skus(family_code='10,99'), ['PUBLISHED', 'DRAFT'])
+        self.assertEqual(self.list_skus(brand='ACME'), ['OTHER', 'DRAFT'])
+        self.assertEqual(self.list_skus(editable='true'), ['PUBLISHED', 'DRAFT'])
+
+    def test_search_matches_taxonomy_names(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_product('HAMMER', name='Mazo de goma')
+            self.create_product('DRILL', subfamily=self.other_subfamily, name='Taladro percutor')
+            self.create_product('MIXED', subfamily=self.other_subfamily, name='Martillo percutor')
+        self.authenticate(self.viewer)
+
+        self.assertEqual(self.list_skus(search='Martillos'), ['HAMMER'])
+        self.assertEqual(self.list_skus(search='martillo'), ['MIXED', 'HAMMER'])
+        self.assertEqual(self.list_skus(search='electricas'), ['MIXED', 'DRILL'])
+        self.assertEqual(self.list_skus(search='herram'), ['MIXED', 'DRILL', 'HAMMER'])
+        self.assertEqual(self.list_skus(search='goma'), ['HAMMER'])
+        self.assertEqual(self.list_skus(search='martillos', subfamily_code='110'), [])
+
+
+class ProductListFieldsTests(ProductTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            self.create_product(f'SKU-{index}', description='Texto largo')
+        self.authenticate(self.viewer)
+
+    def list_items(self, **params):
+        response = self.client.get('/v1/products/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_fields_and_omit_select_keys(self):
+        self.assertEqual([set(item) for item in self.list_items(fields='sku,name')], [{'sku', 'name'}] * 3)
+        self.assertEqual(
+            set(self.list_items(omit='brand,created_at')[0]),
+            set(ProductListItemSerializer.default_fields) - {'brand', 'created_at'},
+        )
+        item = self.list_items(fields='sku,related_users,description', omit='description')[0]
+        self.assertEqual(set(item), {'sku', 'related_users'})
+        self.assertEqual([user['email'] for user in item['related_users']], ['manager@example.com'])
+
+    def test_taxonomy_names_only_join_their_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            items = self.list_items(fields='sku,subfamily')
+
+        self.assertEqual(items[0], {'sku': 'SKU-2', 'subfamily': 'Martillos'})
+        product_queries = [query['sql'] for query in queries if 'FROM "core_product"' in query['sql']]
+        self.assertEqual(len(product_queries), 1, product_queries)
+        self.assertIn('"core_subfamily"."name"', product_queries[0])
+        for absent in ('"core_area"', '"core_family"', '"description"', '"core_status"'):
+            self.assertNotIn(absent, product_queries[0])
+        self.assertFalse([query for query in queries if 'FROM "core_subfamily"' in query['sql']])
+
+    def test_unknown_fields_are_rejected(self):
+        for params in ({'fields': 'sku,nope'}, {'omit': 'nope'}):
+            response = self.client.get('/v1/products/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('nope', str(response.data))
+
+
+class ProductStatusTransitionTests(ProductTestCase):
+
+    def test_admin_unpublishes_product(self):
+        product = self.create_product('SKU-1', status='published', published=True)
+        self.authenticate(self.admin)
+
+        response = self.client.patch(f'/v1/products/{product.pk}/status/update/', {'published': False}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['published'])
+        product.refresh_from_db()
+        self.assertFalse(product.published)
+
+    def test_bulk_unpublish_reports_new_flag(self):
+        products = [self.create_product(f'SKU-{i}', status='published', published=True) for i in range(3)]
+        self.authenticate(self.admin)
+
+        response = self.client.post(
+            '/v1/products/status/bulk-update/', {'skus': [p.sku for p in products], 'published': False}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual({item['published'] for item in response.data['results']}, {False})
+        self.assertFalse(Product.objects.filter(published=True).exists())
+
+    def test_bulk_rejects_non_object_body(self):
+        self.authenticate(self.admin)
+        for body in (['SKU-1'], 5):
+            response = self.client.post('/v1/products/status/bulk-update/', body, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_manager_requests_approval_but_cannot_publish(self):
+        product = self.create_product('SKU-1')
+        self.authenticate(self.manager)
+        url = f'/v1/products/{product.pk}/status/update/'
+
+        self.assertEqual(self.client.patch(url, {'published': True}, format='json').status_code, 403)
+        response = self.client.patch(url, {'status_code': 'pending_approval'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ProductWorkflow.objects.get(product=product).new_status.code, 'pending_approval')
+        self.assertEqual(self.client.patch(url, {'status_code': 'published'}, format='json').status_code, 403)
+
+        self.authenticate(self.admin)
+        self.assertEqual(self.client.get('/v1/approvals/counts/').data['total'], 1)
+
+    def test_admin_rejection_returns_product_to_editing(self):
+        product = self.create_product('SKU-1', status='pending_approval')
+        self.authenticate(self.manager)
+        url = f'/v1/products/{product.pk}/status/update/'
+        self.assertEqual(self.client.patch(url, {'status_code': 'editing'}, format='json').status_code, 403)
+
+        self.authenticate(self.admin)
+        response = self.client.patch(url, {'status_code': 'editing', 'message': 'Falta la ficha'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ProductWorkflow.objects.get(product=product).message, 'Falta la ficha')
+
+    def test_bulk_reports_per_sku_errors(self):
+        own = self.create_product('OWN')
+        self.create_product('OTHER', subfamily=self.other_subfamily)
+        self.authenticate(self.manager)
+
+        response = self.client.post(
+            '/v1/products/status/bulk-update/',
+            {'skus': ['OWN', 'OTHER', 'MISSING'], 'status_code': 'pending_approval'}, format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['updated'], response.data['failed']), (1, 2))
+        self.assertEqual(
+            [(item['sku'], item['updated'], item['status_code']) for item in response.data['results']],
+            [('OWN', True, 'pending_approval'), ('OTHER', False, 'draft'), ('MISSING', False, None)],
+        )
+        own.refresh_from_db()
+        self.assertEqual(own.revision, 2)
+
+
+class ProductVideoReplaceTests(ProductTestCase):
+
+    def test_put_applies_diff(self):
+        product = self.create_product('SKU-1')
+        kept = ProductVideo.objects.create(product=product, youtube_url='https://youtu.be/a', order=0)
+        ProductVideo.objects.create(product=product, youtube_url='https://youtu.be/b', order=1)
+        self.authenticate(self.manager)
+
+        response = self.client.put(
+            f'/v1/products/{product.pk}/videos/',
+            [{'youtube_url': 'https://youtu.be/c'}, {'youtube_url': 'https://youtu.be/a'}], format='json',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([video['youtube_url'] for video in response.data], ['https://youtu.be/c', 'https://youtu.be/a'])
+        self.assertEqual(response.data[1]['id'], kept.pk)
+        self.assertFalse(ProductVideo.objects.filter(youtube_url='https://youtu.be/b').exists())
+        product.refresh_from_db()
+        self.assertEqual(product.revision, 2)
+
+    def test_put_rejects_duplicates(self):
+        product = self.create_product('SKU-1')
+        self.authenticate(self.manager)
+        videos = [{'youtube_url': 'https://youtu.be/a'}] * 2
+        response = self.client.put(f'/v1/products/{product.pk}/videos/', videos, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class FamilyAssignmentTests(ProductTestCase):
+
+    def test_bulk_apply_diff(self):
+        kept = UserFamilyAssignment.objects.get(user=self.manager)
+        self.authenticate(self.admin)
+
+        response = self.client.put('/v1/users/families/assign', [
+            {'user_id': self.manager.pk, 'assignments': [
+                {'area_id': 1, 'family_id': 10, 'subfamily_id': 100},
+                {'area_id': 1, 'family_id': 11, 'subfamily_id': 110},
+            ]},
+            {'user_id': self.viewer.pk, 'assignments': []},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(UserFamilyAssignment.objects.filter(user=self.manager).values_list('subfamily_id', flat=True)), [100, 110]
+        )
+        self.assertTrue(UserFamilyAssignment.objects.filter(pk=kept.pk).exists())
+
+    def test_bulk_validate_hierarchy(self):
+        self.authenticate(self.admin)
+        response = self.client.put('/v1/users/families/assign', [
+            {'user_id': self.manager.pk, 'assignments': [{'area_id': 1, 'family_id': 10, 'subfamily_id': 110}]},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UserFamilyAssignment.objects.get(user=self.manager).subfamily_id, 100)
+
+
+class ProductCountrySettingsTests(ProductTestCase):
+
+    def test_upsert_keeps_omitted_fields_and_drops_missing_countries(self):
+        product = self.create_product('SKU-1')
+        ProductCountry.objects.create(product=product, country_code='CL', category='Original', sellable=False)
+        ProductCountry.objects.create(product=product, country_code='PE')
+        self.authenticate(self.manager)
+
+        response = self.client.patch(f'/v1/products/{product.pk}/', {'country_settings': [
+            {'country_code': 'CL', 'enabled': False},
+            {'country_code': 'AR', 'category': 'Nueva'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        settings = {setting.country_code: setting for setting in product.country_settings.all()}
+        self.assertEqual(sorted(settings), ['AR', 'CL'])
+        self.assertEqual((settings['CL'].enabled, settings['CL'].sellable, settings['CL'].category), (False, False, 'Original'))
+        self.assertEqual((settings['AR'].enabled, settings['AR'].category), (True, 'Nueva'))
+        self.assertEqual(sorted(item['country_code'] for item in response.data['country_settings']), ['AR', 'CL'])
+
+
+class ProductRelationTests(ProductTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product('SKU-1')
+        self.first = self.create_product('SKU-2')
+        self.second = self.create_product('SKU-3')
+        self.authenticate(self.manager)
+
+    def patch_country(self, **fields):
+        return self.client.patch(f'/v1/products/{self.product.pk}/', {
+            'country_settings': [{'country_code': 'AR', **fields}],
+        }, format='json')
+
+    def test_lists_keep_order_and_drop_duplicates(self):
+        response = self.patch_country(related='SKU-3, SKU-2,SKU-3', substitute='SKU-2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['country_settings'][0]['related'], 'SKU-3,SKU-2')
+        setting = ProductCountry.objects.get(product=self.product, country_code='AR')
+        self.assertEqual(setting.get_relation_skus(RELATION_FIELDS['related']), ['SKU-3', 'SKU-2'])
+        self.assertEqual(setting.get_relation_skus(RELATION_FIELDS['substitute']), ['SKU-2'])
+
+    def test_rejects_unknown_skus(self):
+        response = self.patch_country(related='SKU-2,NOPE')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('NOPE', str(response.data))
+        self.assertFalse(ProductCountry.objects.filter(product=self.product).exists())
+
+    def test_referenced_by(self):
+        self.patch_country(related='SKU-2', substitute='SKU-2')
+
+        response = self.client.get(f'/v1/products/{self.first.pk}/referenced-by/')
+        self.assertEqual(
+            [(item['sku'], item['country_code'], item['relation_type']) for item in response.data],
+            [('SKU-1', 'AR', 'related'), ('SKU-1', 'AR', 'substitute')],
+        )
+        response = self.client.get(f'/v1/products/{self.first.pk}/referenced-by/?relation_type=substitute')
+        self.assertEqual([item['relation_type'] for item in response.data], ['substitute'])
+        response = self.client.get(f'/v1/products/{self.second.pk}/referenced-by/')
+        self.assertEqual(response.data, [])
+        response = self.client.get(f'/v1/products/{self.first.pk}/referenced-by/?relation_type=otro')
+        self.assertEqual(response.status_code, 400)
+
+    def test_renaming_or_deleting_target_updates_referencing_product(self):
+        self.patch_country(related='SKU-2,SKU-3')
+        etag = self.client.get(f'/v1/products/{self.product.pk}/')['ETag']
+
+        self.authenticate(self.admin)
+        self.client.patch(f'/v1/products/{self.second.pk}/', {'sku': 'SKU-3B'}, format='json')
+        response = self.client.get(f'/v1/products/{self.product.pk}/')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['country_settings'][0]['related'], 'SKU-2,SKU-3B')
+
+        etag = response['ETag']
+        self.first.delete()
+        response = self.client.get(f'/v1/products/{self.product.pk}/')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['country_settings'][0]['related'], 'SKU-3B')
+
+
+class ProductConditionalGetTests(ProductTestCase):
+
+    def get_detail(self, product, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(f'/v1/products/{product.pk}/', **headers)
+
+    def test_detail_not_modified_until_product_changes(self):
+        product = self.create_product('SKU-1')
+        self.authenticate(self.manager)
+        etag = self.get_detail(product)['ETag']
+
+        self.assertEqual(self.get_detail(product, etag).status_code, 304)
+
+        response = self.client.patch(f'/v1/products/{product.pk}/', {'name': 'Nuevo nombre'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.get_detail(product, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_etag_ignores_unrelated_products(self):
+        product = self.create_product('SKU-1')
+        self.authenticate(self.manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            etag = self.get_detail(product)['ETag']
+            other = self.create_product('SKU-2', subfamily=self.other_subfamily)
+            other.delete()
+
+        self.assertEqual(self.get_detail(product, etag).status_code, 304)
+
+    def test_detail_etag_changes_with_taxonomy_names(self):
+        product = self.create_product('SKU-1')
+        self.authenticate(self.manager)
+        etag = self.get_detail(product)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subfamily.name = 'Combos'
+            self.subfamily.save()
+
+        response = self.get_detail(product, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['subfamily'], 'Combos')
+
+    def test_list_not_modified_until_catalog_changes(self):
+        self.create_product('SKU-1')
+        self.authenticate(self.viewer)
+        etag = self.client.get('/v1/products/')['ETag']
+
+        self.assertEqual(self.client.get('/v1/products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.create_product('SKU-2')
+        self.assertEqual(self.client.get('/v1/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(PRODUCT_DETAIL_CACHE_TTL=60)
+class ProductDetailCacheTests(ProductTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product('SKU-1')
+        self.detail_cache = get_product_detail_cache()
+
+    def get_detail(self, user):
+        self.authenticate(user)
+        response = self.client.get(f'/v1/products/{self.product.pk}/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def cache_key(self, variant):
+        return DETAIL_CACHE_KEY.format(pk=self.product.pk, variant=variant)
+
+    def test_miss_then_hit(self):
+        first = self.get_detail(self.admin)
+        second = self.get_detail(self.admin)
+
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(self.detail_cache.stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_entry_from_older_revision_is_not_served(self):
+        etag = self.get_detail(self.admin)['ETag']
+        # Sin pasar por las señales: la entrada sigue en caché, pero con el ETag anterior.
+        touch_products([self.product.pk])
+        self.assertIsNotNone(self.detail_cache.cache.get(self.cache_key('administrator')))
+
+        response = self.get_detail(self.admin)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_entries_are_kept_per_role(self):
+        self.get_detail(self.admin)
+        etag, _ = self.detail_cache.cache.get(self.cache_key('administrator'))
+        self.detail_cache.set(self.product.pk, 'administrator', etag, b'{"variant": "administrator"}')
+
+        response = self.get_detail(self.viewer)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['sku'], 'SKU-1')
+        self.assertEqual(self.get_detail(self.admin).json(), {'variant': 'administrator'})
+
+    def test_write_drops_entries_of_every_role(self):
+        self.get_detail(self.admin)
+        self.get_detail(self.viewer)
+
+        self.authenticate(self.admin)
+        response = self.client.patch(f'/v1/products/{self.product.pk}/', {'name': 'Nuevo nombre'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.detail_cache.cache.get_many([self.cache_key('administrator'), self.cache_key('default_user')]), {}
+        )
+        response = self.get_detail(self.viewer)
+        self.assertEqual((response['X-Cache'], response.json()['name']), ('MISS', 'Nuevo nombre'))
+
+
+class TaxonomyTreeTests(ProductTestCase):
+
+    def test_tree_counts_and_conditional_get(self):
+        self.create_product('SKU-1')
+        self.authenticate(self.viewer)
+        response = self.client.get('/v1/taxonomy/')
+        self.assertEqual(response.status_code, 200)
+        area = response.data[0]
+        self.assertEqual((area['name'], area['product_count']), ('Herramientas', 1))
+        etag = response['ETag']
+
+        for if_none_match in (etag, f'"otro", {etag}', '*'):
+            response = self.client.get('/v1/taxonomy/', HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, 304, if_none_match)
+            self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get('/v1/taxonomy/', HTTP_IF_NONE_MATCH='"otro"').status_code, 200)
+
+    def test_count_change_replaces_cached_tree(self):
+        from .taxonomy import TAXONOMY_TREE_KEY, get_taxonomy_tree
+
+        self.authenticate(self.viewer)
+        etag = self.client.get('/v1/taxonomy/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_product('SKU-1')
+
+        response = self.client.get('/v1/taxonomy/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['product_count'], 1)
+        self.assertEqual(cache.get(TAXONOMY_TREE_KEY), get_taxonomy_tree())
+
+
+class ProductCountTests(ProductTestCase):
+
+    def counts(self, model):
+        return dict(model.objects.values_list('id', 'product_count'))
+
+    def test_move_after_refresh_from_db(self):
+        product = self.create_product('SKU-1')
+        other = Product.objects.get(pk=product.pk)
+        other.family, other.subfamily = self.other_family, self.other_subfamily
+        other.save()
+
+        product.refresh_from_db()
+        product.name = 'Renombrado'
+        product.save()
+        self.assertEqual(self.counts(Subfamily), {100: 0, 110: 1})
+
+        product.family, product.subfamily = self.family, self.subfamily
+        product.save()
+        self.assertEqual(self.counts(Subfamily), {100: 1, 110: 0})
+        self.assertEqual(self.counts(Family), {10: 1, 11: 0})
+
+        product.delete()
+        self.assertEqual(self.counts(Subfamily), {100: 0, 110: 0})
+        self.assertEqual(self.counts(Area), {1: 0})
+
+    def test_stale_instances_do_not_double_count(self):
+        product = self.create_product('SKU-1')
+        first, second = Product.objects.get(pk=product.pk), Product.objects.get(pk=product.pk)
+        for instance in (first, second):
+            instance.family, instance.subfamily = self.other_family, self.other_subfamily
+            instance.save()
+
+        self.assertEqual(self.counts(Subfamily), {100: 0, 110: 1})
+
+        # `product` aún cree estar en la subfamilia 100: se descuenta el nodo guardado.
+        product.delete()
+        self.assertEqual(self.counts(Subfamily), {100: 0, 110: 0})
+        self.assertEqual(self.counts(Family), {10: 0, 11: 0})
+
+    def test_save_without_taxonomy_fields_keeps_counts(self):
+        product = self.create_product('SKU-1')
+        stale = Product.objects.get(pk=product.pk)
+        product.subfamily, product.family = self.other_subfamily, self.other_family
+        product.save()
+
+        stale.name = 'Solo el nombre'
+        stale.save(update_fields=['name'])
+
+        self.assertEqual(self.counts(Subfamily), {100: 0, 110: 1})
+
+
+class ProductTaxonomyUpdateTests(ProductTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product('SKU-1')
+
+    def test_subfamily_code_moves_product_and_counts(self):
+        self.authenticate(self.admin)
+        response = self.client.patch(f'/v1/products/{self.product.pk}/', {'subfamily_code': 110}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            (response.data['family_code'], response.data['subfamily_code'], response.data['subfamily']),
+            (11, 110, 'Taladros'),
+        )
+        self.assertEqual(
+            [node.product_count for node in (Family.objects.get(pk=10), Family.objects.get(pk=11))], [0, 1]
+        )
+
+    def test_rejects_codes_outside_hierarchy(self):
+        self.authenticate(self.admin)
+        for payload, field in (
+            ({'subfamily_code': 999}, 'subfamily_code'),
+            ({'family_code': 11}, 'family_code'),
+            ({'subfamily_code': 110, 'family_code': 10}, 'family_code'),
+            ({'subfamily_code': 110, 'area_code': 2}, 'area_code'),
+        ):
+            response = self.client.patch(f'/v1/products/{self.product.pk}/', payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertIn(field, response.data)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.subfamily_id, 100)
+
+    def test_manager_cannot_move_product_out_of_assigned_subfamilies(self):
+        self.authenticate(self.manager)
+        response = self.client.patch(f'/v1/products/{self.product.pk}/', {'subfamily_code': 110}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('subfamily_code', response.data)
+        response = self.client.patch(f'/v1/products/{self.product.pk}/', {'subfamily_code': 100, 'name': 'Nuevo'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class PendingApprovalCountTests(ProductTestCase):
+
+    def pending(self, model):
+        return dict(model.objects.filter(pending_approval_count__gt=0).values_list('id', 'pending_approval_count'))
+
+    def test_move_after_refresh_from_db(self):
+        product = self.create_product('SKU-1', status='pending_approval')
+        other = Product.objects.get(pk=product.pk)
+        other.family, other.subfamily = self.other_family, self.other_subfamily
+        other.save()
+
+        product.refresh_from_db()
+        product.family, product.subfamily = self.family, self.subfamily
+        product.save()
+        self.assertEqual((self.pending(Family), self.pending(Area)), ({10: 1}, {1: 1}))
+
+        product.delete()
+        self.assertEqual((self.pending(Family), self.pending(Area)), ({}, {}))
+
+    def test_stale_status_changes_do_not_double_count(self):
+        product = self.create_product('SKU-1')
+        first, second = Product.objects.get(pk=product.pk), Product.objects.get(pk=product.pk)
+        for instance in (first, second):
+            instance.status = Status.objects.get(code='pending_approval')
+            instance.save()
+        self.assertEqual(self.pending(Family), {10: 1})
+
+        # `product` aún cree estar en borrador: se descuenta el estado guardado.
+        product.delete()
+        self.assertEqual(self.pending(Family), {})
+
+
+class ProductChangesFeedTests(ProductTestCase):
+
+    def get_changes(self, since=0):
+        return self.client.get('/v1/products/changes/', {'since': since})
+
+    @override_settings(PRODUCT_CHANGES_SAFETY_LAG=0)
+    def test_orm_saves_and_deletes_appear_in_feed(self):
+        self.authenticate(self.viewer)
+        product = self.create_product('SKU-1')
+        self.assertEqual(product.revision, 1)
+        product.name = 'Renombrado'
+        product.save()
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.revision, 3)
+
+        response = self.get_changes()
+        self.assertEqual(response.status_code, 200)
+        [entry] = response.data['results']
+        self.assertEqual((entry['sku'], entry['deleted']), ('SKU-1', False))
+        self.assertEqual(entry['product']['name'], 'Renombrado')
+
+        since = response.data['next_since']
+        Product.objects.get(pk=product.pk).delete()
+        [entry] = self.get_changes(since).data['results']
+        self.assertEqual((entry['id'], entry['deleted'], entry['product']), (product.pk, True, None))
+
+    def test_saving_stale_instance_never_reuses_a_revision(self):
+        product = self.create_product('SKU-1')
+        stale = Product.objects.get(pk=product.pk)
+        touch_products([product.pk])
+        self.authenticate(self.viewer)
+        etag = self.client.get(f'/v1/products/{product.pk}/')['ETag']
+
+        stale.name = 'Desde una instancia antigua'
+        stale.save()
+
+        self.assertEqual(stale.revision, 3)
+        self.assertEqual(Product.objects.get(pk=product.pk).revision, 3)
+        response = self.client.get(f'/v1/products/{product.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Desde una instancia antigua')
+
+    @override_settings(PRODUCT_CHANGES_SAFETY_LAG=60)
+    def test_recent_changes_wait_for_safety_lag(self):
+        self.authenticate(self.viewer)
+        product = self.create_product('SKU-1')
+
+        response = self.get_changes()
+        self.assertEqual((response.data['results'], response.data['next_since']), ([], 0))
+
+        ProductChange.objects.filter(product_id=product.pk).update(created_at=now() - timedelta(seconds=61))
+        self.assertEqual([entry['id'] for entry in self.get_changes().data['results']], [product.pk])
+
+
+class ProductSearchIndexTests(ProductTestCase):
+
+    def search(self, query):
+        response = self.client.get('/v1/products/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [item['sku'] for item in response.data['results']]
+
+    def suggest(self, query):
+        return [item['sku'] for item in self.client.get('/v1/products/skus/', {'q': query}).data['results']]
+
+    def test_orm_writes_update_search_and_sku_indexes(self):
+        from .autocomplete import sku_index
+
+        sku_index.rebuild()
+        self.authenticate(self.viewer)
+        # El índice de SKU se actualiza al confirmar la transacción.
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.create_product('CAN-1', name='Canción de cuna')
+        self.assertEqual(self.search('cancion'), ['CAN-1'])
+        self.assertEqual(self.suggest('CAN'), ['CAN-1'])
+
+        product.name = 'Martillo'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertEqual(self.search('cancion'), [])
+        self.assertEqual(self.search('martillo'), ['CAN-1'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.search('martillo'), [])
+        self.assertEqual(self.suggest('CAN'), [])
+
+    @override_settings(PRODUCT_AUTOCOMPLETE_SYNC_INTERVAL=0)
+    def test_sku_index_sync_rereads_recent_changes(self):
+        from .autocomplete import sku_index
+
+        for index in range(10):
+            self.create_product(f'BASE-{index}')
+        ProductChange.objects.update(created_at=now() - timedelta(seconds=60))
+        sku_index.rebuild()
+        self.authenticate(self.viewer)
+        # Sin ejecutar on_commit: el índice solo ve estos productos por el registro de cambios.
+        late = self.create_product('LATE-1')
+        late_revision = ProductChange.objects.get(product_id=late.pk).id
+        ProductChange.objects.filter(id=late_revision).delete()  # su transacción aún no confirma
+        self.create_product('EARLY-1')
+        self.assertEqual(self.suggest('EARLY'), ['EARLY-1'])
+        self.assertEqual(self.suggest('LATE'), [])
+
+        # Confirma después con una revisión menor que la ya sincronizada.
+        ProductChange.objects.create(id=late_revision, product_id=late.pk)
+        self.assertEqual(self.suggest('LATE'), ['LATE-1'])
+
+        ProductChange.objects.update(created_at=now() - timedelta(seconds=60))
+        self.suggest('LATE')
+        self.assertEqual(sku_index.revision, ProductChange.objects.latest('id').id)
+
+
+class ProductImporterTests(ProductTestCase):
+
+    def run_import(self, *rows):
+        from .importer import ProductImporter, iter_rows
+
+        lines = io.StringIO('\n'.join(json.dumps({'product_type': 'simple', 'name': 'Importado', **row}) for row in rows))
+        return ProductImporter().run(iter_rows(lines, 'ndjson'))
+
+    def test_upserts_and_creates_missing_taxonomy(self):
+        self.create_product('SKU-1')
+        result = self.run_import(
+            {'sku': 'SKU-1', 'name': 'Actualizado', 'area_code': 1, 'family_code': 10, 'subfamily_code': 100},
+            {'sku': 'SKU-2', 'area_code': 2, 'area': 'Jardín', 'family_code': 20, 'subfamily_code': 200},
+        )
+
+        self.assertEqual((result.created, result.updated, result.errors), (1, 1, []))
+        self.assertEqual(Product.objects.get(sku='SKU-1').name, 'Actualizado')
+        self.assertEqual(Subfamily.objects.get(pk=200).family.area.name, 'Jardín')
+
+    def test_rejects_rows_outside_taxonomy_hierarchy(self):
+        result = self.run_import(
+            {'sku': 'SKU-1', 'area_code': 2, 'family_code': 10, 'subfamily_code': 100},
+            {'sku': 'SKU-2', 'area_code': 1, 'family_code': 10, 'subfamily_code': 110},
+            {'sku': 'SKU-3', 'area_code': 2, 'family_code': 20, 'subfamily_code': 200},
+            {'sku': 'SKU-4', 'area_code': 3, 'family_code': 20, 'subfamily_code': 201},
+        )
+
+        self.assertEqual(
+            [(error['row'], error['sku'], sorted(error['errors'])) for error in result.errors],
+            [(1, 'SKU-1', ['family_code']), (2, 'SKU-2', ['subfamily_code']), (4, 'SKU-4', ['family_code'])],
+        )
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['SKU-3'])
+        self.assertEqual(Family.objects.get(pk=20).area_id, 2)
+
+    def test_rejects_non_utf8_upload_before_importing(self):
+        self.authenticate(self.admin)
+        content = 'sku,name,product_type,area_code,family_code,subfamily_code\nSKU-1,Cañería,simple,1,10,100\n'
+        upload = SimpleUploadedFile('productos.csv', content.encode('latin-1'), content_type='text/csv')
+
+        response = self.client.post('/v1/products/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.data['detail'])
+        self.assertFalse(Product.objects.exists())
+
+    def test_malformed_csv_reports_row_where_reading_stopped(self):
+        from .importer import ProductImporter, iter_rows
+
+        content = (
+            'sku,name,product_type,area_code,family_code,subfamily_code\n'
+            'SKU-1,Martillo,simple,1,10,100\n'
+            f'SKU-2,{"x" * (csv.field_size_limit() + 1)},simple,1,10,100\n'
+        )
+        result = ProductImporter().run(iter_rows(io.StringIO(content), 'csv'))
+
+        self.assertEqual((result.created, result.failed), (1, 1))
+        self.assertEqual(result.errors[0]['row'], 3)
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['SKU-1'])
+
+    def test_caps_reported_errors(self):
+        from .importer import ProductImporter, iter_rows
+
+        result = ProductImporter(max_errors=2).run(iter_rows(io.StringIO('no es json\n' * 5), 'ndjson'))
+
+        self.assertEqual((result.failed, len(result.errors)), (5, 2))
+        self.assertEqual(result.as_dict()['failed'], 5)
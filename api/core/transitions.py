@@ -0,0 +1,146 @@
+from collections import Counter
+
+from .acl import get_user_role_code, get_user_subfamily_ids
+from .approvals import PENDING_APPROVAL, adjust_pending_approval_counts, pending_approval_key
+from .changes import touch_products
+from .models import Product, ProductWorkflow
+from .reference import statuses
+
+# Estados desde los que un product manager puede solicitar aprobación.
+APPROVAL_REQUEST_FROM = ('draft', 'editing', 'deactivated')
+# Estados desde los que un administrador puede publicar.
+PUBLISH_FROM = ('pending_approval', 'draft', 'editing', 'deactivated')
+
+
+class TransitionError(Exception):
+    """
+    Transición de estado rechazada. `permission_denied` distingue la falta de
+    permisos (403) de una solicitud inválida (400); `field` es la clave del
+    error en la respuesta.
+    """
+
+    def __init__(self, detail, permission_denied=False, field='detail'):
+        super().__init__(detail)
+        self.detail = detail
+        self.permission_denied = permission_denied
+        self.field = field
+
+    def as_dict(self):
+        return {self.field: self.detail}
+
+
+class StatusTransition:
+    """
+    Cambio de estado y/o de publicación solicitado por un usuario. Las reglas
+    se evalúan contra el estado en memoria (`core.reference`) y las
+    subfamilias asignadas al usuario (`core.acl`), por lo que validar muchos
+    productos no agrega consultas por producto.
+    """
+
+    def __init__(self, user, status_code=None, published=None, message=None):
+        self.user = user
+        self.role_code = get_user_role_code(user)
+        self.is_admin = self.role_code == 'administrator'
+        self.status_code = status_code
+        self.published = published
+        self.message = message
+
+        if status_code is None and published is None:
+            raise TransitionError("No se proporcionaron campos válidos para actualizar.")
+        if published is not None and not isinstance(published, bool):
+            raise TransitionError("El campo 'published' debe ser verdadero o falso.", field='published')
+        self.new_status = None
+        if status_code is not None:
+            self.new_status = statuses.get(status_code)
+            if self.new_status is None:
+                raise TransitionError(f"El estado con código '{status_code}' no existe.", field='status_code')
+
+    def can_edit(self, product):
+        if self.is_admin:
+            return True
+        if self.role_code == 'default_user' or product.subfamily_id is None:
+            return False
+        return product.subfamily_id in get_user_subfamily_ids(self.user)
+
+    def can_request_approval(self, product, current_code):
+        if self.is_admin or self.role_code == 'default_user':
+            return False
+        return self.can_edit(product) and current_code in APPROVAL_REQUEST_FROM
+
+    def check(self, product):
+        """
+        Valida la transición para `product`. Lanza `TransitionError` si no está permitida.
+        """
+        current = statuses.get_by_id(product.status_id)
+        current_code = current.code if current else None
+        status_code = self.status_code
+
+        if not self.can_edit(product):
+            raise TransitionError("No tiene permiso para modificar este producto.", permission_denied=True)
+
+        # Despublicar es exclusivo de administradores
+        if self.published is False and product.published is True and not self.is_admin:
+            raise TransitionError("Solo los administradores pueden despublicar un producto.", permission_denied=True)
+
+        # Rechazar una solicitud de aprobación (volver a 'editing') es exclusivo de administradores
+        if status_code == 'editing' and current_code == PENDING_APPROVAL and not self.is_admin:
+            raise TransitionError("Solo los administradores pueden rechazar una solicitud de aprobación.", permission_denied=True)
+
+        if status_code == PENDING_APPROVAL and not self.can_request_approval(product, current_code):
+            raise TransitionError(
+                "No tiene permiso para solicitar aprobación para este producto o su estado actual no es válido.",
+                permission_denied=True,
+            )
+
+        # Publicar es exclusivo de administradores
+        if self.published is True or status_code == 'published':
+            if not self.is_admin:
+                raise TransitionError("Solo los administradores pueden publicar un producto.", permission_denied=True)
+            if status_code == 'published' and current_code not in PUBLISH_FROM:
+                raise TransitionError(f"No se puede cambiar a estado publicado desde '{current_code}'.")
+
+        # Los usuarios básicos no regresan a edición un producto publicado
+        if status_code == 'editing' and current_code == 'published' and self.role_code == 'default_user':
+            raise TransitionError("Los usuarios básicos no pueden volver un producto a edición.", permission_denied=True)
+
+    def apply(self, products):
+        """
+        Aplica la transición a productos ya validados con `check`: un
+        `bulk_update`, un `bulk_create` del historial para los que cambian de
+        estado, y el registro de cambios y los conteos de pendientes que las
+        señales de guardado no cubren en escrituras en bloque.
+
+        Debe ejecutarse dentro de una transacción.
+        """
+        deactivating = self.new_status is not None and self.new_status.code == 'deactivated'
+        update_fields = []
+        if self.new_status is not None:
+            update_fields.append('status')
+        if self.published is not None or deactivating:
+            update_fields.append('published')
+        workflows = []
+        pending_deltas = Counter()
+        for product in products:
+            old_status_id = product.status_id
+            if self.new_status is not None:
+                product.status = self.new_status
+            if self.published is not None:
+                product.published = self.published
+            if deactivating:
+                product.published = False
+
+            if old_status_id != product.status_id:
+                message = self.message if self.new_status.code == 'editing' else None
+                workflows.append(ProductWorkflow(
+                    product=product, user=self.user, old_status_id=old_status_id,
+                    new_status=self.new_status, message=message,
+                ))
+                pending_deltas[pending_approval_key(old_status_id, product.taxonomy_key)] -= 1
+                pending_deltas[pending_approval_key(product.status_id, product.taxonomy_key)] += 1
+
+        if not products:
+            return
+        Product.objects.bulk_update(products, update_fields, batch_size=500)
+        ProductWorkflow.objects.bulk_create(workflows, batch_size=500)
+        adjust_pending_approval_counts(pending_deltas)
+        touch_products([product.pk for product in products])
@@ -1,13 +1,25 @@
 from django.urls import path
-from . import views
-from .views import ProductListView, ProductDetailView, UserFamilyAssignmentUpdateView, ProductStatusUpdateView, ProductHistoryView, ProductVideoListView, ProductVideoDetailView
+from .views import ProductListView, ProductDetailView, UserFamilyAssignmentUpdateView, ProductStatusUpdateView, ProductHistoryView, ProductVideoListView, ProductVideoDetailView, BulkUserFamilyAssignmentUpdateView, ProductChangesView, ProductExportView, ProductImportView, TaxonomyTreeView, ProductCacheStatsView, ProductSearchView, SkuAutocompleteView, SkuResolveView, ProductReferencedByView, ApprovalQueueView, ApprovalCountsView, ProductBulkStatusUpdateView
 
 urlpatterns = [
     path('products/', ProductListView.as_view(), name='product-list'),
+    path('products/import/', ProductImportView.as_view(), name='product-import'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/changes/', ProductChangesView.as_view(), name='product-changes'),
+    path('products/search/', ProductSearchView.as_view(), name='product-search'),
+    path('products/skus/', SkuAutocompleteView.as_view(), name='product-sku-autocomplete'),
+    path('products/skus/resolve/', SkuResolveView.as_view(), name='product-sku-resolve'),
+    path('products/status/bulk-update/', ProductBulkStatusUpdateView.as_view(), name='product-status-bulk-update'),
+    path('products/cache-stats/', ProductCacheStatsView.as_view(), name='product-cache-stats'),
     path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
     path('products/<int:pk>/status/update/', ProductStatusUpdateView.as_view(), name='product-status-update'),
     path('products/<int:product_pk>/videos/', ProductVideoListView.as_view(), name='product-videos-list-create'),
     path('products/<int:product_pk>/videos/<int:pk>/', ProductVideoDetailView.as_view(), name='product-video-detail'),
+    path('products/<int:pk>/referenced-by/', ProductReferencedByView.as_view(), name='product-referenced-by'),
     path('products/<int:pk>/history/', ProductHistoryView.as_view(), name='product-history'),
+    path('approvals/', ApprovalQueueView.as_view(), name='approval-queue'),
+    path('approvals/counts/', ApprovalCountsView.as_view(), name='approval-counts'),
+    path('taxonomy/', TaxonomyTreeView.as_view(), name='taxonomy-tree'),
     path('users/<int:user_id>/families/assign', UserFamilyAssignmentUpdateView.as_view(), name='user-family-assignment-update'),
+    path('users/families/assign', BulkUserFamilyAssignmentUpdateView.as_view(), name='user-family-assignment-bulk-update'),
 ]
\ No newline at end of file
@@ -1,12 +1,16 @@
+import codecs
 from django.db import transaction
+from django.utils.timezone import now
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView, RetrieveAPIView, RetrieveUpdateAPIView
+from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView, RetrieveUpdateAPIView
 from django.shortcuts import get_object_or_404
-from django.http import Http404
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import MultiPartParser
 
 # Importaciones para drf-spectacular
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, inline_serializer
@@ -15,25 +19,53 @@ from rest_framework import serializers
 
 # Modelos, serializadores y permisos personalizados de tu aplicación
 from authapp.models import AppUser
-from .models import Product, UserFamilyAssignment, Status, ProductWorkflow, ProductVideo
-from .serializers import ProductSerializer, UserFamilyAssignmentSerializer, StatusSerializer, ProductWorkflowSerializer, ProductVideoSerializer
+from .models import Product, ProductWorkflow, ProductVideo
+from .serializers import ProductSerializer, ProductListItemSerializer, UserFamilyAssignmentSerializer, ProductWorkflowSerializer, ProductVideoSerializer, ApprovalQueueItemSerializer
 from authapp.permissions import IsActiveAppUser, IsAdminAppUser
-from core.permissions import ProductEditPermission, CanRequestProductApproval
+from core.permissions import ProductEditPermission
+from core.pagination import ProductCursorPagination
+from core.filters import ProductFilterBackend, parse_bool
+from core.services import clean_family_assignments, replace_family_assignments
+from core.changes import touch_products, get_changes_since, get_latest_revision
+from core.export import EXPORT_FORMATS, get_export_queryset, iter_export_records, iter_export
+from core.importer import IMPORT_FORMATS, ImportFileError, ProductImporter, check_encoding, iter_rows
+from core.taxonomy import get_taxonomy_tree, get_taxonomy_names_version
+from core.reference import statuses
+from core.conditional import ConditionalGetMixin, make_etag, get_product_revision, get_users_version, etag_matches, finalize_conditional_response
+from core.response_cache import NO_ROLE_VARIANT, get_product_detail_cache
+from core.acl import get_user_role_code
+from core.search import get_search_backend, chunked
+from core.autocomplete import sku_index
+from core.relations import RELATION_FIELDS, get_referencing_relations
+from core.approvals import get_approval_queue, get_pending_approval_counts
+from core.transitions import StatusTransition, TransitionError
 
 @extend_schema(
     summary="Obtener el historial de flujo de trabajo de un producto específico.",
+    description="""
+    Admite GET condicional: la respuesta incluye un `ETag` derivado de la revisión del producto y,
+    si `If-None-Match` coincide, se responde `304 Not Modified` sin cuerpo.
+    """,
     tags=['Products - History']
 )
-class ProductHistoryView(ListAPIView):
+class ProductHistoryView(ConditionalGetMixin, ListAPIView):
     serializer_class = ProductWorkflowSerializer
     permission_classes = [IsAuthenticated, IsActiveAppUser]
 
+    def get_etag(self, request, *args, **kwargs):
+        revision = get_product_revision(kwargs.get('pk'))
+        if revision is None:
+            return None
+        return make_etag('history', kwargs.get('pk'), revision, get_users_version())
+
     def get_queryset(self):
         product_pk = self.kwargs.get('pk')
         if not product_pk:
             raise Http404("No se proporcionó el PK del producto para la vista de historial.")
         product = get_object_or_404(Product, pk=product_pk)
-        return ProductWorkflow.objects.filter(product=product).order_by('-id')
+        return ProductWorkflow.objects.filter(product=product).select_related(
+            'user'
+        ).order_by('-id')
 
 @extend_schema(
     summary="Listar, crear y reemplazar videos para un producto.",
@@ -41,36 +73,53 @@ class ProductHistoryView(ListAPIView):
     **GET**: Retorna una lista de todos los videos de YouTube asociados a un producto.
     **POST**: Crea un **único** nuevo video para el producto especificado.
     **PUT**: **Reemplaza la lista completa** de videos para un producto. Envía un array de objetos con `youtube_url`. El `order` se asignará según la posición en el array.
+
+    El GET admite `If-None-Match` (ETag derivado de la revisión del producto) y responde `304 Not Modified` si no hubo cambios.
     """,
     parameters=[
         OpenApiParameter(name='product_pk', type=OpenApiTypes.INT, location=OpenApiParameter.PATH, description='ID primario del producto.')
     ],
     tags=['Products - Videos']
 )
-class ProductVideoListView(ListCreateAPIView):
+class ProductVideoListView(ConditionalGetMixin, ListCreateAPIView):
     serializer_class = ProductVideoSerializer
     permission_classes = [IsAuthenticated, IsActiveAppUser, ProductEditPermission]
 
+    def get_etag(self, request, *args, **kwargs):
+        revision = get_product_revision(kwargs.get('product_pk'))
+        if revision is None:
+            return None
+        return make_etag('videos', kwargs.get('product_pk'), revision)
+
+    def get_product(self):
+        """
+        Obtiene el producto de la URL y valida los permisos sobre él.
+        El resultado se reutiliza durante la solicitud.
+        """
+        if not hasattr(self, '_product'):
+            product_pk = self.kwargs.get('product_pk')
+            if not product_pk:
+                raise Http404("ID del producto no proporcionado en la URL.")
+            product = get_object_or_404(Product, pk=product_pk)
+            self.check_object_permissions(self.request, product)
+            self._product = product
+        return self._product
+
     def get_queryset(self):
-        product_pk = self.kwargs.get('product_pk')
-        if not product_pk:
-            raise Http404("ID del producto no proporcionado en la URL.")
-        product = get_object_or_404(Product, pk=product_pk)
-        self.check_object_permissions(self.request, product)
+        product = self.get_product()
         return ProductVideo.objects.filter(product=product).order_by('order', 'created_at')
 
     def perform_create(self, serializer):
-        product_pk = self.kwargs.get('product_pk')
-        product = get_object_or_404(Product, pk=product_pk)
-        self.check_object_permissions(self.request, product)
+        product = self.get_product()
         
         last_video = ProductVideo.objects.filter(product=product).order_by('order').last()
         next_order = last_video.order + 1 if last_video else 0
         serializer.save(product=product, order=next_order)
+        touch_products([product.pk])
 
     @extend_schema(
         summary="Reemplazar todos los videos de un producto.",
-        description="Recibe una lista de videos. Elimina todos los videos existentes para el producto y crea los nuevos de la lista. Esta operación es atómica.",
+        description="""Recibe una lista de videos y la aplica como diferencia sobre los existentes: los videos cuya URL se mantiene conservan su registro (solo se actualiza el orden), los nuevos se crean en bloque y los ausentes se eliminan. Esta operación es atómica.""",
         request=ProductVideoSerializer(many=True),
         responses={201: ProductVideoSerializer(many=True), 400: {'description': 'Datos de solicitud inválidos.'}},
         examples=[
@@ -82,31 +131,47 @@ class ProductVideoListView(ListCreateAPIView):
         ]
     )
     def put(self, request, *args, **kwargs):
-        product_pk = self.kwargs.get('product_pk')
-        product = get_object_or_404(Product, pk=product_pk)
-        self.check_object_permissions(self.request, product)
+        product = self.get_product()
 
         videos_data = request.data
         if not isinstance(videos_data, list):
             return Response({"detail": "Se esperaba una lista de videos."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            with transaction.atomic():
-                ProductVideo.objects.filter(product=product).delete()
-                
-                new_videos = []
-                for index, video_data in enumerate(videos_data):
-                    video_data['product'] = product.pk
-                    video_data['order'] = index
-                    serializer = self.get_serializer(data=video_data)
-                    serializer.is_valid(raise_exception=True)
-                    new_video = serializer.save(product=product)
-                    new_videos.append(new_video)
-            
-            response_serializer = self.get_serializer(new_videos, many=True)
-            return Response(response_serializer.data, status=status.HTTP_201_CREATED)
-        except Exception as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # Valida todo el payload antes de escribir
+        serializer = self.get_serializer(data=videos_data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        incoming_urls = [item['youtube_url'] for item in serializer.validated_data]
+        if len(set(incoming_urls)) != len(incoming_urls):
+            return Response({"detail": "La lista contiene videos duplicados."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            existing = {video.youtube_url: video for video in ProductVideo.objects.filter(product=product)}
+
+            to_update = []
+            to_create = []
+            for index, url in enumerate(incoming_urls):
+                video = existing.pop(url, None)
+                if video is None:
+                    to_create.append(ProductVideo(product=product, youtube_url=url, order=index))
+                elif video.order != index:
+                    video.order = index
+                    video.updated_at = now()
+                    to_update.append(video)
+
+            if existing:
+                ProductVideo.objects.filter(pk__in=[video.pk for video in existing.values()]).delete()
+            if to_update:
+                ProductVideo.objects.bulk_update(to_update, ['order', 'updated_at'])
+            if to_create:
+                ProductVideo.objects.bulk_create(to_create)
+            if existing or to_update or to_create:
+                touch_products([product.pk])
+
+        # Se relee la lista para obtener los IDs generados (no todos los motores los retornan en bulk_create)
+        response_serializer = self.get_serializer(self.get_queryset(), many=True)
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 @extend_schema(
     summary="Obtener, actualizar o eliminar un video específico.",
@@ -126,95 +191,534 @@ class ProductVideoDetailView(RetrieveUpdateDestroyAPIView):
         self.check_object_permissions(self.request, product)
         return video
 
+    def perform_update(self, serializer):
+        video = serializer.save()
+        touch_products([video.product_id])
+
+    def perform_destroy(self, instance):
+        product_id = instance.product_id
+        instance.delete()
+        touch_products([product_id])
+
 @extend_schema(
-    summary="Listar todos los productos.",
+    summary="Listar productos con paginación por cursor, filtros y orden.",
+    description="""
+    Retorna una página de productos. La paginación es por cursor (keyset): usa el enlace `next`/`previous`
+    de la respuesta para navegar. El tamaño de página se controla con `page_size` (máximo 500).
+    El orden por defecto es `-id`; se puede cambiar con `ordering` (`id`, `sku`, `created_at`, con `-` para descendente).
+    Admite GET condicional: el `ETag` cambia con cualquier modificación del catálogo, por lo que
+    `If-None-Match` responde `304 Not Modified` mientras no haya cambios.
+
+    Cada producto se entrega con una proyección liviana (columnas de la grilla). Con `fields` se eligen
+    exactamente los campos (incluidos `description`, `country_settings`, `related_users`, etc.) y con `omit`
+    se excluyen campos de la proyección.
+    """,
+    parameters=[
+        OpenApiParameter(name='fields', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Campos a incluir, separados por coma.'),
+        OpenApiParameter(name='omit', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Campos a excluir, separados por coma.'),
+    ],
     tags=['Products']
 )
-class ProductListView(ListAPIView):
-    serializer_class = ProductSerializer
+class ProductListView(ConditionalGetMixin, ListAPIView):
+    serializer_class = ProductListItemSerializer
     permission_classes = [IsAuthenticated, IsActiveAppUser]
+    pagination_class = ProductCursorPagination
+    filter_backends = [ProductFilterBackend, OrderingFilter]
+    ordering_fields = ['id', 'sku', 'created_at']
+    ordering = ['-id']
+
+    def get_etag(self, request, *args, **kwargs):
+        # La página depende del usuario (filtro `editable`) y de la URL completa (filtros y cursor).
+        return make_etag(
+            'products', request.user.pk, request.get_full_path(),
+            get_latest_revision(), get_taxonomy_names_version(), get_users_version(),
+        )
 
     def get_queryset(self):
-        return Product.objects.all()
+        selected_fields = ProductListItemSerializer.get_selected_fields(self.request.query_params)
+        return ProductListItemSerializer.optimize_queryset(Product.objects.all(), selected_fields)
+
+@extend_schema(
+    summary="Búsqueda de texto completo de productos, ordenada por relevancia.",
+    description="""
+    Busca las palabras de `q` (o palabras que empiecen con ellas) en sku, nombre, marca, descripciones,
+    especificaciones y aplicaciones, sin distinguir mayúsculas ni acentos. Todos los términos deben coincidir.
+    Los resultados se ordenan por relevancia (`score`); una coincidencia en el SKU o el nombre pesa más
+    que una en la descripción. Admite `fields`/`omit` como el listado de productos.
+    """,
+    parameters=[
+        OpenApiParameter(name='q', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=True, description='Texto a buscar.'),
+        OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description='Máximo de resultados (por defecto 20, máximo 100).'),
+        OpenApiParameter(name='offset', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description='Resultados a omitir (por defecto 0).'),
+        OpenApiParameter(name='fields', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Campos a incluir, separados por coma.'),
+        OpenApiParameter(name='omit', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Campos a excluir, separados por coma.'),
+    ],
+    tags=['Products']
+)
+class ProductSearchView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "El parámetro 'q' es obligatorio."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({"detail": "Los parámetros 'limit' y 'offset' deben ser enteros."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = get_search_backend().search(query, limit + 1, offset)
+        has_more = len(ranked) > limit
+        scores = dict(ranked[:limit])
+
+        selected_fields = ProductListItemSerializer.get_selected_fields(request.query_params)
+        products = ProductListItemSerializer.optimize_queryset(Product.objects.all(), selected_fields).in_bulk(list(scores))
+        ordered = [products[pk] for pk in scores if pk in products]
+        data = ProductListItemSerializer(ordered, many=True, context={'request': request}).data
+
+        return Response({
+            'query': query,
+            'has_more': has_more,
+            'next_offset': offset + limit if has_more else None,
+            'results': [{**item, 'score': round(scores[product.pk], 4)} for item, product in zip(data, ordered)],
+        })
+
+SKU_OPTION_FIELDS = {
+    'id': serializers.IntegerField(),
+    'sku': serializers.CharField(),
+    'name': serializers.CharField(),
+}
+
+@extend_schema(
+    summary="Autocompletado de productos por SKU o nombre.",
+    description="""
+    Sugerencias para los selectores de productos relacionados y sustitutos. Primero retorna los productos
+    cuyo SKU empieza con `q` y luego los que contienen `q` en cualquier parte del SKU o del nombre, sin
+    distinguir mayúsculas ni acentos. Se resuelve con un índice en memoria, sin consultar la base de datos.
+    """,
+    parameters=[
+        OpenApiParameter(name='q', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Texto a buscar. Vacío retorna los primeros SKU.'),
+        OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description='Máximo de sugerencias (por defecto 10, máximo 50).'),
+    ],
+    responses={200: inline_serializer(
+        name='SkuAutocompleteResponse',
+        fields={'results': inline_serializer(name='SkuOption', fields=SKU_OPTION_FIELDS, many=True)},
+    )},
+    tags=['Products']
+)
+class SkuAutocompleteView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser]
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return Response({"detail": "El parámetro 'limit' debe ser un entero."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': sku_index.suggest(request.query_params.get('q', ''), limit)})
+
+@extend_schema(
+    summary="Resuelve una lista de SKU a productos.",
+    description="""
+    Recibe hasta 1000 SKU exactos (por ejemplo, los de `related` y `substitute` de las configuraciones por país)
+    y retorna el id y nombre de cada producto existente, en el orden recibido, junto a los SKU que no existen.
+    """,
+    request=inline_serializer(
+        name='SkuResolveInput',
+        fields={'skus': serializers.ListField(child=serializers.CharField(), max_length=1000)},
+    ),
+    responses={200: inline_serializer(
+        name='SkuResolveResponse',
+        fields={
+            'results': inline_serializer(name='ResolvedSku', fields=SKU_OPTION_FIELDS, many=True),
+            'missing': serializers.ListField(child=serializers.CharField()),
+        },
+    )},
+    tags=['Products']
+)
+class SkuResolveView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser]
+    max_skus = 1000
+
+    def post(self, request):
+        skus = request.data.get('skus') if isinstance(request.data, dict) else None
+        if not isinstance(skus, list) or not all(isinstance(sku, str) for sku in skus):
+            return Response({"detail": "Se requiere 'skus' como lista de textos."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(skus) > self.max_skus:
+            return Response({"detail": f"Se permiten como máximo {self.max_skus} SKU por solicitud."}, status=status.HTTP_400_BAD_REQUEST)
+        skus = list(dict.fromkeys(sku.strip() for sku in skus if sku.strip()))
+        results, missing = sku_index.resolve(skus)
+        return Response({'results': results, 'missing': missing})
+
+@extend_schema(
+    summary="Productos que tienen a un producto como relacionado o sustituto.",
+    description="""
+    Búsqueda inversa de `related`/`substitute`: retorna, por país, los productos que referencian al producto indicado.
+    Se puede filtrar por `relation_type` (`related` o `substitute`) y `country_code`.
+    """,
+    parameters=[
+        OpenApiParameter(name='relation_type', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, enum=list(RELATION_FIELDS.values()), description='Tipo de relación.'),
+        OpenApiParameter(name='country_code', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Código de país.'),
+    ],
+    responses={200: inline_serializer(
+        name='ProductReference',
+        fields={
+            'id': serializers.IntegerField(),
+            'sku': serializers.CharField(),
+            'name': serializers.CharField(),
+            'country_code': serializers.CharField(),
+            'relation_type': serializers.CharField(),
+        },
+        many=True,
+    )},
+    tags=['Products']
+)
+class ProductReferencedByView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser]
+
+    def get(self, request, pk):
+        relation_type = request.query_params.get('relation_type')
+        if relation_type and relation_type not in RELATION_FIELDS.values():
+            return Response({"detail": f"'relation_type' debe ser uno de: {', '.join(RELATION_FIELDS.values())}."}, status=status.HTTP_400_BAD_REQUEST)
+        product = get_object_or_404(Product.objects.only('id'), pk=pk)
+        relations = get_referencing_relations(product.pk, relation_type, request.query_params.get('country_code'))
+        return Response([
+            {
+                'id': relation.setting.product.id,
+                'sku': relation.setting.product.sku,
+                'name': relation.setting.product.name,
+                'country_code': relation.setting.country_code,
+                'relation_type': relation.relation_type,
+            }
+            for relation in relations
+        ])
+
+@extend_schema(
+    summary="Feed incremental de productos modificados o eliminados desde una revisión.",
+    description="""
+    Retorna los productos que cambiaron después de la revisión `since`, en orden de revisión.
+    Cada producto aparece una sola vez con su revisión más reciente; los eliminados se informan con `deleted: true`
+    y `product: null`. Para continuar, vuelve a llamar con `since` igual a `next_since` mientras `has_more` sea verdadero.
+    Desde `since=0` se obtiene el catálogo completo.
+    Las entradas con menos de `PRODUCT_CHANGES_SAFETY_LAG` segundos de antigüedad se entregan en una consulta posterior,
+    para no saltar cambios de transacciones que confirman después de otras con revisiones mayores.
+    """,
+    parameters=[
+        OpenApiParameter(name='since', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description='Última revisión procesada por el consumidor (por defecto 0).'),
+        OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description='Máximo de productos a retornar (por defecto 500, máximo 1000).'),
+    ],
+    tags=['Products - Sync']
+)
+class ProductChangesView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser]
+    default_limit = 500
+    max_limit = 1000
+
+    def get(self, request):
+        try:
+            since = max(int(request.query_params.get('since', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return Response({"detail": "Los parámetros 'since' y 'limit' deben ser enteros."}, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = get_changes_since(since, limit)
+        changed_ids = [change.product_id for change in changes if not change.deleted]
+        products = Product.objects.with_related().in_bulk(changed_ids)
+        serialized = {
+            item['id']: item
+            for item in ProductSerializer(list(products.values()), many=True, context={'request': request}).data
+        }
+
+        results = []
+        for change in changes:
+            product = serialized.get(change.product_id)
+            results.append({
+                'revision': change.id,
+                'id': change.product_id,
+                'sku': product['sku'] if product else change.sku,
+                'deleted': product is None,
+                'product': product,
+            })
+
+        return Response({
+            'since': since,
+            'next_since': changes[-1].id if changes else since,
+            'has_more': len(changes) == limit,
+            'latest_revision': get_latest_revision(),
+            'results': results,
+        })
+
+@extend_schema(
+    summary="Exportar el catálogo publicado como NDJSON o CSV (streaming).",
+    description="""
+    Entrega los productos publicados con sus configuraciones por país en una respuesta en streaming.
+    - `ndjson` (por defecto): un objeto JSON por línea, con la lista `countries`.
+    - `csv`: una fila por producto y país.
+    Los filtros `country_code`, `enabled` y `sellable` se aplican a las configuraciones por país.
+    """,
+    parameters=[
+        OpenApiParameter(name='export_format', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, enum=list(EXPORT_FORMATS), description='Formato de salida.'),
+        OpenApiParameter(name='country_code', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Código de país (ej: CL).'),
+        OpenApiParameter(name='enabled', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name='sellable', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY),
+    ],
+    responses={200: OpenApiTypes.BINARY},
+    tags=['Products - Export']
+)
+class ProductExportView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser]
+    content_types = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": f"Formato no soportado: '{export_format}'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = get_export_queryset(
+            country_code=request.query_params.get('country_code'),
+            enabled=parse_bool(request.query_params.get('enabled')),
+            sellable=parse_bool(request.query_params.get('sellable')),
+        )
+        response = StreamingHttpResponse(
+            iter_export(export_format, iter_export_records(queryset)),
+            content_type=self.content_types[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="catalog.{export_format}"'
+        return response
+
+@extend_schema(
+    summary="Importar productos en bloque desde CSV o NDJSON (solo administradores).",
+    description="""
+    Recibe un archivo (`multipart/form-data`, campo `file`) y hace upsert por `sku` en bloques.
+    Cada fila se valida con las reglas de `ProductSerializer`; `product_type` y `status` se indican por código.
+    El estado solo se aplica a productos nuevos (por defecto `draft`).
+    Las filas cuya familia no pertenece al área, o cuya subfamilia no pertenece a la familia, se informan como error.
+    Un archivo que no está en UTF-8 se rechaza con 400 sin importar nada; si el CSV está mal formado, se importan
+    las filas anteriores y la fila en que se detuvo la lectura se informa como error. Se informan hasta 200 errores.
+    Retorna un resumen con filas creadas, actualizadas, errores por fila y throughput.
+    """,
+    request={
+        'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'file': {'type': 'string', 'format': 'binary'},
+                'import_format': {'type': 'string', 'enum': list(IMPORT_FORMATS)},
+            },
+        }
+    },
+    tags=['Products - Import']
+)
+class ProductImportView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser, IsAdminAppUser]
+    parser_classes = [MultiPartParser]
+    max_errors = 200
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Se esperaba un archivo en el campo 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = request.data.get('import_format') or upload.name.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            return Response({"detail": f"Formato no soportado: '{import_format}'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # La codificación se verifica antes de confirmar el primer bloque.
+        try:
+            check_encoding(upload.chunks())
+        except ImportFileError as exc:
+            return Response({"detail": exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+        upload.seek(0)
+
+        importer = ProductImporter(max_errors=self.max_errors)
+        result = importer.run(iter_rows(codecs.iterdecode(upload, 'utf-8-sig'), import_format))
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
 
 @extend_schema(
     summary="Obtener o actualizar detalles de un producto específico.",
+    description="""
+    El GET admite `If-None-Match`: el `ETag` se deriva de la revisión del producto y responde
+    `304 Not Modified` sin cuerpo si el producto no cambió.
+    Para mover el producto basta con `subfamily_code`: el área y la familia se toman de la subfamilia, y si se
+    envían deben corresponderle. Un gestor solo puede moverlo a subfamilias que tiene asignadas.
+    """,
     tags=['Products']
 )
-class ProductDetailView(RetrieveUpdateAPIView):
-    queryset = Product.objects.all()
+class ProductDetailView(ConditionalGetMixin, RetrieveUpdateAPIView):
+    queryset = Product.objects.with_related()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated, IsActiveAppUser, ProductEditPermission]
     lookup_field = 'pk'
 
+    def get_etag(self, request, *args, **kwargs):
+        revision = get_product_revision(kwargs.get('pk'))
+        if revision is None:
+            return None
+        return make_etag('product', kwargs.get('pk'), revision, get_taxonomy_names_version(), get_users_version())
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Sirve el JSON renderizado desde la caché de detalle si está habilitada
+        y la entrada corresponde al ETag actual; si no, serializa y la guarda.
+        """
+        detail_cache = get_product_detail_cache()
+        if not detail_cache.enabled or self.etag is None or request.accepted_renderer.format != 'json':
+            return super().retrieve(request, *args, **kwargs)
+
+        pk = kwargs['pk']
+        variant = get_user_role_code(request.user) or NO_ROLE_VARIANT
+        content = detail_cache.get(pk, variant, self.etag)
+        cache_status = 'HIT'
+        if content is None:
+            serializer = self.get_serializer(self.get_object())
+            content = request.accepted_renderer.render(
+                serializer.data, request.accepted_media_type, self.get_renderer_context()
+            )
+            detail_cache.set(pk, variant, self.etag, content)
+            cache_status = 'MISS'
+
+        response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+        response['X-Cache'] = cache_status
+        return response
+
 @extend_schema(
     summary="Actualizar el estado y/o el estado de publicación de un producto.",
+    description="""
+    Las reglas de transición (quién puede publicar, despublicar, solicitar o rechazar una aprobación)
+    son las de `core.transitions.StatusTransition`, compartidas con la actualización masiva.
+    """,
     tags=['Products - Status Management']
 )
 class ProductStatusUpdateView(APIView):
     permission_classes = [IsAuthenticated, IsActiveAppUser, ProductEditPermission]
 
     def patch(self, request, pk, format=None):
-        product = get_object_or_404(Product, pk=pk)
-        old_status = product.status
-        status_code = request.data.get('status_code')
-        published_status = request.data.get('published')
-        custom_message = request.data.get('message', None)
-        user = request.user
-        user_role_code = user.role.code if hasattr(user, 'role') and user.role else None
-        is_admin = (user_role_code == 'administrator')
-        is_default_user = (user_role_code == 'default_user')
-
-        # Permisos para despublicar un producto (solo administradores)
-        if published_status is False and product.published is True and not is_admin:
-            raise PermissionDenied("Solo los administradores pueden despublicar un producto.")
-
-        # Permiso para cambiar a 'editing' desde 'pending_approval' (solo administradores)
-        if status_code == 'editing' and product.status.code == 'pending_approval' and not is_admin:
-            raise PermissionDenied("Solo los administradores pueden rechazar una solicitud de aprobación.")
-
-        # Permiso para solicitar aprobación            
-        if status_code == 'pending_approval' and not CanRequestProductApproval().has_object_permission(request, self, product):
-            raise PermissionDenied("No tiene permiso para solicitar aprobación para este producto o su estado actual no es válido.")
-
-        # Lógica para publicación (solo administradores pueden publicar)
-        if published_status is True or status_code == 'published':
-            if not is_admin:
-                raise PermissionDenied("Solo los administradores pueden publicar un producto.")
-            if published_status is True:
-                product.published = True
-            if status_code == 'published' and product.status.code not in ['pending_approval', 'draft', 'editing', 'deactivated']:
-                return Response({"detail": f"No se puede cambiar a estado publicado desde '{product.status.code}'."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Permiso para que usuarios básicos no regresen un producto a edición si está publicado
-        if status_code == 'editing' and product.status.code == 'published' and is_default_user:
-            raise PermissionDenied("Los usuarios básicos no pueden volver un producto a edición.")
-
-        new_status_obj = None
-        if status_code is not None:
-            try:
-                new_status_obj = Status.objects.get(code=status_code)
-                product.status = new_status_obj
-
-                if new_status_obj.code == 'deactivated':
-                    product.published = False
-            except Status.DoesNotExist:
-                return Response({"status_code": f"El estado con código '{status_code}' no existe."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        update_fields = [f for f, v in [('status', status_code), ('published', published_status)] if v is not None]
-        if not update_fields:
-            return Response({"detail": "No se proporcionaron campos válidos para actualizar."}, status=status.HTTP_400_BAD_REQUEST)
-
-        product.save(update_fields=update_fields)
+        product = get_object_or_404(Product.objects.with_related(), pk=pk)
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Se esperaba un objeto con la transición a aplicar."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            transition = StatusTransition(
+                request.user,
+                status_code=request.data.get('status_code'),
+                published=request.data.get('published'),
+                message=request.data.get('message', None),
+            )
+            transition.check(product)
+        except TransitionError as exc:
+            if exc.permission_denied:
+                raise PermissionDenied(exc.detail)
+            return Response(exc.as_dict(), status=status.HTTP_400_BAD_REQUEST)
 
-        # Crea el registro de flujo de trabajo si el estado cambió
-        if new_status_obj and old_status != new_status_obj:
-            final_message = custom_message if new_status_obj.code == 'editing' else None
-            ProductWorkflow.objects.create(product=product, user=user, old_status=old_status, new_status=new_status_obj, message=final_message)
+        with transaction.atomic():
+            transition.apply([product])
 
         serializer = ProductSerializer(product, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+@extend_schema(
+    summary="Actualizar el estado y/o el estado de publicación de varios productos por SKU.",
+    description="""
+    Aplica la misma transición (`status_code`, `published`, `message`) a una lista de hasta 1000 SKU,
+    con las mismas reglas que la actualización de un producto. Cada SKU se valida por separado:
+    los que no existen o no cumplen las reglas se informan en `results` con su error y el resto
+    se actualiza en una sola transacción.
+    """,
+    request=inline_serializer(
+        name='BulkProductStatusUpdateInput',
+        fields={
+            'skus': serializers.ListField(child=serializers.CharField()),
+            'status_code': serializers.CharField(required=False),
+            'published': serializers.BooleanField(required=False),
+            'message': serializers.CharField(required=False),
+        },
+    ),
+    responses={200: inline_serializer(
+        name='BulkProductStatusUpdateResult',
+        fields={
+            'updated': serializers.IntegerField(),
+            'failed': serializers.IntegerField(),
+            'results': inline_serializer(
+                name='BulkProductStatusUpdateItem',
+                fields={
+                    'sku': serializers.CharField(),
+                    'id': serializers.IntegerField(allow_null=True),
+                    'updated': serializers.BooleanField(),
+                    'status_code': serializers.CharField(allow_null=True),
+                    'published': serializers.BooleanField(allow_null=True),
+                    'error': serializers.CharField(allow_null=True),
+                },
+                many=True,
+            ),
+        },
+    )},
+    tags=['Products - Status Management']
+)
+class ProductBulkStatusUpdateView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser, ProductEditPermission]
+    max_skus = 1000
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Se esperaba un objeto con 'skus' y la transición a aplicar."}, status=status.HTTP_400_BAD_REQUEST)
+        skus = request.data.get('skus')
+        if not isinstance(skus, list) or not all(isinstance(sku, str) for sku in skus):
+            return Response({"skus": "Se esperaba una lista de SKU."}, status=status.HTTP_400_BAD_REQUEST)
+        skus = list(dict.fromkeys(sku.strip() for sku in skus if sku.strip()))
+        if len(skus) > self.max_skus:
+            return Response({"skus": f"Se admiten como máximo {self.max_skus} SKU por solicitud."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            transition = StatusTransition(
+                request.user,
+                status_code=request.data.get('status_code'),
+                published=request.data.get('published'),
+                message=request.data.get('message', None),
+            )
+        except TransitionError as exc:
+            return Response(exc.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+
+        products = {}
+        for chunk in chunked(skus):
+            products.update(
+                (product.sku, product)
+                for product in Product.objects.filter(sku__in=chunk).only(
+                    'id', 'sku', 'status', 'published', 'area', 'family', 'subfamily'
+                )
+            )
+
+        valid, errors = [], {}
+        for sku in skus:
+            product = products.get(sku)
+            if product is None:
+                errors[sku] = "No existe un producto con este SKU."
+                continue
+            try:
+                transition.check(product)
+            except TransitionError as exc:
+                errors[sku] = exc.detail
+                continue
+            valid.append(product)
+
+        with transaction.atomic():
+            transition.apply(valid)
+
+        results = []
+        for sku in skus:
+            product = products.get(sku)
+            current = statuses.get_by_id(product.status_id) if product else None
+            results.append({
+                'sku': sku,
+                'id': product.pk if product else None,
+                'updated': sku not in errors,
+                'status_code': current.code if current else None,
+                'published': product.published if product else None,
+                'error': errors.get(sku),
+            })
+        return Response({'updated': len(valid), 'failed': len(errors), 'results': results})
+
 @extend_schema(
     summary="Asignar subfamilias a un usuario específico (solo administradores).",
     tags=['User Management']
@@ -224,21 +728,137 @@ class UserFamilyAssignmentUpdateView(APIView):
 
     def put(self, request, user_id):
         user_to_assign = get_object_or_404(AppUser, pk=user_id)
-        assignments_data = request.data
-        if not isinstance(assignments_data, list):
-            return Response({"detail": "Se esperaba una lista de asignaciones"}, status=status.HTTP_400_BAD_REQUEST)
-        
+        cleaned = clean_family_assignments(request.data)
+
         with transaction.atomic():
-            user_to_assign.family_assignments.all().delete()
-            result = []
-            for item in assignments_data:
-                area_id = item.get('area_id')
-                family_id = item.get('family_id')
-                subfamily_id = item.get('subfamily_id')
-                if not all([area_id, family_id, subfamily_id]):
-                    return Response({"detail": "Faltan campos requeridos en una asignación."}, status=status.HTTP_400_BAD_REQUEST)
-                assignment = UserFamilyAssignment.objects.create(user=user_to_assign, area_id=area_id, family_id=family_id, subfamily_id=subfamily_id)
-                result.append(assignment)
+            result = replace_family_assignments(user_to_assign, cleaned)
         
         serializer = UserFamilyAssignmentSerializer(result, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+@extend_schema(
+    summary="Asignar subfamilias a varios usuarios en una sola operación (solo administradores).",
+    description="""
+    Recibe una lista de objetos `{"user_id": int, "assignments": [...]}` y reemplaza las asignaciones
+    de cada usuario con la misma semántica que `PUT /v1/users/{user_id}/families/assign`.
+    Todos los usuarios se actualizan en una única transacción: si alguno falla, no se aplica ningún cambio.
+    """,
+    request=inline_serializer(
+        name='BulkUserFamilyAssignmentInput',
+        fields={
+            'user_id': serializers.IntegerField(),
+            'assignments': UserFamilyAssignmentSerializer(many=True),
+        },
+        many=True,
+    ),
+    tags=['User Management']
+)
+class BulkUserFamilyAssignmentUpdateView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser, IsAdminAppUser]
+
+    def put(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"detail": "Se esperaba una lista de usuarios con sus asignaciones."}, status=status.HTTP_400_BAD_REQUEST)
+
+        cleaned_by_user = {}
+        for item in items:
+            user_id = item.get('user_id') if isinstance(item, dict) else None
+            if not isinstance(user_id, int) or isinstance(user_id, bool):
+                return Response({"detail": "Cada elemento debe incluir 'user_id'."}, status=status.HTTP_400_BAD_REQUEST)
+            cleaned_by_user[user_id] = clean_family_assignments(item.get('assignments'))
+
+        users = AppUser.objects.in_bulk(list(cleaned_by_user))
+        missing = [user_id for user_id in cleaned_by_user if user_id not in users]
+        if missing:
+            return Response({"detail": f"Usuarios no encontrados: {missing}"}, status=status.HTTP_404_NOT_FOUND)
+
+        result = []
+        with transaction.atomic():
+            for user_id, cleaned in cleaned_by_user.items():
+                assignments = replace_family_assignments(users[user_id], cleaned)
+                result.append({
+                    'user_id': user_id,
+                    'assignments': UserFamilyAssignmentSerializer(assignments, many=True).data,
+                })
+
+        return Response(result, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    summary="Árbol de taxonomía (área → familia → subfamilia) con conteo de productos.",
+    description="""
+    Retorna el árbol completo de áreas, familias y subfamilias con la cantidad de productos de cada nodo.
+    La respuesta incluye un `ETag`; si el cliente envía `If-None-Match` con el mismo valor y el árbol no ha
+    cambiado, se responde `304 Not Modified` sin cuerpo.
+    """,
+    tags=['Taxonomy']
+)
+class TaxonomyTreeView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser]
+
+    def get(self, request):
+        version, tree = get_taxonomy_tree()
+        etag = f'"taxonomy-{version}"'
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(tree)
+        return finalize_conditional_response(response, etag)
+
+
+@extend_schema(
+    summary="Métricas de la caché de detalle de producto (solo administradores).",
+    description="Retorna aciertos, fallos y tasa de aciertos acumulados de la caché de respuestas del detalle de producto.",
+    tags=['Products']
+)
+class ProductCacheStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser, IsAdminAppUser]
+
+    def get(self, request):
+        detail_cache = get_product_detail_cache()
+        return Response({'enabled': detail_cache.enabled, 'alias': detail_cache.alias, **detail_cache.stats()})
+
+
+@extend_schema(
+    summary="Cola de productos pendientes de aprobación (solo administradores).",
+    description="""
+    Lista los productos en estado `pending_approval` junto a su última solicitud de aprobación
+    (`requested_at` y `requested_by`), resueltos en la misma consulta. Usa paginación por cursor
+    (`next`/`previous`) y admite los filtros de taxonomía, marca y texto del listado de productos.
+    Admite GET condicional con `ETag`/`If-None-Match`.
+    """,
+    tags=['Products - Approvals']
+)
+class ApprovalQueueView(ConditionalGetMixin, ListAPIView):
+    serializer_class = ApprovalQueueItemSerializer
+    permission_classes = [IsAuthenticated, IsActiveAppUser, IsAdminAppUser]
+    pagination_class = ProductCursorPagination
+    filter_backends = [ProductFilterBackend, OrderingFilter]
+    ordering_fields = ['id']
+    ordering = ['-id']
+
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag(
+            'approvals', request.user.pk, request.get_full_path(),
+            get_latest_revision(), get_taxonomy_names_version(), get_users_version(),
+        )
+
+    def get_queryset(self):
+        return get_approval_queue()
+
+
+@extend_schema(
+    summary="Conteo de productos pendientes de aprobación por área y familia (solo administradores).",
+    description="""
+    Retorna el total de productos pendientes y su desglose por área y familia (solo nodos con pendientes),
+    para las insignias del panel de administración. Los conteos se mantienen al cambiar el estado o la
+    taxonomía de los productos, por lo que no recorren la tabla de productos.
+    """,
+    tags=['Products - Approvals']
+)
+class ApprovalCountsView(APIView):
+    permission_classes = [IsAuthenticated, IsActiveAppUser, IsAdminAppUser]
+
+    def get(self, request):
+        return Response(get_pending_approval_counts())
@@ -4,14 +4,46 @@ import {
   FormControl, InputLabel, Select, MenuItem, Switch, FormControlLabel,
   Autocomplete, TextField, Typography, Box, Snackbar, Alert,
 } from '@mui/material';
-import { ROLES_MAP, AREAS_MAP, FAMILIES_MAP, SUBFAMILIES_MAP } from '../../../utils/constants';
+import { ROLES_MAP } from '../../../utils/constants';
+import { useAuth } from '../../contexts/AuthContext';
+import { getTaxonomyTree } from '../../../services/productApi';
 
 const roles = ROLES_MAP.map(r => r.name);
 
+// Aplana el árbol de /v1/taxonomy/ en listas de áreas, familias y subfamilias.
+const flattenTaxonomy = (tree) => {
+  const areas = [];
+  const families = [];
+  const subfamilies = [];
+  tree.forEach(area => {
+    areas.push({ id: area.id, name: area.name });
+    area.families.forEach(family => {
+      families.push({ id: family.id, name: family.name, areaId: area.id });
+      family.subfamilies.forEach(subfamily => {
+        subfamilies.push({ id: subfamily.id, name: subfamily.name, familyId: family.id });
+      });
+    });
+  });
+  return { areas, families, subfamilies };
+};
+
 export default function UserEditDialog({ open, onClose, user, onSave }) {
   const [form, setForm] = useState({ is_active: false, role: '', area: '', family: '', subfamily: '' });
   const [assignments, setAssignments] = useState([]);
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'info' });
+  const [taxonomy, setTaxonomy] = useState({ areas: [], families: [], subfamilies: [] });
+  const { fetchWithRefresh } = useAuth();
+
+  useEffect(() => {
+    if (!open) return;
+    let cancelled = false;
+    getTaxonomyTree(fetchWithRefresh)
+      .then(tree => { if (!cancelled) setTaxonomy(flattenTaxonomy(tree)); })
+      .catch(error => {
+        if (!cancelled) setSnackbar({ open: true, message: error.message, severity: 'error' });
+      });
+    return () => { cancelled = true; };
+  }, [open, fetchWithRefresh]);
 
   useEffect(() => {
     if (user) {
@@ -68,8 +100,8 @@ export default function UserEditDialog({ open, onClose, user, onSave }) {
     onSave(form, assignments);
   };
 
-  const availableFamilies = form.area ? FAMILIES_MAP.filter(f => f.areaId === form.area) : [];
-  const availableSubfamilies = form.family ? SUBFAMILIES_MAP.filter(s => s.familyId === form.family) : [];
+  const availableFamilies = form.area ? taxonomy.families.filter(f => f.areaId === form.area) : [];
+  const availableSubfamilies = form.family ? taxonomy.subfamilies.filter(s => s.familyId === form.family) : [];
 
   return (
     <Dialog open={open} onClose={onClose} fullWidth maxWidth="md">
@@ -219,9 +251,9 @@ export default function UserEditDialog({ open, onClose, user, onSave }) {
           >
             <FormControl fullWidth>
               <Autocomplete
-                options={AREAS_MAP}
+                options={taxonomy.areas}
                 getOptionLabel={(option) => option.name}
-                value={AREAS_MAP.find((a) => a.id === form.area) || null}
+                value={taxonomy.areas.find((a) => a.id === form.area) || null}
                 onChange={(_, newValue) => handleChange('area', newValue?.id || '')}
                 renderInput={(params) => <TextField {...params} label="Área" fullWidth />}
               />
@@ -263,9 +295,9 @@ export default function UserEditDialog({ open, onClose, user, onSave }) {
                 }}
               >
                 {assignments.map((a, index) => {
-                  const areaName = AREAS_MAP.find((x) => x.id === a.area_id)?.name || 'Área';
-                  const familyName = FAMILIES_MAP.find((x) => x.id === a.family_id)?.name || 'Familia';
-                  const subfamilyName = SUBFAMILIES_MAP.find((x) => x.id === a.subfamily_id)?.name || 'Subfamilia';
+                  const areaName = taxonomy.areas.find((x) => x.id === a.area_id)?.name || 'Área';
+                  const familyName = taxonomy.families.find((x) => x.id === a.family_id)?.name || 'Familia';
+                  const subfamilyName = taxonomy.subfamilies.find((x) => x.id === a.subfamily_id)?.name || 'Subfamilia';
 
                   return (
                     <Chip
@@ -1,7 +1,7 @@
-import React, { useState, useCallback } from 'react';
+import React, { useState } from 'react';
 import {
   Accordion, AccordionSummary, AccordionDetails, Typography, Box,
-  Tabs, Tab, TextField, Autocomplete, Chip, Select, MenuItem,
+  Tabs, Tab, Select, MenuItem,
   FormControl, InputLabel, FormLabel, Link, Tooltip
 } from '@mui/material';
 import ExpandMoreIcon from '@mui/icons-material/ExpandMore';
@@ -9,8 +9,9 @@ import PublicIcon from '@mui/icons-material/Public';
 import OpenInNewIcon from '@mui/icons-material/OpenInNew';
 
 import {
-  FLAG_ICONS, CATEGORY_OPTIONS, AVAILABLE_PRODUCTS, COUNTRIES_ORDER, WEBSITE_BASE_URL, getCountryDisplayName,
+  FLAG_ICONS, CATEGORY_OPTIONS, COUNTRIES_ORDER, WEBSITE_BASE_URL, getCountryDisplayName,
 } from '../../utils/constants.js';
+import SkuAutocomplete from './SkuAutocomplete.jsx';
 
 function TabPanel(props) {
   const { children, value, index, ...other } = props;
@@ -35,6 +36,7 @@ export default function ProductCountriesOptions({
   countrySettings: editableCountrySettings,
   savedCountrySettings,
   handleUpdateCountrySetting,
+  parseProductList,
   url,
   status,
   userRole,
@@ -75,8 +77,6 @@ export default function ProductCountriesOptions({
     }
   };
 
-  const parseProductList = useCallback((str) => str ? str.split(',').map(s => s.trim()).filter(Boolean).map(sku => AVAILABLE_PRODUCTS.find(p => p.sku === sku)).filter(Boolean) : [], []);
-
   return (
     <Accordion defaultExpanded={true} sx={{ borderRadius: '8px !important', boxShadow: 'none', border: '1px solid #eee' }}>
       <AccordionSummary
@@ -296,79 +296,19 @@ export default function ProductCountriesOptions({
                       </Select>
                     </FormControl>
 
-                    <Autocomplete
-                      multiple
+                    <SkuAutocomplete
                       id={`${country}-related-products`}
-                      options={AVAILABLE_PRODUCTS}
-                      getOptionLabel={(option) => option.name}
-                      isOptionEqualToValue={(option, value) => option.id === value.id}
+                      label="Productos Relacionados"
                       value={formData.relatedProducts}
                       onChange={handleRelatedProductsChange(country)}
-                      renderInput={(params) => (
-                        <TextField
-                          {...params}
-                          variant="outlined"
-                          label="Productos Relacionados"
-                          placeholder="Seleccionar productos"
-                          sx={{ '& .MuiOutlinedInput-root': { borderRadius: '8px' } }}
-                        />
-                      )}
-                      renderTags={(value, getTagProps) => value.map((option, index) => {
-                        const { key, onDelete, ...chipProps } = getTagProps({ index });
-                        return (
-                          <Chip
-                            key={option.id}
-                            variant="outlined"
-                            label={option.name}
-                            {...chipProps}
-                            onDelete={isReadOnly ? undefined : onDelete}
-                            sx={{
-                                opacity: isReadOnly ? 0.7 : 1,
-                                cursor: isReadOnly ? 'not-allowed' : 'default'
-                            }}
-                          />
-                        );
-                      })}
-                      disableCloseOnSelect
                       disabled={isReadOnly}
-                      sx={{ '& .MuiOutlinedInput-root': { borderRadius: '8px' } }}
                     />
-                    <Autocomplete
-                      multiple
+                    <SkuAutocomplete
                       id={`${country}-substitute-products`}
-                      options={AVAILABLE_PRODUCTS}
-                      getOptionLabel={(option) => option.name}
-                      isOptionEqualToValue={(option, value) => option.id === value.id}
+                      label="Productos Sustitutos"
                       value={formData.substituteProducts}
                       onChange={handleSubstituteProductsChange(country)}
-                      renderInput={(params) => (
-                        <TextField
-                          {...params}
-                          variant="outlined"
-                          label="Productos Sustitutos"
-                          placeholder="Seleccionar productos"
-                          sx={{ '& .MuiOutlinedInput-root': { borderRadius: '8px' } }}
-                        />
-                      )}
-                      renderTags={(value, getTagProps) => value.map((option, index) => {
-                        const { key, onDelete, ...chipProps } = getTagProps({ index });
-                        return (
-                          <Chip
-                            key={option.id}
-                            variant="outlined"
-                            label={option.name}
-                            {...chipProps}
-                            onDelete={isReadOnly ? undefined : onDelete}
-                            sx={{
-                                opacity: isReadOnly ? 0.7 : 1,
-                                cursor: isReadOnly ? 'not-allowed' : 'default'
-                            }}
-                          />
-                        );
-                      })}
-                      disableCloseOnSelect
                       disabled={isReadOnly}
-                      sx={{ '& .MuiOutlinedInput-root': { borderRadius: '8px' } }}
                     />
                   </Box>
                 );
@@ -0,0 +1,79 @@
+import React, { useState, useEffect } from 'react';
+import { TextField, Autocomplete, Chip } from '@mui/material';
+
+import { useAuth } from '../../auth/contexts/AuthContext';
+import * as productApi from '../../services/productApi';
+
+const SEARCH_DEBOUNCE_MS = 250;
+
+const getOptionLabel = (option) => option.name === option.sku ? option.sku : `${option.name} (SKU: ${option.sku})`;
+
+// Selector múltiple de productos que busca por SKU o nombre en la API a medida que se escribe.
+export default function SkuAutocomplete({ id, label, value, onChange, disabled }) {
+  const { fetchWithRefresh } = useAuth();
+  const [inputValue, setInputValue] = useState('');
+  const [options, setOptions] = useState([]);
+  const [loading, setLoading] = useState(false);
+
+  useEffect(() => {
+    if (disabled) return undefined;
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      setLoading(true);
+      productApi.autocompleteSkus(inputValue.trim(), fetchWithRefresh)
+        .then(results => { if (!cancelled) setOptions(results); })
+        .catch(err => console.error(err))
+        .finally(() => { if (!cancelled) setLoading(false); });
+    }, SEARCH_DEBOUNCE_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [inputValue, disabled, fetchWithRefresh]);
+
+  return (
+    <Autocomplete
+      multiple
+      id={id}
+      options={options}
+      loading={loading}
+      filterOptions={(x) => x}
+      getOptionLabel={getOptionLabel}
+      isOptionEqualToValue={(option, selected) => option.sku === selected.sku}
+      value={value}
+      onChange={onChange}
+      inputValue={inputValue}
+      onInputChange={(event, newInputValue) => setInputValue(newInputValue)}
+      noOptionsText="Sin resultados"
+      loadingText="Buscando..."
+      renderInput={(params) => (
+        <TextField
+          {...params}
+          variant="outlined"
+          label={label}
+          placeholder="Buscar por SKU o nombre"
+          sx={{ '& .MuiOutlinedInput-root': { borderRadius: '8px' } }}
+        />
+      )}
+      renderTags={(tags, getTagProps) => tags.map((option, index) => {
+        const { key, onDelete, ...chipProps } = getTagProps({ index });
+        return (
+          <Chip
+            key={option.sku}
+            variant="outlined"
+            label={getOptionLabel(option)}
+            {...chipProps}
+            onDelete={disabled ? undefined : onDelete}
+            sx={{
+                opacity: disabled ? 0.7 : 1,
+                cursor: disabled ? 'not-allowed' : 'default'
+            }}
+          />
+        );
+      })}
+      disableCloseOnSelect
+      disabled={disabled}
+      sx={{ '& .MuiOutlinedInput-root': { borderRadius: '8px' } }}
+    />
+  );
+}
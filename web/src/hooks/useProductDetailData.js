@@ -3,10 +3,12 @@ import { useAuth } from '../auth/contexts/AuthContext';
 import * as productApi from '../services/productApi';
 import { getYouTubeVideoId, MAX_VIDEOS_TOTAL, MAX_GALLERY_IMAGES_TOTAL, MAX_GALLERY_IMAGE_SIZE_BYTES, MAX_GALLERY_IMAGE_SIZE_KB,
          REQUIRED_GALLERY_IMAGE_WIDTH, REQUIRED_GALLERY_IMAGE_HEIGHT, ALLOWED_GALLERY_MIME_TYPES, MAX_DOCUMENTS_TOTAL,
-         MAX_DOCUMENT_FILE_SIZE_BYTES, MAX_DOCUMENT_FILE_SIZE_MB, CATEGORY_OPTIONS, AVAILABLE_PRODUCTS
+         MAX_DOCUMENT_FILE_SIZE_BYTES, MAX_DOCUMENT_FILE_SIZE_MB, CATEGORY_OPTIONS
 } from '../utils/constants.js';
 import { arrayMove } from '@dnd-kit/sortable';
 
+const splitSkuList = (str) => str ? str.split(',').map(s => s.trim()).filter(Boolean) : [];
+
 export const useProductDetailData = (productProp) => {
     const { user, fetchWithRefresh } = useAuth();
     const productId = productProp?.id;
@@ -18,6 +20,7 @@ export const useProductDetailData = (productProp) => {
     const [documentationFiles, setDocumentationFiles] = useState([]);
     const [history, setHistory] = useState([]);
     const [countrySettings, setCountrySettings] = useState(productProp?.country_settings || []);
+    const [productsBySku, setProductsBySku] = useState({});
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [loadingAction, setLoadingAction] = useState(null);
@@ -91,6 +94,25 @@ export const useProductDetailData = (productProp) => {
         fetchAllData();
     }, [productProp, fetchAllData]);
 
+    // Resuelve contra la API los SKU relacionados/sustitutos que aún no se conocen.
+    useEffect(() => {
+        const skus = [...new Set(countrySettings.flatMap(cs => splitSkuList(cs.related).concat(splitSkuList(cs.substitute))))]
+            .filter(sku => !(sku in productsBySku));
+        if (skus.length === 0) return;
+        let cancelled = false;
+        productApi.resolveSkus(skus, fetchWithRefresh)
+            .then(({ results, missing }) => {
+                if (cancelled) return;
+                setProductsBySku(prev => ({
+                    ...prev,
+                    ...Object.fromEntries(missing.map(sku => [sku, null])),
+                    ...Object.fromEntries(results.map(p => [p.sku, p])),
+                }));
+            })
+            .catch(err => console.error(err));
+        return () => { cancelled = true; };
+    }, [countrySettings, productsBySku, fetchWithRefresh]);
+
     
     // --- Handlers de Campos y Nombre ---
     const handleFieldChange = useCallback((field) => (event) => {
@@ -103,7 +125,8 @@ export const useProductDetailData = (productProp) => {
     }, [currentProduct.name]);
 
     // --- Lógica de Países ---
-    const parseProductList = useCallback((str) => str ? str.split(',').map(s => s.trim()).filter(Boolean).map(sku => AVAILABLE_PRODUCTS.find(p => p.sku === sku)).filter(Boolean) : [], []);
+    // Los SKU que no existen o aún no se resuelven se muestran igual para no perderlos al guardar.
+    const parseProductList = useCallback((str) => splitSkuList(str).map(sku => productsBySku[sku] || { id: sku, sku, name: sku }), [productsBySku]);
     const formatProductListForBackend = useCallback((arr) => arr.map(p => p.sku).join(','), []);
     const getCurrentCountryData = useCallback((code) => {
         const setting = countrySettings.find(cs => cs.country_code === code) || {};
@@ -133,6 +156,9 @@ export const useProductDetailData = (productProp) => {
             else if (field === 'substituteProducts') setting.substitute = formatProductListForBackend(value);
             return newSettings;
         });
+        if (field === 'relatedProducts' || field === 'substituteProducts') {
+            setProductsBySku(prev => ({ ...prev, ...Object.fromEntries(value.map(p => [p.sku, p])) }));
+        }
     }, [formatProductListForBackend]);
 
     // --- Guardado y Acciones de Estado ---
@@ -300,6 +326,7 @@ export const useProductDetailData = (productProp) => {
         handleReturnToEdit,
         handleUpdateCountrySetting,
         getCurrentCountryData,
+        parseProductList,
         openRequestConfirm,
         setOpenRequestConfirm,
         openPublishConfirm,
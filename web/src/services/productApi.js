@@ -44,7 +44,32 @@ export const updateProductStatus = async (productId, statusPayload, fetchWithRef
     return response.json();
 };
 
+// --- FUNCIONES DE SKU (PRODUCTOS RELACIONADOS Y SUSTITUTOS) ---
+export const autocompleteSkus = async (query, fetchWithRefresh, limit = 10) => {
+    const params = new URLSearchParams({ q: query, limit: String(limit) });
+    const response = await fetchWithRefresh(`${API_BASE_URL}/v1/products/skus/?${params}`);
+    if (!response.ok) throw new Error('Error al buscar productos');
+    return (await response.json()).results;
+};
+
+export const resolveSkus = async (skus, fetchWithRefresh) => {
+    const response = await fetchWithRefresh(`${API_BASE_URL}/v1/products/skus/resolve/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ skus }),
+    });
+    if (!response.ok) throw new Error('Error al obtener los productos relacionados');
+    return response.json();
+};
+
 // --- FUNCIONES DE VIDEOS (SIMPLIFICADAS) ---
+// --- FUNCIONES DE TAXONOMÍA ---
+export const getTaxonomyTree = async (fetchWithRefresh) => {
+    const response = await fetchWithRefresh(`${API_BASE_URL}/v1/taxonomy/`);
+    if (!response.ok) throw new Error('Error al obtener la taxonomía');
+    return response.json();
+};
+
 export const getProductVideos = async (productId, fetchWithRefresh) => {
     const response = await fetchWithRefresh(`${API_BASE_URL}/v1/products/${productId}/videos/`);
     if (!response.ok) throw new Error('Error al obtener los videos');
@@ -9,22 +9,6 @@ export const ROLES_MAP = [
   { id: 3, name: "Default User" },
 ];
 
-export const AREAS_MAP  = [
-  { id: 157, name: 'ELÉCTRICA' },
-  { id: 158, name: 'INDUSTRIAL' }
-];
-
-export const FAMILIES_MAP = [
-  { id: 157015, name: 'INSTRUMENTOS DE MEDIDA', areaId: 157 },
-  { id: 158012, name: 'TERMINALES DE PESO', areaId: 158 },
-];
-
-export const SUBFAMILIES_MAP = [
-  { id: 157015006, name: 'COMPROBACIÓN ELÉCTRICA', familyId: 157015 },
-  { id: 157015010, name: 'HERRAMIENTAS DE CALIBRACIÓN', familyId: 157015 },
-  { id: 158012012, name: 'TERMINALES BÁSICOS', familyId: 158012 },
-];
-
 export const ESTADO_COLORS = {
   'draft': 'default',
   'editing': 'info',
@@ -70,14 +54,6 @@ export const CATEGORY_OPTIONS = [
   { value: 'Z', label: 'Z - Primario en Fase de salida' },
 ];
 
-export const AVAILABLE_PRODUCTS = [
-  { id: 'prod-A', sku: '12345', name: 'Producto A (SKU: 12345)' },
-  { id: 'prod-B', sku: '67890', name: 'Producto B (SKU: 67890)' },
-  { id: 'prod-C', sku: '11223', name: 'Producto C (SKU: 11223)' },
-  { id: 'prod-D', sku: '44556', name: 'Producto D (SKU: 44556)' },
-  { id: 'prod-E', sku: '77889', name: 'Producto E (SKU: 77889)' },
-];
-
 export const COUNTRIES_ORDER = ['cl', 'pe', 'ec', 'bo'];
 
 export const getCountryDisplayName = (code) => {
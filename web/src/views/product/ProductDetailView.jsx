@@ -108,6 +108,7 @@ export default function ProductDetailView({
                     countrySettings={hookResult.countrySettings}
                     savedCountrySettings={hookResult.savedCountrySettings}
                     handleUpdateCountrySetting={hookResult.handleUpdateCountrySetting}
+                    parseProductList={hookResult.parseProductList}
                     url={hookResult.currentProduct.url}
                     status={hookResult.productStatus}
                     userRole={user.role}
@@ -1,6 +1,5 @@
-import React, { useEffect, useState, useCallback, useMemo } from 'react';
+import React, { useEffect, useState, useCallback, useMemo, useRef } from 'react';
 import {
-  CircularProgress,
   Paper,
   TextField,
   Chip,
@@ -37,15 +36,23 @@ const productTypeFilterOptions = Object.keys(PRODUCT_TYPE_DISPLAY_NAMES).map(cod
 }));
 
 
+const PAGE_SIZE_OPTIONS = [5, 10, 25, 50];
+// Solo las columnas que muestra la grilla; el detalle se pide aparte al seleccionar un producto.
+const LIST_FIELDS = 'id,sku,name,brand,area,family,subfamily,product_type,status,published';
+
 export default function Products({ mainScrollRef }) {
   const { user, fetchWithRefresh } = useAuth();
   const [loadingProducts, setLoadingProducts] = useState(true);
   const [loadingDetail, setLoadingDetail] = useState(false);
   const [products, setProducts] = useState([]);
-  const [filtered, setFiltered] = useState([]);
   const [search, setSearch] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
   const [selectedProduct, setSelectedProduct] = useState(null);
   const [showDetail, setShowDetail] = useState(false);
+  const [paginationModel, setPaginationModel] = useState({ page: 0, pageSize: 10 });
+  const [hasNextPage, setHasNextPage] = useState(false);
+  // Cursor de cada página ya visitada: la API pagina por cursor (keyset), no por número de página.
+  const cursorsRef = useRef({ 0: null });
 
   const theme = useTheme();
   const isMobile = useMediaQuery(theme.breakpoints.down('sm'));
@@ -56,10 +63,43 @@ export default function Products({ mainScrollRef }) {
     published: '',
   });
 
+  const resetPagination = useCallback(() => {
+    cursorsRef.current = { 0: null };
+    setPaginationModel((prev) => (prev.page === 0 ? prev : { ...prev, page: 0 }));
+  }, []);
+
+  useEffect(() => {
+    const timeout = setTimeout(() => {
+      const value = search.trim();
+      setDebouncedSearch((prev) => {
+        if (prev !== value) resetPagination();
+        return value;
+      });
+    }, 300);
+    return () => clearTimeout(timeout);
+  }, [search, resetPagination]);
+
+  const handlePaginationModelChange = (model) => {
+    if (model.pageSize !== paginationModel.pageSize) {
+      cursorsRef.current = { 0: null };
+      setPaginationModel({ page: 0, pageSize: model.pageSize });
+      return;
+    }
+    setPaginationModel(model);
+  };
+
   const fetchProductsData = useCallback(async () => {
     setLoadingProducts(true);
     try {
-      const response = await fetchWithRefresh(`${import.meta.env.VITE_API_URL}/v1/products/`, {
+      const params = new URLSearchParams({ page_size: paginationModel.pageSize, fields: LIST_FIELDS });
+      const cursor = cursorsRef.current[paginationModel.page];
+      if (cursor) params.set('cursor', cursor);
+      if (debouncedSearch) params.set('search', debouncedSearch);
+      if (filters.product_type) params.set('product_type', filters.product_type);
+      if (filters.status) params.set('status', filters.status);
+      if (filters.published) params.set('published', filters.published === 'Sí' ? 'true' : 'false');
+
+      const response = await fetchWithRefresh(`${import.meta.env.VITE_API_URL}/v1/products/?${params}`, {
         headers: {
           Authorization: `Bearer ${user.access}`,
           'Content-Type': 'application/json',
@@ -67,17 +107,20 @@ export default function Products({ mainScrollRef }) {
       });
       if (response.ok) {
         const data = await response.json();
-        const withIds = data.map((item) => ({
+        const withIds = data.results.map((item) => ({
           ...item,
           id: item.id.toString(),
-          product_type_code: item.product_type.code,
-          product_type_name: item.product_type.name,
-          status_code: item.status.code,
-          status_name: item.status.name,
+          product_type_code: item.product_type?.code,
+          product_type_name: item.product_type?.name,
+          status_code: item.status?.code,
+          status_name: item.status?.name,
           published_str: item.published ? 'Sí' : 'No', 
         }));
+        if (data.next) {
+          cursorsRef.current[paginationModel.page + 1] = new URL(data.next).searchParams.get('cursor');
+        }
+        setHasNextPage(Boolean(data.next));
         setProducts(withIds);
-        setFiltered(withIds);
       } else {
         console.error('Error al traer los productos');
       }
@@ -86,30 +129,16 @@ export default function Products({ mainScrollRef }) {
     } finally {
       setLoadingProducts(false);
     }
-  }, [user, fetchWithRefresh]);
+  }, [user, fetchWithRefresh, paginationModel, debouncedSearch, filters]);
 
   useEffect(() => {
     fetchProductsData();
   }, [fetchProductsData]);
 
-  const normalizeText = (text) =>
-    text?.normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase() || '';
-
-  useEffect(() => {
-    const normalizedSearch = normalizeText(search);
-
-    const result = products.filter((p) => {
-      const matchesSearch = ['name', 'sku', 'brand', 'area', 'family', 'subfamily'].some((field) =>
-        normalizeText(p[field] || '').includes(normalizedSearch)
-      );
-      const matchesProductType = filters.product_type ? p.product_type_code === filters.product_type : true;
-      const matchesStatus = filters.status ? p.status_code === filters.status : true;
-      const matchesPublished = filters.published ? p.published_str === filters.published : true;
-      return matchesSearch && matchesProductType && matchesStatus && matchesPublished;
-    });
-
-    setFiltered(result);
-  }, [search, products, filters]);
+  // La API no entrega un total; se estima para que la grilla habilite el botón "siguiente".
+  const rowCount = hasNextPage
+    ? (paginationModel.page + 2) * paginationModel.pageSize
+    : paginationModel.page * paginationModel.pageSize + products.length;
 
   const columns = useMemo(() => {
     const baseColumns = [
@@ -186,13 +215,14 @@ export default function Products({ mainScrollRef }) {
   const handleFilterChange = (filterModel) => {
     const newFilters = { product_type: '', status: '', published: '' };
     filterModel.items.forEach((filter) => {
+      const field = filter.field ?? filter.columnField;
       if (filter.value) {
-        if (filter.columnField === 'product_type_code') newFilters.product_type = filter.value;
-        else if (filter.columnField === 'status_code') newFilters.status = filter.value;
-        else if (filter.columnField === 'published_str') newFilters.published = filter.value;
-        else newFilters[filter.columnField] = filter.value;
+        if (field === 'product_type_code') newFilters.product_type = filter.value;
+        else if (field === 'status_code') newFilters.status = filter.value;
+        else if (field === 'published_str') newFilters.published = filter.value;
       }
     });
+    resetPagination();
     setFilters(newFilters);
   };
 
@@ -228,12 +258,7 @@ export default function Products({ mainScrollRef }) {
         <Fade in={!showDetail} timeout={500}>
           <div>
             <h2 className="module-title">Productos</h2>
-            {loadingProducts ? (
-              <Box display="flex" justifyContent="center" alignItems="center" height="calc(100vh - 64px)">
-                <CircularProgress sx={{ color: '#0a1a28' }} />
-              </Box>
-            ) : (
-              <Paper sx={{ p: 2 }}>
+            <Paper sx={{ p: 2 }}>
                 <TextField
                   label="Buscar producto"
                   variant="outlined"
@@ -244,12 +269,17 @@ export default function Products({ mainScrollRef }) {
                 />
                 <Box sx={{ height: 600, width: '100%' }}>
                   <DataGrid
-                    rows={filtered}
+                    rows={products}
                     columns={columns}
-                    pageSizeOptions={[5, 10, 25, 50]}
+                    loading={loadingProducts}
+                    pageSizeOptions={PAGE_SIZE_OPTIONS}
                     pagination
+                    paginationMode="server"
+                    paginationModel={paginationModel}
+                    onPaginationModelChange={handlePaginationModelChange}
+                    rowCount={rowCount}
                     disableRowSelectionOnClick
-                    filterMode="client"
+                    filterMode="server"
                     localeText={esES.components.MuiDataGrid.defaultProps.localeText}
                     onFilterModelChange={handleFilterChange}
                     onRowClick={handleRowClick}
@@ -263,13 +293,11 @@ export default function Products({ mainScrollRef }) {
                       },
                     }}
                     initialState={{
-                      pagination: { paginationModel: { pageSize: 10, page: 0 } },
                       filter: { filterModel: { items: [] } },
                     }}
                   />
                 </Box>
               </Paper>
-            )}
           </div>
         </Fade>
       )}